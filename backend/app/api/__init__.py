@@ -1,11 +1,26 @@
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
-from fastapi import APIRouter
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
+from app.api.internal import internal_router
 from app.api.users import users_router
+from app.core.cache import InMemoryCache, QueueCache
 from app.core.config import settings
+from app.core.database import create_engine
+from app.core.metrics import metrics
+from app.core.sharding import ShardRouter
+from app.core.singleflight import SingleFlight
+from app.core.slow_queries import SlowQueryLog
+from app.core.work_queue import KeyedWorkQueue
+from app.core.write_behind import WriteBehindBuffer
+from app.core.write_log import WriteLog
+from app.repositories.snapshot import ProfileSnapshot
+from app.services.factories import feed_refill
+from app.services.swipe_service import swipe_key, swipe_writer
+from app.utils.security import verify_jwt_token
 
 
 @asynccontextmanager
@@ -21,19 +36,152 @@ async def lifespan(app: APIRouter) -> AsyncGenerator[None]:
     """
 
     # Set up the async database engine and session factory
-    app.state.engine = create_async_engine(settings.DATABASE_URL, echo=False)
+    app.state.engine = create_engine(settings.DATABASE_URL)
     app.state.async_session_maker = async_sessionmaker(app.state.engine)
 
+    # Reads run in read-only transactions, on the replica when one is configured
+    app.state.replica_engine = None
+    read_engine = app.state.engine
+    if settings.REPLICA_DATABASE_URL:
+        app.state.replica_engine = create_engine(settings.REPLICA_DATABASE_URL)
+        read_engine = app.state.replica_engine
+    app.state.async_read_session_maker = async_sessionmaker(
+        read_engine.execution_options(postgresql_readonly=True)
+    )
+
+    # Route profiles to their shard when the storage is sharded
+    app.state.shard_router = None
+    if settings.SHARDS:
+        app.state.shard_router = ShardRouter.from_urls(
+            settings.SHARDS, virtual_nodes=settings.SHARD_VIRTUAL_NODES
+        )
+
+    # Log slow statements of every database, with sampled query plans
+    app.state.slow_query_log = None
+    if settings.SLOW_QUERY_THRESHOLD_MS >= 0:
+        slow_query_log = SlowQueryLog(
+            threshold=settings.SLOW_QUERY_THRESHOLD_MS / 1000,
+            size=settings.SLOW_QUERY_LOG_SIZE,
+            explain_rate=settings.SLOW_QUERY_EXPLAIN_RATE,
+            explain_timeout=settings.SLOW_QUERY_EXPLAIN_TIMEOUT,
+        )
+        slow_query_log.instrument(app.state.engine, "primary")
+        if app.state.replica_engine is not None:
+            slow_query_log.instrument(app.state.replica_engine, "replica")
+        if app.state.shard_router is not None:
+            for name, engine in app.state.shard_router.engines.items():
+                slow_query_log.instrument(engine, name)
+        app.state.slow_query_log = slow_query_log
+
+    # Load the in-memory profile snapshot used by candidate matching
+    app.state.profile_snapshot = None
+    if settings.PROFILE_SNAPSHOT_ENABLED:
+        if app.state.shard_router is None:
+            app.state.profile_snapshot = await ProfileSnapshot.load(
+                app.state.async_session_maker
+            )
+        else:
+            app.state.profile_snapshot = ProfileSnapshot()
+            for session_maker in app.state.shard_router.session_makers.values():
+                await app.state.profile_snapshot.load_rows(session_maker)
+
+    # Set up the read-through cache of single profiles
+    app.state.profile_cache = None
+    app.state.profile_write_log = None
+    if settings.PROFILE_CACHE_SIZE > 0:
+        app.state.profile_cache = InMemoryCache(
+            max_size=settings.PROFILE_CACHE_SIZE, ttl=settings.PROFILE_CACHE_TTL
+        )
+        # Profile writes, so that reads racing them don't refill the cache
+        app.state.profile_write_log = WriteLog(
+            max_age=max(settings.PROFILE_CACHE_TTL, settings.REPLICA_MAX_LAG)
+        )
+
+    # Set up the cache of verified API tokens
+    app.state.token_cache = None
+    if settings.JWT_CACHE_SIZE > 0:
+        app.state.token_cache = InMemoryCache(
+            max_size=settings.JWT_CACHE_SIZE, ttl=settings.JWT_CACHE_MAX_TTL
+        )
+
+    # Share in-flight reads between concurrent requests for the same key
+    app.state.single_flight = SingleFlight()
+
+    # Buffer swipes in memory and write them in batches
+    app.state.swipe_buffer = None
+    if settings.SWIPE_BUFFER_SIZE > 0:
+        app.state.swipe_buffer = WriteBehindBuffer(
+            swipe_writer(app.state.async_session_maker),
+            key=swipe_key,
+            max_size=settings.SWIPE_BUFFER_SIZE,
+            batch_size=settings.SWIPE_FLUSH_BATCH_SIZE,
+            interval=settings.SWIPE_FLUSH_INTERVAL,
+        )
+        app.state.swipe_buffer.start()
+
+    # Refill the precomputed candidate queues in the background
+    app.state.feed_cache = None
+    if settings.FEED_FRONT_CACHE_SIZE > 0:
+        app.state.feed_cache = QueueCache(max_size=settings.FEED_FRONT_CACHE_SIZE)
+    app.state.feed_refiller = None
+    if settings.FEED_REFILL_WORKERS > 0:
+        app.state.feed_refiller = KeyedWorkQueue(
+            feed_refill(
+                app.state.async_session_maker,
+                app.state.async_read_session_maker,
+                snapshot=app.state.profile_snapshot,
+                shard_router=app.state.shard_router,
+                swipe_buffer=app.state.swipe_buffer,
+                replica_lag=settings.REPLICA_MAX_LAG
+                if app.state.replica_engine is not None
+                else 0.0,
+            ),
+            workers=settings.FEED_REFILL_WORKERS,
+            max_pending=settings.FEED_REFILL_BACKLOG,
+        )
+        app.state.feed_refiller.start()
+
     yield  # App is running
 
-    # Clean up the database engine on shutdown
+    # Refills are best-effort: the waiting ones are dropped, a stuck one cancelled
+    if app.state.feed_refiller is not None:
+        await app.state.feed_refiller.close(timeout=5.0)
+
+    # Write the buffered swipes before the engine goes away
+    if app.state.swipe_buffer is not None:
+        await app.state.swipe_buffer.close(timeout=settings.SWIPE_SHUTDOWN_TIMEOUT)
+
+    # Clean up the database engines on shutdown
+    if app.state.slow_query_log is not None:
+        await app.state.slow_query_log.close()
     await app.state.engine.dispose()
+    if app.state.replica_engine is not None:
+        await app.state.replica_engine.dispose()
+    if app.state.shard_router is not None:
+        await app.state.shard_router.dispose()
 
 
 # Create the main application router and attach the lifespan handler
 main_router = APIRouter(lifespan=lifespan)
 
 
+@main_router.get(
+    "/metrics",
+    tags=["Internal"],
+    response_class=PlainTextResponse,
+    dependencies=[Depends(verify_jwt_token)],
+)
+async def get_metrics() -> PlainTextResponse:
+    """
+    Latency histograms of requests, JWT checks, service methods, units of work
+    and SQL statements.
+
+    Returns:
+        PlainTextResponse: Metrics in the Prometheus text exposition format.
+    """
+    return PlainTextResponse(metrics.render(), media_type=metrics.content_type)
+
+
 @main_router.get("/ping", tags=["Test"])
 async def ping() -> dict:
     """
@@ -47,3 +195,6 @@ async def ping() -> dict:
 
 # Include the user-related routes under the "User" tag
 main_router.include_router(users_router, prefix="/users")
+
+# Include the internal diagnostics routes
+main_router.include_router(internal_router, prefix="/internal", tags=["Internal"])
@@ -0,0 +1,101 @@
+from fastapi import APIRouter, Depends, Request, status
+
+from app.utils.security import verify_jwt_token
+
+internal_router = APIRouter(dependencies=[Depends(verify_jwt_token)])
+
+
+@internal_router.get("/cache", status_code=status.HTTP_200_OK)
+async def get_cache_stats(request: Request) -> dict:
+    """
+    Get the counters of the in-process caches.
+
+    Args:
+        request (Request): Current request, gives access to the application state.
+
+    Returns:
+        dict: Hit, miss and eviction counters per cache, None for a disabled cache.
+    """
+    profile_cache = getattr(request.app.state, "profile_cache", None)
+    token_cache = getattr(request.app.state, "token_cache", None)
+    return {
+        "profiles": profile_cache.stats() if profile_cache else None,
+        "tokens": token_cache.stats() if token_cache else None,
+    }
+
+
+@internal_router.get("/pool", status_code=status.HTTP_200_OK)
+async def get_pool_stats(request: Request) -> dict:
+    """
+    Get the state and counters of the database connection pool.
+
+    Args:
+        request (Request): Current request, gives access to the application state.
+
+    Returns:
+        dict: Checked out and idle connections, overflow, checkout waits and timeouts
+            of the primary and, if configured, the replica and shard pools.
+    """
+    state = request.app.state
+    replica_engine = getattr(state, "replica_engine", None)
+    shard_router = getattr(state, "shard_router", None)
+    return {
+        "primary": state.engine.sync_engine.pool.metrics.stats(),
+        "replica": (
+            replica_engine.sync_engine.pool.metrics.stats() if replica_engine else None
+        ),
+        "shards": shard_router.pool_stats() if shard_router else None,
+    }
+
+
+@internal_router.get("/slow-queries", status_code=status.HTTP_200_OK)
+async def get_slow_queries(request: Request) -> dict | None:
+    """
+    Get the latest statements that exceeded the slow query threshold.
+
+    Args:
+        request (Request): Current request, gives access to the application state.
+
+    Returns:
+        dict | None: Threshold, total count and the latest entries, newest first,
+            with normalized SQL, redacted parameters, duration, calling service
+            method and sampled EXPLAIN plan; None if the log is disabled.
+    """
+    slow_query_log = getattr(request.app.state, "slow_query_log", None)
+    return slow_query_log.stats() if slow_query_log else None
+
+
+@internal_router.get("/swipe-buffer", status_code=status.HTTP_200_OK)
+async def get_swipe_buffer_stats(request: Request) -> dict | None:
+    """
+    Get the state and counters of the swipe write-behind buffer.
+
+    Args:
+        request (Request): Current request, gives access to the application state.
+
+    Returns:
+        dict | None: Buffered swipes, written swipes and batches, failed flushes
+            and puts that waited for room; None if swipes are written inline.
+    """
+    swipe_buffer = getattr(request.app.state, "swipe_buffer", None)
+    return swipe_buffer.stats() if swipe_buffer is not None else None
+
+
+@internal_router.get("/feeds", status_code=status.HTTP_200_OK)
+async def get_feed_stats(request: Request) -> dict:
+    """
+    Get the counters of the feed front cache and of the background refills.
+
+    Args:
+        request (Request): Current request, gives access to the application state.
+
+    Returns:
+        dict: Cached queue heads with hits and misses, and waiting, running, done,
+            failed and dropped refills; None for a disabled part.
+    """
+    feed_cache = getattr(request.app.state, "feed_cache", None)
+    feed_refiller = getattr(request.app.state, "feed_refiller", None)
+    return {
+        "front_cache": feed_cache.stats() if feed_cache is not None else None,
+        "refills": feed_refiller.stats() if feed_refiller is not None else None,
+    }
@@ -1,9 +1,15 @@
 from fastapi import APIRouter
 
+from app.api.users.user_candidates import router as candidates_router
+from app.api.users.user_feed import router as feed_router
 from app.api.users.user_preferences import router as preferences_router
 from app.api.users.user_profile import router as profile_router
+from app.api.users.user_swipes import router as swipes_router
 
 users_router = APIRouter()
 
 users_router.include_router(profile_router, tags=["User Profile"])
 users_router.include_router(preferences_router, tags=["User Preference"])
+users_router.include_router(candidates_router, tags=["User Candidates"])
+users_router.include_router(swipes_router, tags=["User Swipes"])
+users_router.include_router(feed_router, tags=["User Feed"])
@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Depends, Query, Response, status
+
+from app.core.config import settings
+from app.schemas.user_schema import Page, UserProfileRead
+from app.services.factories import ServiceFactory
+from app.utils.dependencies import get_service_factory
+from app.utils.security import verify_jwt_token
+from app.utils.serialization import json_response
+
+router = APIRouter(dependencies=[Depends(verify_jwt_token)])
+
+
+@router.get(
+    "/{telegram_id}/candidates",
+    status_code=status.HTTP_200_OK,
+    response_model=Page[UserProfileRead],
+)
+async def get_user_candidates(
+    telegram_id: int,
+    after: str | None = Query(default=None),
+    limit: int = Query(
+        default=settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE
+    ),
+    age_min: int | None = Query(default=None, ge=0, le=120),
+    age_max: int | None = Query(default=None, ge=0, le=120),
+    radius_km: float | None = Query(
+        default=None, gt=0, le=settings.MAX_CANDIDATE_RADIUS_KM
+    ),
+    service_factory: ServiceFactory = Depends(get_service_factory),
+) -> Response:
+    """
+    Get a page of profiles that match the user's preferences.
+
+    Candidates live in the same city, or within `radius_km` of the user when
+    given, fall into the age window and both sides' preferences accept each
+    other's sex.
+
+    Args:
+        telegram_id (int): Unique identifier of the user.
+        after (str | None): Cursor returned as `next_cursor` by the previous page.
+        limit (int): Maximum number of candidates on the page.
+        age_min (int | None): Lower age bound, the user's age minus the window by default.
+        age_max (int | None): Upper age bound, the user's age plus the window by default.
+        radius_km (float | None): Search around the user's location instead of in their city.
+        service_factory (ServiceFactory): Factory for creating services for handling user logic.
+
+    Returns:
+        Page[UserProfileRead]: Page of candidates and the cursor of the next page.
+    """
+    matching_service = service_factory.get_matching_services()
+    candidates = await matching_service.find_candidates(
+        telegram_id,
+        after=after,
+        limit=limit,
+        age_min=age_min,
+        age_max=age_max,
+        radius_km=radius_km,
+    )
+    return json_response(candidates)
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, Response, status
+
+from app.schemas.user_schema import UserProfileRead
+from app.services.factories import ServiceFactory
+from app.utils.dependencies import get_service_factory
+from app.utils.security import verify_jwt_token
+
+router = APIRouter(dependencies=[Depends(verify_jwt_token)])
+
+
+@router.get(
+    "/{telegram_id}/feed/next",
+    status_code=status.HTTP_200_OK,
+    response_model=UserProfileRead,
+    responses={status.HTTP_204_NO_CONTENT: {"description": "No candidate left"}},
+)
+async def get_next_feed_candidate(
+    telegram_id: int,
+    service_factory: ServiceFactory = Depends(get_service_factory),
+) -> Response:
+    """
+    Pop the next candidate from the user's precomputed feed.
+
+    Candidates match as on the candidates page, in the default age window, and
+    users the user already swiped are left out. Each call returns another
+    candidate, never one shown before; once all were shown, there is no content
+    until new profiles match.
+
+    Args:
+        telegram_id (int): Unique identifier of the user.
+        service_factory (ServiceFactory): Factory for creating services for handling user logic.
+
+    Returns:
+        UserProfileRead: Profile of the next candidate, or no content if there is none.
+    """
+    feed_service = service_factory.get_feed_services()
+    candidate = await feed_service.next_candidate_json(telegram_id)
+    if candidate is None:
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    return Response(candidate, media_type="application/json")
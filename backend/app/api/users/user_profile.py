@@ -1,9 +1,32 @@
-from fastapi import APIRouter, Depends, status
+from collections.abc import AsyncIterator
 
-from app.schemas.user_schema import UserProfileCreate, UserProfilePatch, UserProfileRead
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.sharding import ShardRouter
+from app.schemas.user_schema import (
+    BulkImportResult,
+    ExportFormat,
+    Page,
+    ProfilesBatchGetRequest,
+    ProfilesBatchGetResult,
+    UserProfileCreate,
+    UserProfilePatch,
+    UserProfileRead,
+    UserProfileRecord,
+)
 from app.services.factories import ServiceFactory
-from app.utils.dependencies import get_service_factory
+from app.utils.bulk_import import NDJSON_MEDIA_TYPES, iter_json_array, iter_ndjson
+from app.utils.dependencies import (
+    get_read_session_maker,
+    get_service_factory,
+    get_shard_router,
+)
+from app.utils.export import MEDIA_TYPES
 from app.utils.security import verify_jwt_token
+from app.utils.serialization import json_response
 
 router = APIRouter(dependencies=[Depends(verify_jwt_token)])
 
@@ -24,35 +47,196 @@ async def create_user_profile(
     Returns:
         dict: Telegram id of the created user.
     """
-    user_data = UserProfileRead(telegram_id=telegram_id, **user.model_dump())
+    user_data = UserProfileRecord(telegram_id=telegram_id, **user.model_dump())
     user_service = service_factory.get_profiles_services()
     telegram_id = await user_service.add_user(user_data)
     return {"telegram_id": telegram_id}
 
 
-@router.get("/profiles", status_code=status.HTTP_200_OK)
+# No route takes `UserProfileRecord` as a body, so its schema is inlined. SexEnum
+# is a component already, through `UserProfileCreate`
+_PROFILE_RECORD_SCHEMA = UserProfileRecord.model_json_schema(
+    ref_template="#/components/schemas/{model}"
+)
+_PROFILE_RECORD_SCHEMA.pop("$defs", None)
+_PROFILES_ARRAY_SCHEMA = {"type": "array", "items": _PROFILE_RECORD_SCHEMA}
+
+
+@router.post(
+    "/profiles:bulk",
+    status_code=status.HTTP_200_OK,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": _PROFILES_ARRAY_SCHEMA},
+                "application/x-ndjson": {"schema": _PROFILES_ARRAY_SCHEMA},
+            },
+        }
+    },
+)
+async def import_user_profiles(
+    request: Request,
+    service_factory: ServiceFactory = Depends(get_service_factory),
+) -> BulkImportResult:
+    """
+    Create many user profiles from a JSON array or an NDJSON stream.
+
+    Rows are validated and inserted in batches, each batch in its own transaction.
+    Invalid rows and already existing users are reported without aborting the import.
+
+    Args:
+        request (Request): Request whose body holds the profiles.
+        service_factory (ServiceFactory): Factory for creating services for handling user logic.
+
+    Returns:
+        BulkImportResult: Number of received and created profiles, conflicts and errors by row.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in NDJSON_MEDIA_TYPES:
+        rows = iter_ndjson(request.stream())
+    else:
+        rows = iter_json_array(await request.body())
+
+    user_service = service_factory.get_profiles_services()
+    result = await user_service.import_users(rows)
+    return result
+
+
+@router.post(
+    "/profiles:batchGet",
+    status_code=status.HTTP_200_OK,
+    response_model=ProfilesBatchGetResult,
+)
+async def batch_get_user_profiles(
+    request: ProfilesBatchGetRequest,
+    service_factory: ServiceFactory = Depends(get_service_factory),
+) -> Response:
+    """
+    Get many users by Telegram id in one query.
+
+    Args:
+        request (ProfilesBatchGetRequest): Telegram ids to read, at most `MAX_BATCH_GET_IDS`.
+        service_factory (ServiceFactory): Factory for creating services for handling user logic.
+
+    Returns:
+        ProfilesBatchGetResult: Found profiles in the requested order and the missing ids.
+    """
+    user_service = service_factory.get_profiles_services()
+    users = await user_service.find_users_batch(request.telegram_ids)
+    return json_response(users)
+
+
+@router.get(
+    "/profiles", status_code=status.HTTP_200_OK, response_model=Page[UserProfileRead]
+)
 async def get_user_profiles(
+    after: str | None = Query(default=None),
+    limit: int = Query(
+        default=settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE
+    ),
+    service_factory: ServiceFactory = Depends(get_service_factory),
+) -> Response:
+    """
+    Get a page of users ordered by Telegram id.
+
+    Args:
+        after (str | None): Cursor returned as `next_cursor` by the previous page.
+        limit (int): Maximum number of users on the page.
+        service_factory (ServiceFactory): Factory for creating services for handling user logic.
+
+    Returns:
+        Page[UserProfileRead]: Page of user profiles and the cursor of the next page.
+    """
+    user_service = service_factory.get_profiles_services()
+    users = await user_service.find_users_page(after=after, limit=limit)
+    return json_response(users)
+
+
+@router.get(
+    "/profiles:search",
+    status_code=status.HTTP_200_OK,
+    response_model=Page[UserProfileRead],
+)
+async def search_user_profiles(
+    q: str = Query(min_length=1, max_length=settings.MAX_SEARCH_QUERY_LENGTH),
+    after: str | None = Query(default=None),
+    limit: int = Query(
+        default=settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE
+    ),
     service_factory: ServiceFactory = Depends(get_service_factory),
-) -> list[UserProfileRead]:
+) -> Response:
     """
-    Get a list of all users.
+    Search users by name and about_me, best matches first.
 
     Args:
+        q (str): Words to search for: quoted phrases, `or`, and `-` before a word
+            to leave it out.
+        after (str | None): Cursor returned as `next_cursor` by the previous page.
+        limit (int): Maximum number of users on the page.
         service_factory (ServiceFactory): Factory for creating services for handling user logic.
 
     Returns:
-        list[UserProfileRead]: List of user profiles.
+        Page[UserProfileRead]: Page of matching user profiles and the cursor of the next page.
     """
     user_service = service_factory.get_profiles_services()
-    users = await user_service.find_all_users()
-    return users
+    users = await user_service.search_users(q, after=after, limit=limit)
+    return json_response(users)
+
+
+async def _export_stream(
+    session_maker: async_sessionmaker[AsyncSession],
+    export_format: ExportFormat,
+    shard_router: ShardRouter | None,
+) -> AsyncIterator[bytes]:
+    # The response body is produced after the request dependencies are closed,
+    # so the stream owns its session for the lifetime of the response
+    async with session_maker() as session:
+        service_factory = ServiceFactory(session, shard_router=shard_router)
+        user_service = service_factory.get_profiles_services()
+        async for chunk in user_service.export_users(export_format):
+            yield chunk
+
+
+@router.get(
+    "/profiles:export",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+)
+async def export_user_profiles(
+    export_format: ExportFormat = Query(default=ExportFormat.ndjson, alias="format"),
+    session_maker: async_sessionmaker[AsyncSession] = Depends(get_read_session_maker),
+    shard_router: ShardRouter | None = Depends(get_shard_router),
+) -> StreamingResponse:
+    """
+    Stream all user profiles as NDJSON or CSV.
+
+    Args:
+        export_format (ExportFormat): Output format of the export.
+        session_maker (async_sessionmaker[AsyncSession]): Factory for the session of the stream.
+        shard_router (ShardRouter | None): Shards to stream from, if profiles are sharded.
+
+    Returns:
+        StreamingResponse: Profiles ordered by Telegram id, sent in batches.
+    """
+    return StreamingResponse(
+        _export_stream(session_maker, export_format, shard_router),
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="profiles.{export_format.value}"'
+        },
+    )
 
 
-@router.get("/{telegram_id}/profiles", status_code=status.HTTP_200_OK)
+@router.get(
+    "/{telegram_id}/profiles",
+    status_code=status.HTTP_200_OK,
+    response_model=UserProfileRead,
+)
 async def get_user_profile(
     telegram_id: int,
     service_factory: ServiceFactory = Depends(get_service_factory),
-) -> UserProfileRead:
+) -> Response:
     """
     Get a single user by Telegram id.
 
@@ -64,8 +248,8 @@ async def get_user_profile(
         UserProfileRead: User profile.
     """
     user_service = service_factory.get_profiles_services()
-    user = await user_service.find_user(telegram_id)
-    return user
+    user = await user_service.find_user_json(telegram_id)
+    return Response(user, media_type="application/json")
 
 
 @router.patch("/{telegram_id}/profiles", status_code=status.HTTP_200_OK)
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, status
+
+from app.schemas.user_schema import SwipeCreate, SwipeResult
+from app.services.factories import ServiceFactory
+from app.utils.dependencies import get_service_factory
+from app.utils.security import verify_jwt_token
+
+router = APIRouter(dependencies=[Depends(verify_jwt_token)])
+
+
+@router.post("/{telegram_id}/swipes", status_code=status.HTTP_202_ACCEPTED)
+async def create_swipe(
+    telegram_id: int,
+    swipe: SwipeCreate,
+    service_factory: ServiceFactory = Depends(get_service_factory),
+) -> SwipeResult:
+    """
+    Like or pass on another user.
+
+    The swipe is written in the background, in a batch with other swipes. A
+    repeated swipe on the same user keeps the first decision, which the result
+    reports.
+
+    Args:
+        telegram_id (int): Unique identifier of the swiping user.
+        swipe (SwipeCreate): Swiped user and decision.
+        service_factory (ServiceFactory): Factory for creating services for handling user logic.
+
+    Returns:
+        SwipeResult: The swipe and whether it made a mutual match.
+    """
+    swipe_service = service_factory.get_swipe_services()
+    result = await swipe_service.swipe(telegram_id, swipe)
+    return result
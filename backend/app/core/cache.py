@@ -0,0 +1,160 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from collections.abc import Callable, Hashable, Iterable
+from typing import Any
+
+
+class CacheBackend(ABC):
+    """
+    Interface of a key-value cache of serialized values.
+
+    Values are bytes so that a shared store (e.g. Redis) can implement the same
+    interface as the in-process backend.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def stats(self) -> dict:
+        raise NotImplementedError
+
+
+class InMemoryCache(CacheBackend):
+    """
+    In-process cache with LRU eviction and a per-entry time to live.
+
+    Args:
+        max_size (int): Maximum number of entries, the least recently used one is evicted first.
+        ttl (float): Default time to live of an entry, in seconds.
+        clock (Callable[[], float]): Monotonic time source, replaceable in tests.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+
+        # key -> (expires_at, value), ordered from least to most recently used
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        if ttl is None:
+            ttl = self.ttl
+        if ttl <= 0:
+            return
+
+        self._entries[key] = (self.clock() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class QueueCache:
+    """
+    In-process heads of per-key queues, with LRU eviction of whole queues.
+
+    Popping from a cached head is O(1) and needs no round-trip. Items of an
+    evicted or deleted queue are lost to this process, so the queues must be
+    able to hand them out again later.
+
+    Args:
+        max_size (int): Maximum number of queues, the least recently used one is evicted first.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        # key -> queue head, ordered from least to most recently used
+        self._queues: OrderedDict[Hashable, deque] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def pop(self, key: Hashable) -> Any | None:
+        queue = self._queues.get(key)
+        if not queue:
+            self.misses += 1
+            return None
+
+        self._queues.move_to_end(key)
+        self.hits += 1
+        item = queue.popleft()
+        if not queue:
+            del self._queues[key]
+        return item
+
+    def extend(self, key: Hashable, items: Iterable) -> None:
+        queue = self._queues.setdefault(key, deque())
+        queue.extend(items)
+        if not queue:
+            del self._queues[key]
+            return
+
+        self._queues.move_to_end(key)
+        while len(self._queues) > self.max_size:
+            self._queues.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        self._queues.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._queues),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
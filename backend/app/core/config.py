@@ -16,6 +16,60 @@ class Settings(BaseSettings):
 
     MODE: str  # Application mode (e.g. DEV, TEST, PROD)
 
+    DEFAULT_PAGE_SIZE: int = 50  # Page size used when the client does not pass one
+    MAX_PAGE_SIZE: int = 200  # Hard cap on the page size of paginated endpoints
+    EXPORT_BATCH_SIZE: int = 1000  # Rows fetched and serialized per export chunk
+    CANDIDATE_AGE_WINDOW: int = 5  # Default +/- age range of candidates, in years
+    MAX_CANDIDATE_RADIUS_KM: float = 500.0  # Max radius of a proximity search
+    PROFILE_SEARCH_FUZZY: bool = True  # Fuzzy name matching (needs pg_trgm)
+    MAX_SEARCH_QUERY_LENGTH: int = 200  # Max length of a profile search query
+    MAX_SEARCH_MATCHES: int = 1000  # Max matches of a search query, broader ones fail
+    PROFILE_SNAPSHOT_ENABLED: bool = False  # Match candidates in memory (needs numpy)
+    PROFILE_CACHE_SIZE: int = 10_000  # Max cached profiles per process, 0 disables
+    PROFILE_CACHE_TTL: float = 30.0  # Lifetime of a cached profile, in seconds
+    BULK_IMPORT_BATCH_SIZE: int = 1000  # Rows validated and inserted per transaction
+    MAX_BATCH_GET_IDS: int = 500  # Max Telegram ids per batch profile read
+    JWT_CACHE_SIZE: int = 1000  # Max verified tokens cached per process, 0 disables
+    JWT_CACHE_MAX_TTL: float = 300.0  # Lifetime of an accepted token, capped by its exp
+    JWT_REJECTION_CACHE_TTL: float = 5.0  # Lifetime of a rejected token, in seconds
+    MAX_REQUEST_BODY_SIZE: int = 1_048_576  # Max request body, in bytes
+    MAX_BULK_IMPORT_BODY_SIZE: int = 268_435_456  # Max bulk import body, in bytes
+    SWIPE_BUFFER_SIZE: int = 10_000  # Max swipes waiting to be written, 0 writes inline
+    SWIPE_FLUSH_BATCH_SIZE: int = 500  # Swipes written per multi-row INSERT
+    SWIPE_FLUSH_INTERVAL: float = 0.05  # Max wait for a batch to fill up, in seconds
+    SWIPE_BUFFER_TIMEOUT: float = 1.0  # Max wait for room in a full buffer, then 503
+    SWIPE_SHUTDOWN_TIMEOUT: float = 10.0  # Max time to flush swipes on shutdown
+    FEED_QUEUE_SIZE: int = 100  # Candidates a refill tops a feed queue up to
+    FEED_LOW_WATER_MARK: int = 20  # Queued candidates below which a refill is requested
+    FEED_FETCH_SIZE: int = 10  # Candidates claimed per round-trip into the front cache
+    FEED_FRONT_CACHE_SIZE: int = 10_000  # Max feed heads cached per process, 0 disables
+    FEED_REFILL_WORKERS: int = 2  # Background refills run at once, 0 refills inline
+    FEED_REFILL_BACKLOG: int = 10_000  # Max feeds waiting for a background refill
+    SEEN_FILTER_CAPACITY: int = 2000  # Seen profiles of the first filter slice
+    SEEN_FILTER_FP_RATE: float = 0.01  # Share of unseen profiles wrongly left out
+
+    DB_POOL_SIZE: int = 5  # Connections kept open in the pool
+    DB_MAX_OVERFLOW: int = 10  # Extra connections opened when the pool is exhausted
+    DB_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = -1  # Reconnect connections older than this, -1 disables
+    DB_POOL_PRE_PING: bool = False  # Test connections on checkout
+    DB_STATEMENT_CACHE_SIZE: int = 100  # Prepared statements cached per connection
+    DB_PGBOUNCER_MODE: bool = False  # Disable prepared statement caching for PgBouncer
+    REPLICA_DATABASE_URL: str | None = None  # asyncpg URL of a read replica
+    REPLICA_MAX_LAG: float = 1.0  # Seconds a write may take to reach the replica
+    SHARDS: dict[str, str] = {}  # Shard name -> asyncpg URL, empty disables sharding
+    SHARD_VIRTUAL_NODES: int = 128  # Points per shard on the consistent hash ring
+    SLOW_QUERY_THRESHOLD_MS: float = (
+        200.0  # Log statements slower than this, -1 disables
+    )
+    SLOW_QUERY_LOG_SIZE: int = 100  # Slow statements kept for /internal/slow-queries
+    SLOW_QUERY_EXPLAIN_RATE: float = (
+        0.0  # Share of slow SELECTs re-run with EXPLAIN ANALYZE
+    )
+    SLOW_QUERY_EXPLAIN_TIMEOUT: float = (
+        5.0  # Statement timeout of an EXPLAIN, in seconds
+    )
+
     # Configuration to load .env file with UTF-8 encoding
     model_config = SettingsConfigDict(env_file="./.env", env_file_encoding="utf-8")
 
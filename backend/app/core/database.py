@@ -1,10 +1,54 @@
+import uuid
 from datetime import datetime
 from typing import Annotated
 
 from sqlalchemy import func
-from sqlalchemy.ext.asyncio import AsyncAttrs
+from sqlalchemy.ext.asyncio import AsyncAttrs, AsyncEngine, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
+from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.core.pool import InstrumentedAsyncQueuePool
+
+
+def create_engine(url: str) -> AsyncEngine:
+    """
+    Create an async engine with the pool and statement cache from the settings.
+
+    Args:
+        url (str): Database URL, e.g. `settings.DATABASE_URL`.
+
+    Returns:
+        AsyncEngine: Engine whose pool exposes `metrics` (see `PoolMetrics`) and
+            whose statements are timed (see `instrument_engine`).
+    """
+    if settings.DB_PGBOUNCER_MODE:
+        # PgBouncer in transaction mode may run each statement on another server
+        # connection: prepared statements cannot be cached, and their names must
+        # be unique across clients
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    else:
+        connect_args = {
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+
+    engine = create_async_engine(
+        url,
+        echo=False,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+    return instrument_engine(engine)
+
 
 class Base(AsyncAttrs, DeclarativeBase):
     """
@@ -0,0 +1,305 @@
+import bisect
+import functools
+import inspect
+import re
+import time
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Upper bounds of the latency buckets, in seconds, from 0.1 ms to 10 s
+LATENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_float(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Histogram:
+    """
+    Latency histogram with fixed buckets, one series per combination of labels.
+
+    Observing is a bisect and a few additions, cheap enough to leave on for every
+    request. Buckets are only made cumulative when the metrics are rendered.
+
+    Args:
+        name (str): Metric name, e.g. `http_request_duration_seconds`.
+        documentation (str): Help text of the metric.
+        label_names (Sequence[str]): Names of the labels, in the order of `observe`.
+        buckets (Sequence[float]): Sorted upper bounds of the buckets, in seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # Labels -> [bucket counts..., +Inf count, sum]
+        self._series: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            if len(labels) != len(self.label_names):
+                raise ValueError(f"{self.name} expects labels {self.label_names}.")
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return 0 if series is None else int(sum(series[:-1]))
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for labels, series in sorted(self._series.items()):
+            pairs = [
+                f'{name}="{_escape(value)}"'
+                for name, value in zip(self.label_names, labels, strict=True)
+            ]
+            cumulative = 0
+            for bound, count in zip(
+                (*self.buckets, float("inf")), series[:-1], strict=True
+            ):
+                cumulative += count
+                bucket_labels = ",".join([*pairs, f'le="{_format_float(bound)}"'])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            suffix = "{" + ",".join(pairs) + "}" if pairs else ""
+            lines.append(f"{self.name}_sum{suffix} {_format_float(series[-1])}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+    def clear(self) -> None:
+        self._series.clear()
+
+
+class MetricsRegistry:
+    """
+    In-process metrics of the application, rendered in the Prometheus text format.
+    """
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self) -> None:
+        self._histograms: dict[str, Histogram] = {}
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        if name in self._histograms:
+            raise ValueError(f"Metric {name} is already registered.")
+        histogram = Histogram(name, documentation, label_names, buckets)
+        self._histograms[name] = histogram
+        return histogram
+
+    def render(self) -> str:
+        lines = []
+        for histogram in self._histograms.values():
+            lines.extend(histogram.render())
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        for histogram in self._histograms.values():
+            histogram.clear()
+
+
+metrics = MetricsRegistry()
+
+REQUEST_LATENCY = metrics.histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to the end of its response.",
+    ("method", "route", "status"),
+)
+AUTH_LATENCY = metrics.histogram(
+    "auth_duration_seconds",
+    "Time spent verifying the JWT of a request.",
+)
+SERVICE_LATENCY = metrics.histogram(
+    "service_call_duration_seconds",
+    "Time spent in a service method.",
+    ("service", "method"),
+)
+UOW_LATENCY = metrics.histogram(
+    "uow_duration_seconds",
+    "Time spent entering a unit of work and committing or rolling it back.",
+    ("operation",),
+)
+SQL_LATENCY = metrics.histogram(
+    "db_statement_duration_seconds",
+    "Time spent executing a SQL statement, by statement type and table.",
+    ("statement",),
+)
+
+
+# "service.method" currently running, e.g. for the slow query log
+current_service_method: ContextVar[str | None] = ContextVar(
+    "current_service_method", default=None
+)
+
+
+def timed_methods(service: str) -> Callable[[type], type]:
+    """
+    Class decorator recording the latency of every public async method.
+
+    Coroutines are timed until they return, async generators until they are
+    exhausted or closed. While a method runs, `current_service_method` names it.
+
+    Args:
+        service (str): Value of the `service` label.
+
+    Returns:
+        Callable[[type], type]: Decorator that wraps the methods in place.
+    """
+
+    def decorate(cls: type) -> type:
+        for name, method in list(vars(cls).items()):
+            if name.startswith("_"):
+                continue
+            if inspect.iscoroutinefunction(method):
+                setattr(cls, name, _time_coroutine(method, service, name))
+            elif inspect.isasyncgenfunction(method):
+                setattr(cls, name, _time_async_generator(method, service, name))
+        return cls
+
+    return decorate
+
+
+def _time_coroutine(method: Callable, service: str, name: str) -> Callable:
+    label = f"{service}.{name}"
+
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        token = current_service_method.set(label)
+        start = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            SERVICE_LATENCY.observe(time.perf_counter() - start, service, name)
+            current_service_method.reset(token)
+
+    return wrapper
+
+
+def _time_async_generator(method: Callable, service: str, name: str) -> Callable:
+    label = f"{service}.{name}"
+
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        # The generator may be closed from another context, so the previous value
+        # is set back instead of reset with a token
+        previous = current_service_method.get()
+        current_service_method.set(label)
+        start = time.perf_counter()
+        try:
+            async for item in method(*args, **kwargs):
+                yield item
+        finally:
+            SERVICE_LATENCY.observe(time.perf_counter() - start, service, name)
+            current_service_method.set(previous)
+
+    return wrapper
+
+
+_KEYWORD_PATTERN = re.compile(r"\s*(\w+)")
+_TABLE_PATTERN = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+\"?(\w+)", re.IGNORECASE)
+_statement_labels: dict[str, str] = {}
+_MAX_STATEMENT_LABELS = 1024
+
+
+def statement_label(statement: str) -> str:
+    label = _statement_labels.get(statement)
+    if label is not None:
+        return label
+
+    # First keyword and first table, e.g. "SELECT user_profiles"
+    keyword = _KEYWORD_PATTERN.match(statement)
+    table = _TABLE_PATTERN.search(statement)
+    label = keyword[1].upper() if keyword else "OTHER"
+    if table is not None:
+        label = f"{label} {table[1]}"
+    # Statements come from a bounded set of compiled queries; the cap only guards
+    # against unbounded texts, e.g. IN lists with inline values
+    if len(_statement_labels) < _MAX_STATEMENT_LABELS:
+        _statement_labels[statement] = label
+    return label
+
+
+# The start time lives on the execution context, so a failed statement, which
+# skips `after_cursor_execute`, leaves nothing behind
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    if context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    start = getattr(context, "_metrics_start", None)
+    if start is not None:
+        SQL_LATENCY.observe(time.perf_counter() - start, statement_label(statement))
+
+
+def instrument_engine(engine: AsyncEngine) -> AsyncEngine:
+    """
+    Record the latency of every statement executed through an engine.
+
+    Args:
+        engine (AsyncEngine): Engine to listen to.
+
+    Returns:
+        AsyncEngine: The same engine.
+    """
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    return engine
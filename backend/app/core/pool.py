@@ -0,0 +1,122 @@
+import time
+from collections import deque
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolMetrics:
+    """
+    Counters of a connection pool, collected through SQLAlchemy pool events.
+
+    Args:
+        pool (QueuePool): Pool to listen to.
+        window (int): Number of recent checkout waits kept for the percentiles.
+    """
+
+    def __init__(self, pool: QueuePool, window: int = 1024) -> None:
+        self.pool = pool
+
+        self.connects = 0
+        self.overflow_connects = 0  # Connections opened beyond the pool size
+        self.disconnects = 0
+        self.invalidations = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._recent_waits: deque[float] = deque(maxlen=window)
+
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "close", self._on_close)
+        event.listen(pool, "invalidate", self._on_invalidate)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "checkin", self._on_checkin)
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        self.connects += 1
+        # The overflow counter is raised before the new connection is opened
+        if self.pool.overflow() > 0:
+            self.overflow_connects += 1
+
+    def _on_close(self, dbapi_connection, connection_record) -> None:
+        self.disconnects += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        self.invalidations += 1
+
+    def _on_checkout(
+        self, dbapi_connection, connection_record, connection_proxy
+    ) -> None:
+        self.checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        self.checkins += 1
+
+    def record_wait(self, seconds: float) -> None:
+        self.wait_count += 1
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+        self._recent_waits.append(seconds)
+
+    def stats(self) -> dict:
+        waits = sorted(self._recent_waits)
+
+        def percentile(q: float) -> float | None:
+            if not waits:
+                return None
+            return waits[min(len(waits) - 1, round(q * (len(waits) - 1)))] * 1000
+
+        pool = self.pool
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "connects": self.connects,
+            "overflow_connects": self.overflow_connects,
+            "disconnects": self.disconnects,
+            "invalidations": self.invalidations,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "timeouts": self.timeouts,
+            "wait": {
+                "count": self.wait_count,
+                "mean_ms": (
+                    self.wait_total / self.wait_count * 1000
+                    if self.wait_count
+                    else None
+                ),
+                "max_ms": self.wait_max * 1000,
+                "p50_ms": percentile(0.50),
+                "p99_ms": percentile(0.99),
+            },
+        }
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that attaches `PoolMetrics` to itself.
+
+    Pool events fire only once a connection has been handed out, so the time a
+    checkout waits for a free connection, and the checkouts that time out, are
+    measured around `_do_get`.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics(self)
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.record_wait(time.perf_counter() - start)
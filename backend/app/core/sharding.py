@@ -0,0 +1,121 @@
+import bisect
+import hashlib
+from collections.abc import Callable, Iterable, Mapping
+from typing import TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.core.database import create_engine
+
+T = TypeVar("T")
+
+
+def _hash(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    Consistent hash ring mapping Telegram ids to shard names.
+
+    Every shard owns `virtual_nodes` points on the ring, and a key belongs to the
+    first point at or after its own hash. Adding a shard only moves the keys that
+    the new shard's points take over, about 1/N of them.
+
+    Args:
+        shards (Iterable[str]): Names of the shards. Keep them stable: the ring
+            depends on the names, not on the order or the database URLs.
+        virtual_nodes (int): Points per shard, more points give a more even spread.
+    """
+
+    def __init__(self, shards: Iterable[str], virtual_nodes: int = 128) -> None:
+        self.shards = sorted(set(shards))
+        if not self.shards:
+            raise ValueError("A hash ring needs at least one shard.")
+
+        points = sorted(
+            (_hash(f"{shard}#{i}".encode()), shard)
+            for shard in self.shards
+            for i in range(virtual_nodes)
+        )
+        self._hashes = [point for point, _ in points]
+        self._owners = [shard for _, shard in points]
+
+    def shard_for(self, telegram_id: int) -> str:
+        key = _hash(telegram_id.to_bytes(8, "big", signed=True))
+        index = bisect.bisect_left(self._hashes, key)
+        return self._owners[index % len(self._owners)]
+
+    def group(
+        self, items: Iterable[T], key: Callable[[T], int] = lambda item: item
+    ) -> dict[str, list[T]]:
+        """
+        Split items by the shard owning their Telegram id, keeping their order.
+
+        Args:
+            items (Iterable[T]): Telegram ids, or rows holding one.
+            key (Callable[[T], int]): Telegram id of an item.
+
+        Returns:
+            dict[str, list[T]]: Items of every shard that owns at least one of them.
+        """
+        groups: dict[str, list[T]] = {}
+        for item in items:
+            groups.setdefault(self.shard_for(key(item)), []).append(item)
+        return groups
+
+
+class ShardRouter:
+    """
+    Engines of the shards and the ring that routes Telegram ids to them.
+
+    Every shard has its own engine, so its own connection pool.
+
+    Args:
+        engines (Mapping[str, AsyncEngine]): Engine of every shard by name.
+        virtual_nodes (int): Points per shard on the hash ring.
+    """
+
+    def __init__(
+        self, engines: Mapping[str, AsyncEngine], virtual_nodes: int = 128
+    ) -> None:
+        self.engines = dict(engines)
+        self.ring = HashRing(self.engines, virtual_nodes)
+        # Objects stay readable after the per-call transaction is committed
+        self.session_makers = {
+            name: async_sessionmaker(engine, expire_on_commit=False)
+            for name, engine in self.engines.items()
+        }
+
+    @classmethod
+    def from_urls(
+        cls, urls: Mapping[str, str], virtual_nodes: int = 128
+    ) -> "ShardRouter":
+        """
+        Create the engines of the shards with the pool settings of `create_engine`.
+
+        Args:
+            urls (Mapping[str, str]): asyncpg URL of every shard by name.
+            virtual_nodes (int): Points per shard on the hash ring.
+
+        Returns:
+            ShardRouter: Router over the new engines.
+        """
+        engines = {name: create_engine(url) for name, url in urls.items()}
+        return cls(engines, virtual_nodes)
+
+    def shard_for(self, telegram_id: int) -> str:
+        return self.ring.shard_for(telegram_id)
+
+    def session_maker_for(self, telegram_id: int) -> async_sessionmaker[AsyncSession]:
+        return self.session_makers[self.shard_for(telegram_id)]
+
+    def pool_stats(self) -> dict:
+        return {
+            name: engine.sync_engine.pool.metrics.stats()
+            for name, engine in self.engines.items()
+        }
+
+    async def dispose(self) -> None:
+        for engine in self.engines.values():
+            await engine.dispose()
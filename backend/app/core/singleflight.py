@@ -0,0 +1,69 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one in-flight call.
+
+    The first caller of a key starts the call in a task; callers arriving while it
+    runs await the same task and receive its result or exception. A cancelled
+    caller only stops waiting: the call is cancelled when no caller is left.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, _Call] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `func` unless a call with the same key is already in flight.
+
+        Args:
+            key (Hashable): Identity of the call, e.g. a cache key.
+            func (Callable[[], Awaitable[T]]): Coroutine factory that performs the call.
+
+        Returns:
+            T: Result of the shared call.
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: self._finish(key, call))
+
+        call.waiters += 1
+        try:
+            # Shield the shared task so that a cancelled caller does not cancel it
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    def forget(self, key: Hashable) -> None:
+        """
+        Let the next caller of `key` start a new call, e.g. after a write.
+
+        Args:
+            key (Hashable): Identity of the call.
+        """
+        self._calls.pop(key, None)
+
+    def _finish(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Mark the exception as retrieved when every caller has been cancelled
+        if not call.task.cancelled():
+            call.task.exception()
@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import random
+import re
+import time
+from collections import deque
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.metrics import current_service_method
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER = re.compile(r"\$\d+")
+# A run of identical placeholder tuples, e.g. the rows of a multi-row INSERT
+_REPEATED_TUPLES = re.compile(r"(\([^()]*\))(?:, \1)+")
+
+
+def normalize_statement(statement: str) -> str:
+    """
+    Collapse whitespace and placeholders, so that one query always reads the same.
+
+    Args:
+        statement (str): SQL sent to the driver.
+
+    Returns:
+        str: Statement with `?` placeholders and repeated value tuples folded.
+    """
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _PLACEHOLDER.sub("?", statement)
+    return _REPEATED_TUPLES.sub(r"\1, ...", statement)
+
+
+def redact_parameters(parameters: Any, executemany: bool = False) -> Any:
+    """
+    Replace parameter values by their type names: profiles hold personal data.
+
+    Args:
+        parameters (Any): Driver parameters of the statement.
+        executemany (bool): Whether `parameters` holds one entry per row.
+
+    Returns:
+        Any: Type names in the shape of the parameters.
+    """
+    if executemany:
+        rows = list(parameters)
+        return {
+            "rows": len(rows),
+            "first": redact_parameters(rows[0]) if rows else None,
+        }
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, list | tuple):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+class SlowQueryLog:
+    """
+    Log statements slower than a threshold and keep the latest ones in memory.
+
+    A share of the slow SELECT statements is run again in the background under
+    `EXPLAIN (ANALYZE, BUFFERS)`, in a read-only transaction that is rolled back,
+    and the plan is attached to the entry. Writes are never re-run, since ANALYZE
+    executes the statement, and only one plan is captured at a time, so a burst
+    of slow queries does not add to the load that caused it.
+
+    Args:
+        threshold (float): Duration above which a statement is slow, in seconds.
+        size (int): Number of slow statements kept, the oldest are dropped.
+        explain_rate (float): Share of slow SELECT statements to explain, 0 to 1.
+        explain_timeout (float): Statement timeout of an EXPLAIN, in seconds.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        size: int = 100,
+        explain_rate: float = 0.0,
+        explain_timeout: float = 5.0,
+    ) -> None:
+        self.threshold = threshold
+        self.explain_rate = explain_rate
+        self.explain_timeout = explain_timeout
+        self.entries: deque[dict] = deque(maxlen=size)
+        self.total = 0
+        self._tasks: set[asyncio.Task] = set()
+
+    def instrument(self, engine: AsyncEngine, name: str) -> None:
+        """
+        Time the statements of an engine.
+
+        Args:
+            engine (AsyncEngine): Engine to listen to.
+            name (str): Database reported in the entries, e.g. "primary" or a shard.
+        """
+        explain_engine = engine.execution_options(
+            postgresql_readonly=True, slow_query_log=False
+        )
+
+        def before_cursor_execute(
+            conn, cursor, statement, parameters, context, executemany
+        ) -> None:
+            if context is not None:
+                context._slow_query_start = time.perf_counter()
+
+        def after_cursor_execute(
+            conn, cursor, statement, parameters, context, executemany
+        ) -> None:
+            start = getattr(context, "_slow_query_start", None)
+            if start is None:
+                return
+            duration = time.perf_counter() - start
+            if duration < self.threshold:
+                return
+            if not context.execution_options.get("slow_query_log", True):
+                return
+            self.record(
+                explain_engine, name, statement, parameters, executemany, duration
+            )
+
+        event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", after_cursor_execute)
+
+    def record(
+        self,
+        explain_engine: AsyncEngine,
+        database: str,
+        statement: str,
+        parameters: Any,
+        executemany: bool,
+        duration: float,
+    ) -> None:
+        entry = {
+            "at": datetime.now(UTC).isoformat(),
+            "database": database,
+            "duration_ms": round(duration * 1000, 3),
+            "service_method": current_service_method.get(),
+            "statement": normalize_statement(statement),
+            "parameters": redact_parameters(parameters, executemany),
+            "plan": None,
+        }
+        self.entries.append(entry)
+        self.total += 1
+        logger.warning(
+            "Slow query: %.1f ms in %s on %s: %s %s",
+            entry["duration_ms"],
+            entry["service_method"] or "-",
+            database,
+            entry["statement"],
+            entry["parameters"],
+        )
+
+        if (
+            not executemany
+            and self.explain_rate > 0
+            and not self._tasks
+            and statement.lstrip()[:6].upper() == "SELECT"
+            and random.random() < self.explain_rate
+        ):
+            # Event listeners are synchronous, the plan is captured in a task
+            task = asyncio.get_running_loop().create_task(
+                self._explain(explain_engine, entry, statement, parameters)
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _explain(
+        self, engine: AsyncEngine, entry: dict, statement: str, parameters: Any
+    ) -> None:
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(
+                    text(
+                        "SELECT set_config('statement_timeout', :timeout, true)"
+                    ).bindparams(timeout=f"{int(self.explain_timeout * 1000)}ms")
+                )
+                res = await conn.exec_driver_sql(
+                    "EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters
+                )
+                entry["plan"] = "\n".join(row[0] for row in res)
+                await conn.rollback()
+        except Exception as e:
+            entry["plan"] = f"EXPLAIN failed: {e.__class__.__name__}"
+            logger.warning("Could not explain a slow query", exc_info=True)
+
+    def stats(self) -> dict:
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "explain_rate": self.explain_rate,
+            "total": self.total,
+            "entries": list(reversed(self.entries)),
+        }
+
+    async def close(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
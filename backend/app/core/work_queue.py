@@ -0,0 +1,128 @@
+import asyncio
+import contextlib
+import logging
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+
+
+class KeyedWorkQueue(Generic[K]):
+    """
+    Bounded queue of keys that background workers hand to `handler`, oldest first.
+
+    A key that is already waiting is not queued twice, so a burst of requests for
+    the same work runs it once. A key submitted while its work is running is run
+    again afterwards, since the running work may have started before the change
+    that caused the request. Work is best-effort: failures are logged, and keys
+    submitted while `max_pending` are waiting are dropped.
+
+    Args:
+        handler (Callable[[K], Awaitable[object]]): Does the work of a key.
+        workers (int): Number of keys handled concurrently.
+        max_pending (int): Max keys waiting to be handled.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[K], Awaitable[object]],
+        workers: int = 1,
+        max_pending: int = 10_000,
+    ) -> None:
+        self._handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pending: dict[K, None] = {}  # In arrival order
+        self._running: set[K] = set()
+        self._not_empty = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+        self._closing = False
+        self.done = 0
+        self.failures = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def start(self) -> None:
+        """
+        Start the background workers.
+        """
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._run()) for _ in range(self.workers)]
+
+    def submit(self, key: K) -> bool:
+        """
+        Queue the work of a key without waiting for it.
+
+        Args:
+            key (K): Key to handle.
+
+        Returns:
+            bool: Whether the key was queued, False if it already was or the queue
+                is full or closed.
+        """
+        if self._closing or key in self._pending:
+            return False
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return False
+        self._pending[key] = None
+        self._not_empty.set()
+        return True
+
+    async def _run(self) -> None:
+        while not self._closing:
+            await self._not_empty.wait()
+            # Keys being handled by another worker wait for it to finish
+            key = next((key for key in self._pending if key not in self._running), None)
+            if key is None:
+                self._not_empty.clear()
+                continue
+
+            del self._pending[key]
+            self._running.add(key)
+            try:
+                await self._handler(key)
+                self.done += 1
+            except Exception:
+                self.failures += 1
+                logger.exception("Background work failed for %r", key)
+            finally:
+                self._running.discard(key)
+                if self._pending:
+                    self._not_empty.set()
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "running": len(self._running),
+            "max_pending": self.max_pending,
+            "done": self.done,
+            "failures": self.failures,
+            "dropped": self.dropped,
+        }
+
+    async def close(self, timeout: float | None = None) -> None:
+        """
+        Stop the workers, letting the running work finish; waiting keys are dropped.
+
+        Args:
+            timeout (float | None): Max wait for the running work, in seconds,
+                after which it is cancelled.
+        """
+        self._closing = True
+        self._pending.clear()
+        self._not_empty.set()
+        if not self._tasks:
+            return
+        try:
+            async with asyncio.timeout(timeout):
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+        except TimeoutError:
+            for task in self._tasks:
+                task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await asyncio.gather(*self._tasks, return_exceptions=True)
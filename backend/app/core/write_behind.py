@@ -0,0 +1,195 @@
+import asyncio
+import contextlib
+import itertools
+import logging
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRY_DELAY = 5.0  # Max delay between retries of a failing flush, in seconds
+
+T = TypeVar("T")
+
+
+class WriteBehindBuffer(Generic[T]):
+    """
+    Bounded in-process buffer of items that a background task writes in batches.
+
+    `put` returns as soon as the item is buffered. The background task hands the
+    oldest items to `flush` once `batch_size` of them are waiting, or `interval`
+    after the first one arrived. An item stays visible through `get` until the
+    flush that writes it succeeds, so a reader that looks in the buffer before
+    the database cannot miss it. A failed flush is retried with a delay that
+    doubles from `interval` up to `MAX_RETRY_DELAY`, so `flush` must be
+    idempotent, e.g. INSERT ... ON CONFLICT DO NOTHING.
+
+    When `max_size` items are buffered, `put` waits for a flush to make room:
+    callers slow down to the write rate instead of memory growing without bound.
+
+    Args:
+        flush (Callable[[list[T]], Awaitable[None]]): Writes a batch of items.
+        key (Callable[[T], Hashable]): Identity of an item. An item whose key is
+            already buffered is dropped.
+        max_size (int): Max buffered items, `put` waits above it.
+        batch_size (int): Max items per `flush` call.
+        interval (float): Max wait for a batch to fill up, and first delay
+            before retrying a failed flush, in seconds.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[list[T]], Awaitable[None]],
+        key: Callable[[T], Hashable],
+        max_size: int = 10_000,
+        batch_size: int = 500,
+        interval: float = 0.05,
+    ) -> None:
+        self._flush = flush
+        self._key = key
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.interval = interval
+        self._items: dict[Hashable, T] = {}  # In arrival order
+        self._not_empty = asyncio.Event()
+        self._batch_ready = asyncio.Event()
+        self._has_room = asyncio.Event()
+        self._has_room.set()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        self.flushed = 0
+        self.batches = 0
+        self.failures = 0
+        self.waits = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def start(self) -> None:
+        """
+        Start the background task that flushes the buffer.
+        """
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def get(self, key: Hashable) -> T | None:
+        """
+        Get a buffered item that has not been written yet.
+
+        Args:
+            key (Hashable): Identity of the item.
+
+        Returns:
+            T | None: The item, None if it is not buffered.
+        """
+        return self._items.get(key)
+
+    async def put(self, item: T, timeout: float | None = None) -> bool:
+        """
+        Buffer an item, waiting for room while the buffer is full. An item whose
+        key is already buffered is dropped right away.
+
+        The item is buffered by the time the call returns, without yielding to
+        the event loop in between: a `get` right after it sees the item.
+
+        Args:
+            item (T): Item to write.
+            timeout (float | None): Max wait for room, in seconds, None waits forever.
+
+        Returns:
+            bool: Whether the item was buffered, False if its key already was.
+
+        Raises:
+            TimeoutError: The buffer stayed full for `timeout` seconds.
+            RuntimeError: The buffer is closed.
+        """
+        if self._closing:
+            raise RuntimeError("The buffer is closed.")
+        key = self._key(item)
+        if key in self._items:
+            # Dropped anyway, without waiting for room
+            return False
+        if len(self._items) >= self.max_size:
+            self.waits += 1
+            async with asyncio.timeout(timeout):
+                while len(self._items) >= self.max_size:
+                    await self._has_room.wait()
+        if self._closing:
+            raise RuntimeError("The buffer is closed.")
+
+        if key in self._items:
+            return False
+        self._items[key] = item
+        self._not_empty.set()
+        if len(self._items) >= self.batch_size:
+            self._batch_ready.set()
+        if len(self._items) >= self.max_size:
+            self._has_room.clear()
+        return True
+
+    async def _run(self) -> None:
+        retry_delay = self.interval
+        while True:
+            await self._not_empty.wait()
+            if not self._closing:
+                # Let a batch fill up, but not for longer than the interval
+                with contextlib.suppress(TimeoutError):
+                    async with asyncio.timeout(self.interval):
+                        await self._batch_ready.wait()
+            if self._items:
+                if await self._flush_batch():
+                    retry_delay = self.interval
+                else:
+                    await asyncio.sleep(retry_delay)
+                    retry_delay = min(retry_delay * 2, MAX_RETRY_DELAY)
+            if self._closing and not self._items:
+                return
+
+    async def _flush_batch(self) -> bool:
+        batch = list(itertools.islice(self._items.values(), self.batch_size))
+        try:
+            await self._flush(batch)
+        except Exception:
+            self.failures += 1
+            logger.exception("Could not flush %d buffered items", len(batch))
+            return False
+
+        for item in batch:
+            del self._items[self._key(item)]
+        self.flushed += len(batch)
+        self.batches += 1
+        if len(self._items) < self.batch_size:
+            self._batch_ready.clear()
+        if not self._items:
+            self._not_empty.clear()
+        if len(self._items) < self.max_size:
+            self._has_room.set()
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._items),
+            "max_size": self.max_size,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "failures": self.failures,
+            "waits": self.waits,
+        }
+
+    async def close(self, timeout: float | None = None) -> None:
+        """
+        Stop accepting items and flush the buffered ones.
+
+        Args:
+            timeout (float | None): Max time to keep retrying failed flushes, in
+                seconds. Items still buffered after it are dropped and logged.
+        """
+        self._closing = True
+        self._not_empty.set()
+        self._batch_ready.set()
+        if self._task is None:
+            return
+        try:
+            async with asyncio.timeout(timeout):
+                await self._task
+        except TimeoutError:
+            logger.error("Dropped %d buffered items on shutdown", len(self._items))
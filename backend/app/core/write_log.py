@@ -0,0 +1,89 @@
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+
+class WriteLog:
+    """
+    Recent writes per key, to keep reads that raced a write out of a cache.
+
+    A read takes a `mark` before it starts. When it is done, `written_since` tells
+    whether the key was written in the meantime, in which case the value read may
+    already be stale. Writes are forgotten after `max_age` seconds, and a read that
+    started before a forgotten write is treated as if it raced every key.
+
+    Unlike the entries of a cache, writes are only forgotten by age, so reads of
+    other keys can't push them out early.
+
+    Args:
+        max_age (float): Seconds a write is remembered.
+        clock (Callable[[], float]): Monotonic time source, replaceable in tests.
+    """
+
+    def __init__(
+        self, max_age: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.max_age = max_age
+        self.clock = clock
+
+        # key -> (sequence, written_at), ordered from the oldest to the latest write
+        self._writes: OrderedDict[Hashable, tuple[int, float]] = OrderedDict()
+        self._sequence = 0
+        # Sequence of the latest forgotten write
+        self._forgotten = 0
+
+    def __len__(self) -> int:
+        return len(self._writes)
+
+    def mark(self) -> int:
+        """Position of the latest write, to pass to `written_since` after a read."""
+        return self._sequence
+
+    def record(self, key: Hashable) -> None:
+        """Record a write of `key`, once it is committed."""
+        now = self.clock()
+        self._sequence += 1
+        self._writes[key] = (self._sequence, now)
+        self._writes.move_to_end(key)
+        self._prune(now)
+
+    def written_since(self, key: Hashable, mark: int) -> bool:
+        """
+        Whether `key` may have been written after `mark` was taken.
+
+        Args:
+            key (Hashable): Key that was read.
+            mark (int): Result of `mark` taken before the read.
+
+        Returns:
+            bool: True when the key was written since, or when it can't be told.
+        """
+        self._prune(self.clock())
+        if mark < self._forgotten:
+            return True
+        write = self._writes.get(key)
+        return write is not None and write[0] > mark
+
+    def written_within(self, key: Hashable, seconds: float) -> bool:
+        """
+        Whether `key` was written less than `seconds` ago.
+
+        Args:
+            key (Hashable): Key that was read.
+            seconds (float): Age of the writes to look at, up to `max_age`.
+
+        Returns:
+            bool: True when the latest write of the key is that recent.
+        """
+        now = self.clock()
+        self._prune(now)
+        write = self._writes.get(key)
+        return write is not None and now - write[1] < seconds
+
+    def _prune(self, now: float) -> None:
+        while self._writes:
+            key, (sequence, written_at) = next(iter(self._writes.items()))
+            if now - written_at < self.max_age:
+                break
+            del self._writes[key]
+            self._forgotten = sequence
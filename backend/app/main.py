@@ -2,12 +2,24 @@ from fastapi import FastAPI, Request, status
 from fastapi.responses import JSONResponse
 
 from app.api import main_router
+from app.core.config import settings
 from app.core.exceptions import RepositoryError
 from app.services.exceptions import (
     EntityAlreadyExistsException,
     EntityNotFoundException,
+    InvalidCursorException,
+    InvalidPayloadException,
+    MissingLocationException,
+    QueryTooBroadException,
+    ServiceOverloadedException,
+)
+from app.utils.middlewares import (
+    BodySizeLimitMiddleware,
+    ErrorHandlingMiddleware,
+    MetricsMiddleware,
+    RequestIdMiddleware,
+    TimingMiddleware,
 )
-from app.utils.middlewares import ErrorHandlingMiddleware
 
 app = FastAPI(title="My Tinder")
 app.include_router(main_router)
@@ -49,4 +61,76 @@ async def entity_already_exists_exception_handler(
     )
 
 
+@app.exception_handler(InvalidCursorException)
+async def invalid_cursor_exception_handler(
+    request: Request, exc: InvalidCursorException
+):
+    """
+    Handles InvalidCursorException and returns a 400 response.
+    """
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST, content={"detail": str(exc)}
+    )
+
+
+@app.exception_handler(InvalidPayloadException)
+async def invalid_payload_exception_handler(
+    request: Request, exc: InvalidPayloadException
+):
+    """
+    Handles InvalidPayloadException and returns a 400 response.
+    """
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST, content={"detail": str(exc)}
+    )
+
+
+@app.exception_handler(MissingLocationException)
+async def missing_location_exception_handler(
+    request: Request, exc: MissingLocationException
+):
+    """
+    Handles MissingLocationException and returns a 400 response.
+    """
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST, content={"detail": str(exc)}
+    )
+
+
+@app.exception_handler(QueryTooBroadException)
+async def query_too_broad_exception_handler(
+    request: Request, exc: QueryTooBroadException
+):
+    """
+    Handles QueryTooBroadException and returns a 400 response.
+    """
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST, content={"detail": str(exc)}
+    )
+
+
+@app.exception_handler(ServiceOverloadedException)
+async def service_overloaded_exception_handler(
+    request: Request, exc: ServiceOverloadedException
+):
+    """
+    Handles ServiceOverloadedException and returns a 503 response.
+    """
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
+
+
+# The last added middleware is the outermost one: metrics, request ids and timings
+# also cover the responses produced by the error and body size handlers
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_body_size=settings.MAX_REQUEST_BODY_SIZE,
+    path_limits={"/users/profiles:bulk": settings.MAX_BULK_IMPORT_BODY_SIZE},
+)
 app.add_middleware(ErrorHandlingMiddleware)
+app.add_middleware(TimingMiddleware)
+app.add_middleware(RequestIdMiddleware)
+app.add_middleware(MetricsMiddleware)
@@ -8,12 +8,18 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 
 from app.core.config import settings
 from app.core.database import Base  # noqa
+from app.models.feed_model import FeedItemOrm, FeedOrm, SeenFilterOrm  # noqa: F401
+from app.models.swipe_model import SwipeOrm  # noqa: F401
 from app.models.user_model import UserPreferenceOrm, UserProfileOrm  # noqa: F401
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
-config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+# `alembic -x url=postgresql+asyncpg://...` migrates another database, e.g. a shard
+config.set_main_option(
+    "sqlalchemy.url",
+    context.get_x_argument(as_dictionary=True).get("url", settings.DATABASE_URL),
+)
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
@@ -0,0 +1,54 @@
+"""Add feed tables
+
+Revision ID: 5e7b19c3d0a4
+Revises: c41d7e9a2b58
+Create Date: 2025-06-28 10:41:52.317604
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5e7b19c3d0a4"
+down_revision: str | None = "c41d7e9a2b58"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "feeds",
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("cursor", sa.BigInteger(), nullable=True),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    op.create_table(
+        "feed_items",
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("candidate_id", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("user_id", "candidate_id"),
+    )
+    op.create_index(
+        "ix_feed_items_candidate_id", "feed_items", ["candidate_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_feed_items_candidate_id", table_name="feed_items")
+    op.drop_table("feed_items")
+    op.drop_table("feeds")
@@ -0,0 +1,37 @@
+"""Add seen filter slices
+
+Revision ID: b7e25c0f9a41
+Revises: f41c7a9d2b38
+Create Date: 2025-07-21 10:12:37.402815
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e25c0f9a41"
+down_revision: str | None = "f41c7a9d2b38"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Existing filters become the first slice of their users
+    op.add_column(
+        "seen_filters",
+        sa.Column("slice", sa.SmallInteger(), server_default="0", nullable=False),
+    )
+    op.alter_column("seen_filters", "slice", server_default=None)
+    op.drop_constraint("seen_filters_pkey", "seen_filters", type_="primary")
+    op.create_primary_key("seen_filters_pkey", "seen_filters", ["user_id", "slice"])
+
+
+def downgrade() -> None:
+    # Only the first slices fit the old table, later ones are lost
+    op.execute("DELETE FROM seen_filters WHERE slice > 0")
+    op.drop_constraint("seen_filters_pkey", "seen_filters", type_="primary")
+    op.create_primary_key("seen_filters_pkey", "seen_filters", ["user_id"])
+    op.drop_column("seen_filters", "slice")
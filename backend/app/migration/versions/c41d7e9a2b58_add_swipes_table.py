@@ -0,0 +1,47 @@
+"""Add swipes table
+
+Revision ID: c41d7e9a2b58
+Revises: 8f2c4a1d9e37
+Create Date: 2025-06-21 14:03:17.482906
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c41d7e9a2b58"
+down_revision: str | None = "8f2c4a1d9e37"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+PARTITIONS = 8  # SWIPE_PARTITIONS at the time of this revision
+
+
+def upgrade() -> None:
+    op.create_table(
+        "swipes",
+        sa.Column("swiper_id", sa.BigInteger(), nullable=False),
+        sa.Column("swipee_id", sa.BigInteger(), nullable=False),
+        sa.Column("liked", sa.Boolean(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("swiper_id", "swipee_id"),
+        postgresql_partition_by="HASH (swiper_id)",
+    )
+    for remainder in range(PARTITIONS):
+        op.execute(
+            f"CREATE TABLE swipes_p{remainder} PARTITION OF swipes "
+            f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})"
+        )
+
+
+def downgrade() -> None:
+    # Dropping the partitioned table drops its partitions
+    op.drop_table("swipes")
@@ -0,0 +1,62 @@
+from sqlalchemy import BigInteger, Index, LargeBinary, SmallInteger
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class FeedOrm(Base):
+    """
+    Refill state of a user's precomputed candidate queue.
+
+    `cursor` is the Telegram id of the last candidate queued: the next refill
+    continues the candidate search after it. It is reset once a search pass is
+    over, so that the next pass picks up the profiles created or changed behind
+    it. Candidates already shown stay left out by the seen filter.
+    """
+
+    __tablename__ = "feeds"
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    cursor: Mapped[int | None] = mapped_column(BigInteger)
+
+    repr_cols = ("user_id", "cursor")
+
+
+class FeedItemOrm(Base):
+    """
+    A candidate waiting in a user's queue, which is served in Telegram id order.
+
+    The primary key both orders a queue for the next pop and keeps a candidate
+    from being queued twice. There are no foreign keys to the profiles, which may
+    live on other shards.
+    """
+
+    __tablename__ = "feed_items"
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    candidate_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+
+    repr_cols = ("user_id", "candidate_id")
+
+    __table_args__ = (
+        # A changed or deleted profile is removed from every queue it is in
+        Index("ix_feed_items_candidate_id", "candidate_id"),
+    )
+
+
+class SeenFilterOrm(Base):
+    """
+    A slice of the Bloom filter of the profiles a user was shown or swiped (see
+    `ScalableBloomFilter`), slice 0 being the first.
+
+    The filter takes a few bytes per seen profile, at the price of rare false
+    positives: a profile never shown may be left out. Writers lock slice 0 of a
+    user, which serializes the additions of slices.
+    """
+
+    __tablename__ = "seen_filters"
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    slice: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    bits: Mapped[bytes] = mapped_column(LargeBinary)
+    hashes: Mapped[int] = mapped_column(SmallInteger)
+    count: Mapped[int]
+
+    repr_cols = ("user_id", "slice", "hashes", "count")
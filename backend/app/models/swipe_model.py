@@ -0,0 +1,39 @@
+from sqlalchemy import BigInteger, event, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+SWIPE_PARTITIONS = 8  # Hash partitions of "swipes", changing it needs a migration
+
+
+class SwipeOrm(Base):
+    """
+    A like or a pass of one user on another. Rows are only ever inserted.
+
+    The table is hash-partitioned by swiper, so that concurrent batches of swipes
+    spread their inserts and index updates over the partitions. The primary key
+    holds the swiper first: the mutual match lookup of a like,
+    `swiper_id = :swipee AND swipee_id = :swiper`, reads one partition's index.
+    There is no foreign key to the profiles, which may live on other shards.
+    """
+
+    __tablename__ = "swipes"
+    swiper_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    swipee_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    liked: Mapped[bool]
+
+    repr_cols = ("swiper_id", "swipee_id", "liked")
+
+    __table_args__ = {"postgresql_partition_by": "HASH (swiper_id)"}
+
+
+@event.listens_for(SwipeOrm.__table__, "after_create")
+def _create_partitions(target, connection, **kw) -> None:
+    # `create_all` only creates the parent table, rows need a partition to land in
+    for remainder in range(SWIPE_PARTITIONS):
+        connection.execute(
+            text(
+                f"CREATE TABLE swipes_p{remainder} PARTITION OF swipes "
+                f"FOR VALUES WITH (MODULUS {SWIPE_PARTITIONS}, REMAINDER {remainder})"
+            )
+        )
@@ -1,10 +1,24 @@
 from enum import Enum
 
-from sqlalchemy import BigInteger, ForeignKey, SmallInteger, String
+from sqlalchemy import (
+    DDL,
+    BigInteger,
+    Computed,
+    Double,
+    ForeignKey,
+    Index,
+    SmallInteger,
+    String,
+    event,
+    text,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
 
+SEARCH_CONFIG = "russian"  # Text search configuration of `search_vector`
+
 
 class SexEnumDB(str, Enum):
     male = "Мужской"
@@ -22,11 +36,62 @@ class UserProfileOrm(Base):
     age: Mapped[int] = mapped_column(SmallInteger)
     city: Mapped[str] = mapped_column(String(50))
     sex: Mapped[SexEnumDB]
+    latitude: Mapped[float | None] = mapped_column(Double, default=None)
+    longitude: Mapped[float | None] = mapped_column(Double, default=None)
+    # Key of `app.utils.geo.geohash`, set with the coordinates
+    geohash: Mapped[int | None] = mapped_column(BigInteger, default=None)
+    # Lexemes of the name, ranked above those of about_me. Deferred: only the
+    # search reads it
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', name), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(about_me, '')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
 
     preference: Mapped["UserPreferenceOrm"] = relationship(back_populates="profile")
 
     repr_cols = ("telegram_id", "name", "telegram_id")
 
+    __table_args__ = (
+        # Candidate search filters by sex, city and an age range
+        Index("ix_user_profiles_sex_city_age", "sex", "city", "age"),
+        # Proximity search scans the key ranges of the cells around a point
+        Index("ix_user_profiles_geohash", "geohash"),
+        Index(
+            "ix_user_profiles_search_vector", "search_vector", postgresql_using="gin"
+        ),
+        # Fuzzy name search, `name % :text`
+        Index(
+            "ix_user_profiles_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ).ddl_if(callable_=lambda ddl, target, bind, **kw: has_pg_trgm(bind)),
+    )
+
+
+def has_pg_trgm(bind) -> bool:
+    """
+    Whether the server ships the pg_trgm extension, a contrib module that some
+    builds leave out. The migrations require it; without it, `create_all` skips
+    the trigram index and `PROFILE_SEARCH_FUZZY` must be off.
+    """
+    query = text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    return bind.execute(query).first() is not None
+
+
+event.listen(
+    UserProfileOrm.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(
+        callable_=lambda ddl, target, bind, **kw: has_pg_trgm(bind)
+    ),
+)
+
 
 # Add tables: "user_preferences" and "profile_photos"
 
@@ -41,3 +106,8 @@ class UserPreferenceOrm(Base):
     sex: Mapped[SexEnumDB]
 
     profile: Mapped["UserProfileOrm"] = relationship(back_populates="preference")
+
+    __table_args__ = (
+        # Lets candidate search read the preference with an index-only scan
+        Index("ix_user_preferences_telegram_id_sex", "telegram_id", "sex"),
+    )
@@ -1,7 +1,19 @@
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Sequence
 from typing import Generic, TypeVar
 
-from sqlalchemy import delete, select
+from sqlalchemy import (
+    BigInteger,
+    Result,
+    Select,
+    any_,
+    bindparam,
+    delete,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -11,15 +23,52 @@ from app.core.exceptions import RepositoryError
 T = TypeVar("T", bound=Base)
 
 
+def rows_as_dicts(keys: Sequence[str], rows) -> list[dict]:
+    """
+    Turn Core rows into plain dicts.
+
+    Pydantic reads a `RowMapping` through the `Mapping` methods implemented in
+    Python, a dict it reads natively, which validates several times faster.
+
+    Args:
+        keys (Sequence[str]): Column names of the rows.
+        rows: Rows of a result, tuples in the order of `keys`.
+
+    Returns:
+        list[dict]: One dict per row.
+    """
+    return [dict(zip(keys, row, strict=True)) for row in rows]
+
+
 class AbstractRepository(ABC):
     @abstractmethod
     async def add_one(self):
         raise NotImplementedError
 
+    @abstractmethod
+    async def add_one_returning(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def add_many(self):
+        raise NotImplementedError
+
     @abstractmethod
     async def find_all(self):
         raise NotImplementedError
 
+    @abstractmethod
+    async def find_page(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def stream_all(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def find_many(self):
+        raise NotImplementedError
+
     @abstractmethod
     async def find(self):
         raise NotImplementedError
@@ -28,20 +77,59 @@ class AbstractRepository(ABC):
     async def patch(self):
         raise NotImplementedError
 
+    @abstractmethod
+    async def patch_returning(self):
+        raise NotImplementedError
+
     @abstractmethod
     async def delete(self):
         raise NotImplementedError
 
+    @abstractmethod
+    async def delete_returning(self):
+        raise NotImplementedError
+
     @abstractmethod
     async def delete_all(self):
         raise NotImplementedError
 
 
 class SQLAlchemyRepository(AbstractRepository, Generic[T]):
+    """
+    Repository of one model.
+
+    In the mappings read mode, the `find*` and `stream_all` methods select only
+    the `read_columns` with Core and return plain dicts instead of model instances.
+    Nothing enters the identity map and no attribute is instrumented, which suits
+    read-only callers that convert the rows to schemas right away. The other
+    methods behave the same in both modes.
+
+    Args:
+        session (AsyncSession): Session of the queries.
+        mappings (bool): Whether reads return dicts instead of model instances.
+    """
+
     model: type[T] = None
+    read_columns: tuple[str, ...] | None = None  # Read in mappings mode, all by default
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, mappings: bool = False):
         self.session = session
+        self.mappings = mappings
+
+    def _select(self) -> Select:
+        """
+        SELECT of the reads: the model, or its read columns in mappings mode.
+        """
+        if not self.mappings:
+            return select(self.model)
+        table = self.model.__table__
+        names = self.read_columns or table.columns.keys()
+        return select(*(table.c[name] for name in names))
+
+    def _rows(self, res: Result) -> list:
+        if self.mappings:
+            return rows_as_dicts(list(res.keys()), res)
+        return res.scalars().all()
 
     async def add_one(self, data: dict) -> T:
         try:
@@ -51,20 +139,119 @@ class SQLAlchemyRepository(AbstractRepository, Generic[T]):
         except SQLAlchemyError as e:
             raise RecursionError("Database error when adding a record.") from e
 
-    async def find_all(self) -> list[T]:
+    async def add_one_returning(self, data: dict) -> int | None:
+        """
+        INSERT ... ON CONFLICT DO NOTHING RETURNING telegram_id.
+
+        Returns:
+            int | None: Telegram id of the new record, None if it already exists.
+        """
+        try:
+            stmt = (
+                pg_insert(self.model)
+                .values(**data)
+                .on_conflict_do_nothing()
+                .returning(self.model.telegram_id)
+            )
+            res = await self.session.execute(stmt)
+            return res.scalar_one_or_none()
+        except SQLAlchemyError as e:
+            raise RepositoryError("Database error when adding a record.") from e
+
+    async def add_many(self, data: Sequence[dict]) -> list[int]:
+        """
+        Multi-row INSERT ... ON CONFLICT DO NOTHING RETURNING telegram_id.
+
+        A conflicting row is skipped instead of aborting the statement, so the
+        caller can tell which rows were created from the returned ids.
+
+        Returns:
+            list[int]: Telegram ids of the new records.
+        """
+        if not data:
+            return []
+        try:
+            # Executed with a list of parameters, SQLAlchemy sends the rows as
+            # multi-row VALUES pages of a statement that is compiled only once
+            stmt = (
+                pg_insert(self.model)
+                .on_conflict_do_nothing()
+                .returning(self.model.telegram_id)
+            )
+            res = await self.session.execute(stmt, list(data))
+            return list(res.scalars())
+        except SQLAlchemyError as e:
+            raise RepositoryError("Database error when adding records.") from e
+
+    async def find_all(self) -> list[T] | list[dict]:
         try:
-            stmt = select(self.model)
+            stmt = self._select()
             res = await self.session.execute(stmt)
+            if self.mappings:
+                return self._rows(res)
             return res.all()
         except SQLAlchemyError as e:
             raise RepositoryError(
                 "Database error when getting a list of records."
             ) from e
 
-    async def find(self, id: int) -> T:
+    async def find_page(self, after: int | None, limit: int) -> list[T] | list[dict]:
+        try:
+            stmt = self._select().order_by(self.model.telegram_id).limit(limit)
+            if after is not None:
+                stmt = stmt.where(self.model.telegram_id > after)
+            res = await self.session.execute(stmt)
+            return self._rows(res)
+        except SQLAlchemyError as e:
+            raise RepositoryError(
+                "Database error when getting a page of records."
+            ) from e
+
+    async def stream_all(
+        self, batch_size: int
+    ) -> AsyncIterator[Sequence[T] | list[dict]]:
+        try:
+            # A server-side cursor keeps at most `batch_size` rows in memory
+            stmt = (
+                self._select()
+                .order_by(self.model.telegram_id)
+                .execution_options(yield_per=batch_size)
+            )
+            if self.mappings:
+                res = await self.session.stream(stmt)
+                keys = list(res.keys())
+                async for partition in res.partitions():
+                    yield rows_as_dicts(keys, partition)
+            else:
+                res = await self.session.stream_scalars(stmt)
+                async for partition in res.partitions():
+                    yield partition
+        except SQLAlchemyError as e:
+            raise RepositoryError("Database error when streaming records.") from e
+
+    async def find_many(self, ids: Sequence[int]) -> Sequence[T] | list[dict]:
+        try:
+            # A single array parameter keeps one prepared statement for any size
+            ids_param = bindparam("ids", list(ids), type_=ARRAY(BigInteger))
+            stmt = (
+                self._select()
+                .where(self.model.telegram_id == any_(ids_param))
+                .order_by(self.model.telegram_id)
+            )
+            res = await self.session.execute(stmt)
+            return self._rows(res)
+        except SQLAlchemyError as e:
+            raise RepositoryError(
+                "Database error when searching for records by Telegram ids."
+            ) from e
+
+    async def find(self, id: int) -> T | dict | None:
         try:
-            stmt = select(self.model).where(self.model.telegram_id == id)
+            stmt = self._select().where(self.model.telegram_id == id)
             res = await self.session.execute(stmt)
+            if self.mappings:
+                rows = self._rows(res)
+                return rows[0] if rows else None
             res = res.scalar_one_or_none()
             return res
         except SQLAlchemyError as e:
@@ -82,6 +269,33 @@ class SQLAlchemyRepository(AbstractRepository, Generic[T]):
                 "Database error when changing a record by Telegram id."
             ) from e
 
+    async def patch_returning(self, id: int, user_update: dict) -> int | None:
+        """
+        UPDATE ... WHERE telegram_id = :id RETURNING telegram_id.
+
+        Returns:
+            int | None: Telegram id of the changed record, None if it does not exist.
+        """
+        try:
+            if not user_update:
+                stmt = select(self.model.telegram_id).where(
+                    self.model.telegram_id == id
+                )
+            else:
+                stmt = (
+                    update(self.model)
+                    .where(self.model.telegram_id == id)
+                    .values(**user_update)
+                    .returning(self.model.telegram_id)
+                    .execution_options(synchronize_session=False)
+                )
+            res = await self.session.execute(stmt)
+            return res.scalar_one_or_none()
+        except SQLAlchemyError as e:
+            raise RepositoryError(
+                "Database error when changing a record by Telegram id."
+            ) from e
+
     async def delete(self, user: T) -> None:
         try:
             await self.session.delete(user)
@@ -90,6 +304,27 @@ class SQLAlchemyRepository(AbstractRepository, Generic[T]):
                 "Database error when deleting a record by Telegram id."
             ) from e
 
+    async def delete_returning(self, id: int) -> int | None:
+        """
+        DELETE ... WHERE telegram_id = :id RETURNING telegram_id.
+
+        Returns:
+            int | None: Telegram id of the deleted record, None if it does not exist.
+        """
+        try:
+            stmt = (
+                delete(self.model)
+                .where(self.model.telegram_id == id)
+                .returning(self.model.telegram_id)
+                .execution_options(synchronize_session=False)
+            )
+            res = await self.session.execute(stmt)
+            return res.scalar_one_or_none()
+        except SQLAlchemyError as e:
+            raise RepositoryError(
+                "Database error when deleting a record by Telegram id."
+            ) from e
+
     async def delete_all(self) -> None:
         try:
             stmt = delete(self.model)
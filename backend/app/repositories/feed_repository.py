@@ -0,0 +1,147 @@
+from collections.abc import Sequence
+from datetime import datetime
+
+from sqlalchemy import BigInteger, bindparam, delete, func, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import RepositoryError
+from app.models.feed_model import FeedItemOrm, FeedOrm
+
+
+class FeedRepository:
+    """
+    Repository of the precomputed candidate queues and their refill cursors.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def pop(self, user_id: int, limit: int) -> list[int]:
+        """
+        Delete and return the first `limit` candidates of a queue.
+
+        Rows claimed by a concurrent pop are skipped instead of waited for, so two
+        requests of the same user never get the same candidate.
+        """
+        try:
+            head = (
+                select(FeedItemOrm.candidate_id)
+                .where(FeedItemOrm.user_id == user_id)
+                .order_by(FeedItemOrm.candidate_id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            stmt = (
+                delete(FeedItemOrm)
+                .where(
+                    FeedItemOrm.user_id == user_id,
+                    FeedItemOrm.candidate_id.in_(head),
+                )
+                .returning(FeedItemOrm.candidate_id)
+            )
+            res = await self.session.execute(stmt)
+            return sorted(res.scalars())
+        except SQLAlchemyError as e:
+            raise RepositoryError("Database error when popping from a feed.") from e
+
+    async def count(self, user_id: int, limit: int) -> int:
+        """
+        Number of candidates in a queue, counted up to `limit`.
+        """
+        try:
+            queued = (
+                select(FeedItemOrm.candidate_id)
+                .where(FeedItemOrm.user_id == user_id)
+                .limit(limit)
+                .subquery()
+            )
+            res = await self.session.execute(select(func.count()).select_from(queued))
+            return res.scalar_one()
+        except SQLAlchemyError as e:
+            raise RepositoryError("Database error when counting a feed.") from e
+
+    async def lock(self, user_id: int) -> tuple[int | None, datetime]:
+        """
+        Lock the feed of a user until the end of the transaction, creating it if
+        needed, and return its cursor and the time of its last push, which tells
+        whether it was pushed to or reset since it was last read.
+        """
+        try:
+            # The no-op update makes the upsert lock and return an existing row
+            stmt = (
+                pg_insert(FeedOrm)
+                .values(user_id=user_id)
+                .on_conflict_do_update(
+                    index_elements=[FeedOrm.user_id],
+                    set_={"cursor": FeedOrm.cursor},
+                )
+                .returning(FeedOrm.cursor, FeedOrm.updated_at)
+            )
+            res = await self.session.execute(stmt)
+            return tuple(res.one())
+        except SQLAlchemyError as e:
+            raise RepositoryError("Database error when locking a feed.") from e
+
+    async def push(
+        self, user_id: int, candidate_ids: Sequence[int], cursor: int | None
+    ) -> None:
+        """
+        Append candidates to a queue, skipping queued ones, and move its cursor.
+        """
+        try:
+            if candidate_ids:
+                rows = (
+                    func.unnest(
+                        bindparam(
+                            "candidate_ids",
+                            list(candidate_ids),
+                            type_=ARRAY(BigInteger),
+                        )
+                    )
+                    .table_valued("candidate_id")
+                    .render_derived("rows")
+                )
+                stmt = (
+                    pg_insert(FeedItemOrm.__table__)
+                    .from_select(
+                        ["user_id", "candidate_id"],
+                        select(
+                            bindparam("user_id", user_id, type_=BigInteger),
+                            rows.c.candidate_id,
+                        ),
+                    )
+                    .on_conflict_do_nothing()
+                )
+                await self.session.execute(stmt)
+
+            await self.session.execute(
+                update(FeedOrm)
+                .where(FeedOrm.user_id == user_id)
+                # Unlike now(), distinct for each push of a transaction
+                .values(cursor=cursor, updated_at=func.clock_timestamp())
+            )
+        except SQLAlchemyError as e:
+            raise RepositoryError("Database error when pushing to a feed.") from e
+
+    async def reset(self, user_id: int) -> None:
+        """
+        Delete the feed of a user, and remove the user from every other queue.
+        """
+        try:
+            # Deleting the feed row first waits for a refill holding its lock, whose
+            # candidates are then deleted too
+            await self.session.execute(
+                delete(FeedOrm).where(FeedOrm.user_id == user_id)
+            )
+            await self.session.execute(
+                delete(FeedItemOrm).where(FeedItemOrm.user_id == user_id)
+            )
+            await self.session.execute(
+                delete(FeedItemOrm).where(FeedItemOrm.candidate_id == user_id)
+            )
+        except SQLAlchemyError as e:
+            raise RepositoryError("Database error when resetting a feed.") from e
@@ -1,6 +1,49 @@
-from app.models.user_model import UserPreferenceOrm
+from sqlalchemy import literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.exceptions import RepositoryError
+from app.models.user_model import UserPreferenceOrm, UserProfileOrm
 from app.repositories.base_repository import SQLAlchemyRepository
 
 
 class UserPreferenceRepository(SQLAlchemyRepository[UserPreferenceOrm]):
     model = UserPreferenceOrm
+
+    async def add_one_for_profile(self, data: dict) -> tuple[bool, int | None]:
+        """
+        Insert a preference only if its profile exists, in a single statement.
+
+        Returns:
+            tuple[bool, int | None]: Whether the profile exists and the Telegram id
+                of the new preference, None if it was not inserted.
+        """
+        try:
+            table = UserPreferenceOrm.__table__
+            profile = (
+                select(UserProfileOrm.telegram_id)
+                .where(UserProfileOrm.telegram_id == data["telegram_id"])
+                .cte("profile")
+            )
+            inserted = (
+                pg_insert(UserPreferenceOrm)
+                .from_select(
+                    ["telegram_id", "sex"],
+                    select(
+                        profile.c.telegram_id,
+                        literal(data["sex"], type_=table.c.sex.type),
+                    ),
+                )
+                .on_conflict_do_nothing()
+                .returning(UserPreferenceOrm.telegram_id)
+                .cte("inserted")
+            )
+            stmt = select(
+                select(profile.c.telegram_id).exists(),
+                select(inserted.c.telegram_id).scalar_subquery(),
+            )
+            res = await self.session.execute(stmt)
+            profile_exists, telegram_id = res.one()
+            return profile_exists, telegram_id
+        except SQLAlchemyError as e:
+            raise RepositoryError("Database error when adding a record.") from e
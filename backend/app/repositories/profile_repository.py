@@ -1,6 +1,220 @@
-from app.models.user_model import UserProfileOrm
+from collections.abc import Sequence
+
+from sqlalchemy import ColumnElement, Double, and_, cast, func, literal, or_, select
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.exceptions import RepositoryError
+from app.models.user_model import (
+    SEARCH_CONFIG,
+    SexEnumDB,
+    UserPreferenceOrm,
+    UserProfileOrm,
+)
 from app.repositories.base_repository import SQLAlchemyRepository
+from app.repositories.seen_repository import not_seen
+from app.utils.bloom import ScalableBloomFilter
+from app.utils.geo import Circle, covering_ranges, haversine_km
+from app.utils.search import plain_terms
+
+
+def within(circle: Circle) -> ColumnElement[bool]:
+    """
+    SQL condition that a profile lies in a circle.
+
+    The geohash index narrows the search down to the cells that cover the circle,
+    the distance is only computed for the profiles in them.
+
+    Args:
+        circle (Circle): Center and radius of the search.
+
+    Returns:
+        ColumnElement[bool]: True for the profiles at most `radius_km` away.
+    """
+    distance = haversine_km(
+        circle.latitude,
+        circle.longitude,
+        UserProfileOrm.latitude,
+        UserProfileOrm.longitude,
+        lib=func,
+    )
+    return and_(
+        or_(
+            *(
+                and_(UserProfileOrm.geohash >= low, UserProfileOrm.geohash < high)
+                for low, high in covering_ranges(circle)
+            )
+        ),
+        distance <= circle.radius_km,
+    )
+
+
+def _search_match(text: str, fuzzy: bool) -> tuple[ColumnElement[bool], ColumnElement]:
+    # Condition and rank of the profiles matching a web search query
+    query = func.websearch_to_tsquery(cast(literal(SEARCH_CONFIG), REGCONFIG), text)
+    matched = UserProfileOrm.search_vector.op("@@")(query)
+    rank = func.ts_rank(UserProfileOrm.search_vector, query)
+    # Quotes, `or` and excluded words are no part of a name
+    terms = plain_terms(text) if fuzzy else ""
+    if terms:
+        matched = or_(matched, UserProfileOrm.name.op("%")(terms))
+        rank = rank + func.similarity(UserProfileOrm.name, terms)
+    # Compared as doubles, the rank of a cursor is matched exactly
+    return matched, cast(rank, Double)
 
 
 class UserProfileRepository(SQLAlchemyRepository[UserProfileOrm]):
     model = UserProfileOrm
+    # The fields of `UserProfileRead`
+    read_columns = (
+        "telegram_id",
+        "name",
+        "about_me",
+        "age",
+        "city",
+        "sex",
+    )
+
+    async def find_with_preference(
+        self, id: int
+    ) -> tuple[UserProfileOrm, SexEnumDB | None] | None:
+        try:
+            stmt = (
+                select(UserProfileOrm, UserPreferenceOrm.sex)
+                .outerjoin(UserPreferenceOrm)
+                .where(UserProfileOrm.telegram_id == id)
+            )
+            res = await self.session.execute(stmt)
+            row = res.one_or_none()
+            return None if row is None else tuple(row)
+        except SQLAlchemyError as e:
+            raise RepositoryError(
+                "Database error when searching for a record by Telegram id."
+            ) from e
+
+    async def find_candidates(
+        self,
+        id: int,
+        city: str | None,
+        sexes: Sequence[SexEnumDB],
+        accepted_by: Sequence[SexEnumDB],
+        age_min: int,
+        age_max: int,
+        after: int | None,
+        limit: int,
+        seen: ScalableBloomFilter | None = None,
+        near: Circle | None = None,
+    ) -> Sequence[UserProfileOrm] | list[dict]:
+        """
+        Find profiles in `city` and within `near`, when given, whose sex is one
+        of `sexes` and whose own preference is one of `accepted_by` (a missing
+        preference accepts anyone), leaving out the ones in `seen`.
+        """
+        try:
+            stmt = (
+                self._select()
+                .outerjoin(UserPreferenceOrm)
+                .where(
+                    UserProfileOrm.sex.in_(sexes),
+                    UserProfileOrm.age.between(age_min, age_max),
+                    UserProfileOrm.telegram_id != id,
+                    or_(
+                        UserPreferenceOrm.sex.is_(None),
+                        UserPreferenceOrm.sex.in_(accepted_by),
+                    ),
+                )
+                .order_by(UserProfileOrm.telegram_id)
+                .limit(limit)
+            )
+            if city is not None:
+                stmt = stmt.where(UserProfileOrm.city == city)
+            if near is not None:
+                stmt = stmt.where(within(near))
+            if after is not None:
+                stmt = stmt.where(UserProfileOrm.telegram_id > after)
+            if seen is not None:
+                stmt = stmt.where(not_seen(UserProfileOrm.telegram_id, seen))
+            res = await self.session.execute(stmt)
+            return self._rows(res)
+        except SQLAlchemyError as e:
+            raise RepositoryError(
+                "Database error when searching for candidates."
+            ) from e
+
+    async def count_matches(self, text: str, limit: int, fuzzy: bool = False) -> int:
+        """
+        Count the profiles that `search` would rank for a query, up to `limit`.
+
+        Matches are only looked up in the indexes, no rank is computed, so the
+        cost of the count is bounded by `limit` however broad the query is.
+
+        Args:
+            text (str): Query in the syntax of `websearch_to_tsquery`.
+            limit (int): Number of matches after which counting stops.
+            fuzzy (bool): Also match names by trigram similarity (needs pg_trgm).
+
+        Returns:
+            int: Number of matches, at most `limit`.
+        """
+        try:
+            matched, _ = _search_match(text, fuzzy)
+            found = select(UserProfileOrm.telegram_id).where(matched).limit(limit)
+            stmt = select(func.count()).select_from(found.subquery())
+            res = await self.session.execute(stmt)
+            return res.scalar_one()
+        except SQLAlchemyError as e:
+            raise RepositoryError("Database error when counting matches.") from e
+
+    async def search(
+        self,
+        text: str,
+        after: tuple[float, int] | None,
+        limit: int,
+        fuzzy: bool = False,
+    ) -> list[tuple[UserProfileOrm | dict, float]]:
+        """
+        Find profiles whose name or about_me match a web search query, best
+        ranked first. Name matches rank above about_me ones.
+
+        Full-text matches are found through the GIN index of `search_vector`. With
+        `fuzzy`, names similar to the plain words of the query match too, through
+        the trigram index of the name, and rank higher the more similar they are.
+
+        Every page ranks and sorts all the matches: bound them with
+        `count_matches` first.
+
+        Args:
+            text (str): Query in the syntax of `websearch_to_tsquery`.
+            after (tuple[float, int] | None): Rank and Telegram id of the last
+                profile of the previous page.
+            limit (int): Maximum number of profiles.
+            fuzzy (bool): Also match names by trigram similarity (needs pg_trgm).
+
+        Returns:
+            list[tuple[UserProfileOrm | dict, float]]: Profiles and their ranks,
+                ordered by rank descending, then by Telegram id.
+        """
+        try:
+            matched, rank = _search_match(text, fuzzy)
+            stmt = (
+                self._select()
+                .add_columns(rank.label("rank"))
+                .where(matched)
+                .order_by(rank.desc(), UserProfileOrm.telegram_id)
+                .limit(limit)
+            )
+            if after is not None:
+                after_rank, after_id = after
+                stmt = stmt.where(
+                    or_(
+                        rank < after_rank,
+                        and_(rank == after_rank, UserProfileOrm.telegram_id > after_id),
+                    )
+                )
+            res = await self.session.execute(stmt)
+            if self.mappings:
+                rows = self._rows(res)
+                return [(row, row.pop("rank")) for row in rows]
+            return [tuple(row) for row in res]
+        except SQLAlchemyError as e:
+            raise RepositoryError("Database error when searching profiles.") from e
@@ -0,0 +1,242 @@
+"""
+Move profiles to the shards that own them under a new shard map.
+
+Usage (from the backend directory):
+
+    python -m app.repositories.resharding --to '{"s0": "postgresql+asyncpg://...", ...}'
+
+The current map is read from the SHARDS setting unless `--from` is given. Shards
+present in both maps must keep their URL. A move takes four steps:
+
+1. Create the schema on the new shards (`alembic -x url=... upgrade head`).
+2. Freeze profile and preference writes, and copy the moving profiles with
+   `--writes-frozen`. A write during the copy may go to the old shard after the
+   row was copied, and would be lost.
+3. Deploy the new map, then let writes in again.
+4. Delete the copied rows from the shards that no longer own them, with
+   `--to <new map> --cleanup`.
+
+Rows stay on their old shard until the cleanup, so every profile can be read
+under the old map until the new one is deployed. Both the copy and the cleanup
+commit batch by batch, so an interrupted run can simply be started again.
+"""
+
+import argparse
+import asyncio
+import json
+from collections import Counter
+from collections.abc import AsyncIterator, Mapping
+
+from sqlalchemy import BigInteger, Column, any_, bindparam, delete, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.sharding import ShardRouter
+from app.models.user_model import UserPreferenceOrm, UserProfileOrm
+
+profiles = UserProfileOrm.__table__
+preferences = UserPreferenceOrm.__table__
+# Generated columns cannot be inserted, the target shard computes them again
+copied_columns = [column for column in profiles.c if column.computed is None]
+
+
+def _ids_param(ids: list[int]):
+    return bindparam("ids", ids, type_=ARRAY(BigInteger))
+
+
+async def _batches(
+    engine: AsyncEngine, columns: list[Column], batch_size: int
+) -> AsyncIterator[list]:
+    # Profiles of a shard in Telegram id order, one short read per batch
+    after = None
+    while True:
+        stmt = select(*columns).order_by(profiles.c.telegram_id).limit(batch_size)
+        if after is not None:
+            stmt = stmt.where(profiles.c.telegram_id > after)
+        async with engine.connect() as conn:
+            rows = (await conn.execute(stmt)).mappings().all()
+        if not rows:
+            return
+        after = rows[-1]["telegram_id"]
+        yield rows
+
+
+async def reshard(
+    source: ShardRouter,
+    target: ShardRouter,
+    batch_size: int = 1000,
+    dry_run: bool = False,
+) -> Counter[tuple[str, str]]:
+    """
+    Copy every profile, with its preference, from its shard in `source` to its
+    shard in `target` when they differ.
+
+    The rows are left on their old shard until `cleanup`, and profile writes must
+    be frozen from the copy until the new map is deployed.
+
+    Args:
+        source (ShardRouter): Current shards.
+        target (ShardRouter): New shards, shards kept from `source` keep their name.
+        batch_size (int): Profiles read and copied per transaction.
+        dry_run (bool): Only count the profiles that would move.
+
+    Returns:
+        Counter[tuple[str, str]]: Number of copied profiles per (old, new) shard.
+    """
+    moved: Counter[tuple[str, str]] = Counter()
+    for shard, engine in source.engines.items():
+        async for rows in _batches(engine, copied_columns, batch_size):
+            groups = target.ring.group(
+                (row for row in rows if target.shard_for(row["telegram_id"]) != shard),
+                key=lambda row: row["telegram_id"],
+            )
+            for new_shard, group in groups.items():
+                moved[shard, new_shard] += len(group)
+                if not dry_run:
+                    await _copy(engine, target.engines[new_shard], group)
+    return moved
+
+
+async def _copy(source_engine, target_engine, rows) -> None:
+    ids = [row["telegram_id"] for row in rows]
+    async with source_engine.connect() as conn:
+        stmt = select(preferences).where(
+            preferences.c.telegram_id == any_(_ids_param(ids))
+        )
+        preference_rows = (await conn.execute(stmt)).mappings().all()
+
+    # Rows copied by an interrupted run are skipped
+    async with target_engine.begin() as conn:
+        await conn.execute(
+            pg_insert(profiles).on_conflict_do_nothing(), [dict(row) for row in rows]
+        )
+        if preference_rows:
+            await conn.execute(
+                pg_insert(preferences).on_conflict_do_nothing(),
+                [dict(row) for row in preference_rows],
+            )
+
+
+async def cleanup(
+    target: ShardRouter, batch_size: int = 1000, dry_run: bool = False
+) -> Counter[str]:
+    """
+    Delete the profiles left on shards that no longer own them under `target`.
+
+    Run it only once `target` is deployed: until then, the old map still routes
+    reads and writes to these rows.
+
+    Args:
+        target (ShardRouter): New shards, as deployed.
+        batch_size (int): Profiles read and deleted per transaction.
+        dry_run (bool): Only count the profiles that would be deleted.
+
+    Returns:
+        Counter[str]: Number of deleted profiles per shard.
+    """
+    deleted: Counter[str] = Counter()
+    for shard, engine in target.engines.items():
+        async for rows in _batches(engine, [profiles.c.telegram_id], batch_size):
+            ids = [
+                row["telegram_id"]
+                for row in rows
+                if target.shard_for(row["telegram_id"]) != shard
+            ]
+            if not ids:
+                continue
+            deleted[shard] += len(ids)
+            if not dry_run:
+                # Preferences follow their profile through ON DELETE CASCADE
+                async with engine.begin() as conn:
+                    await conn.execute(
+                        delete(profiles).where(
+                            profiles.c.telegram_id == any_(_ids_param(ids))
+                        )
+                    )
+    return deleted
+
+
+def _check_maps(source: Mapping[str, str], target: Mapping[str, str]) -> None:
+    for name in source.keys() & target.keys():
+        if source[name] != target[name]:
+            raise SystemExit(f"Shard {name!r} must keep its URL in the new map.")
+
+
+async def run_cleanup(
+    target_urls: Mapping[str, str], batch_size: int, dry_run: bool
+) -> None:
+    target = ShardRouter.from_urls(target_urls, settings.SHARD_VIRTUAL_NODES)
+    try:
+        deleted = await cleanup(target, batch_size, dry_run)
+    finally:
+        await target.dispose()
+
+    for shard, count in sorted(deleted.items()):
+        print(json.dumps({"shard": shard, "deleted": count, "dry_run": dry_run}))
+    print(json.dumps({"total": sum(deleted.values()), "dry_run": dry_run}))
+
+
+async def run(
+    source_urls: Mapping[str, str],
+    target_urls: Mapping[str, str],
+    batch_size: int,
+    dry_run: bool,
+) -> None:
+    _check_maps(source_urls, target_urls)
+    source = ShardRouter.from_urls(source_urls, settings.SHARD_VIRTUAL_NODES)
+    target = ShardRouter.from_urls(target_urls, settings.SHARD_VIRTUAL_NODES)
+    try:
+        moved = await reshard(source, target, batch_size, dry_run)
+    finally:
+        await source.dispose()
+        await target.dispose()
+
+    for (old, new), count in sorted(moved.items()):
+        print(
+            json.dumps({"from": old, "to": new, "profiles": count, "dry_run": dry_run})
+        )
+    print(json.dumps({"total": sum(moved.values()), "dry_run": dry_run}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--to", required=True, type=json.loads, help="New shard map")
+    parser.add_argument(
+        "--from",
+        dest="source",
+        type=json.loads,
+        default=None,
+        help="Current shard map, SHARDS by default",
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument(
+        "--writes-frozen",
+        action="store_true",
+        help="Confirm that profile writes are frozen until the new map is deployed",
+    )
+    parser.add_argument(
+        "--cleanup",
+        action="store_true",
+        help="Delete the rows left on their old shard, once the new map is deployed",
+    )
+    args = parser.parse_args()
+
+    if args.cleanup:
+        asyncio.run(run_cleanup(args.to, args.batch_size, args.dry_run))
+        return
+    if not (args.writes_frozen or args.dry_run):
+        raise SystemExit(
+            "Freeze profile writes until the new map is deployed, "
+            "then pass --writes-frozen."
+        )
+    source = args.source if args.source is not None else settings.SHARDS
+    if not source:
+        raise SystemExit("No current shard map: set SHARDS or pass --from.")
+    asyncio.run(run(source, args.to, args.batch_size, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
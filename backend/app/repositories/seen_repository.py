@@ -0,0 +1,216 @@
+from collections.abc import Mapping, Sequence
+
+from sqlalchemy import (
+    BigInteger,
+    ColumnElement,
+    Integer,
+    LargeBinary,
+    SmallInteger,
+    and_,
+    any_,
+    bindparam,
+    delete,
+    func,
+    not_,
+    select,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import RepositoryError
+from app.models.feed_model import SeenFilterOrm
+from app.utils.bloom import BloomFilter, ScalableBloomFilter, hash_pair
+
+
+def not_seen(
+    column: ColumnElement[int], seen: ScalableBloomFilter
+) -> ColumnElement[bool]:
+    """
+    SQL condition that `column` is not in a Bloom filter.
+
+    The bits of every slice are sent as one bytea parameter and tested with
+    `get_bit`, so the condition costs a few bit tests per slice whatever the
+    number of seen profiles.
+
+    Args:
+        column (ColumnElement[int]): Non-negative BIGINT ids to test.
+        seen (ScalableBloomFilter): Filter of the ids to leave out.
+
+    Returns:
+        ColumnElement[bool]: True where the id was certainly not added.
+    """
+    conditions = []
+    for index, bloom in enumerate(seen.slices):
+        bits = bindparam(f"seen_bits_{index}", bytes(bloom.bits), type_=LargeBinary)
+        size = bindparam(f"seen_size_{index}", bloom.size, type_=BigInteger)
+        first, second = hash_pair(column, bloom.size)
+        conditions.append(
+            not_(
+                and_(
+                    *(
+                        func.get_bit(bits, (first + i * second if i else first) % size)
+                        == 1
+                        for i in range(bloom.hashes)
+                    )
+                )
+            )
+        )
+    return and_(*conditions)
+
+
+class SeenFilterRepository:
+    """
+    Repository of the per-user Bloom filters of seen profiles, one row per slice.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get(
+        self, user_id: int, capacity: int, fp_rate: float
+    ) -> ScalableBloomFilter | None:
+        """
+        Filter of a user, None if the user has not seen anyone yet. `capacity`
+        and `fp_rate` size the slices it would add.
+        """
+        try:
+            stmt = (
+                select(SeenFilterOrm.bits, SeenFilterOrm.hashes, SeenFilterOrm.count)
+                .where(SeenFilterOrm.user_id == user_id)
+                .order_by(SeenFilterOrm.slice)
+            )
+            res = await self.session.execute(stmt)
+            slices = [BloomFilter(*row) for row in res]
+            if not slices:
+                return None
+            return ScalableBloomFilter(capacity, fp_rate, slices)
+        except SQLAlchemyError as e:
+            raise RepositoryError("Database error when loading a seen filter.") from e
+
+    async def add_many(
+        self, seen: Mapping[int, Sequence[int]], capacity: int, fp_rate: float
+    ) -> None:
+        """
+        Add profiles to the filters of their users, adding slices sized from
+        `capacity` and `fp_rate` as needed (see `ScalableBloomFilter`).
+
+        Four statements for any number of users: create the missing first slices,
+        lock the first slices, read all the slices, then write back the changed
+        and added ones.
+        """
+        if not seen:
+            return
+        try:
+            user_ids = sorted(seen)  # One lock order for every transaction
+            empty = ScalableBloomFilter(capacity, fp_rate).slices[0]
+            await self.session.execute(
+                pg_insert(SeenFilterOrm.__table__)
+                .from_select(
+                    ["user_id", "slice", "bits", "hashes", "count"],
+                    select(
+                        func.unnest(
+                            bindparam("user_ids", user_ids, type_=ARRAY(BigInteger))
+                        ),
+                        bindparam("slice", 0, type_=SmallInteger),
+                        bindparam("bits", bytes(empty.bits), type_=LargeBinary),
+                        bindparam("hashes", empty.hashes, type_=SmallInteger),
+                        bindparam("count", 0, type_=Integer),
+                    ),
+                )
+                .on_conflict_do_nothing()
+            )
+
+            ids = bindparam("ids", user_ids, type_=ARRAY(BigInteger))
+            await self.session.execute(
+                select(SeenFilterOrm.user_id)
+                .where(SeenFilterOrm.user_id == any_(ids), SeenFilterOrm.slice == 0)
+                .order_by(SeenFilterOrm.user_id)
+                .with_for_update()
+            )
+            # A statement of its own, so it sees the slices added by the
+            # transactions the lock waited for
+            res = await self.session.execute(
+                select(
+                    SeenFilterOrm.user_id,
+                    SeenFilterOrm.bits,
+                    SeenFilterOrm.hashes,
+                    SeenFilterOrm.count,
+                )
+                .where(SeenFilterOrm.user_id == any_(ids))
+                .order_by(SeenFilterOrm.user_id, SeenFilterOrm.slice)
+            )
+            slices: dict[int, list[BloomFilter]] = {}
+            for user_id, bits, hashes, count in res:
+                slices.setdefault(user_id, []).append(BloomFilter(bits, hashes, count))
+
+            changed = []
+            for user_id, user_slices in slices.items():
+                first_changed = len(user_slices) - 1
+                bloom = ScalableBloomFilter(capacity, fp_rate, user_slices)
+                bloom.update(seen[user_id])
+                for index in range(first_changed, len(bloom.slices)):
+                    changed.append((user_id, index, bloom.slices[index]))
+
+            rows = (
+                func.unnest(
+                    bindparam(
+                        "user_ids",
+                        [user_id for user_id, _, _ in changed],
+                        type_=ARRAY(BigInteger),
+                    ),
+                    bindparam(
+                        "slices",
+                        [index for _, index, _ in changed],
+                        type_=ARRAY(SmallInteger),
+                    ),
+                    bindparam(
+                        "bits",
+                        [bytes(bloom.bits) for _, _, bloom in changed],
+                        type_=ARRAY(LargeBinary),
+                    ),
+                    bindparam(
+                        "hashes",
+                        [bloom.hashes for _, _, bloom in changed],
+                        type_=ARRAY(SmallInteger),
+                    ),
+                    bindparam(
+                        "counts",
+                        [bloom.count for _, _, bloom in changed],
+                        type_=ARRAY(Integer),
+                    ),
+                )
+                .table_valued("user_id", "slice", "bits", "hashes", "count")
+                .render_derived("rows")
+            )
+            stmt = pg_insert(SeenFilterOrm.__table__).from_select(
+                ["user_id", "slice", "bits", "hashes", "count"],
+                select(
+                    rows.c.user_id,
+                    rows.c.slice,
+                    rows.c.bits,
+                    rows.c.hashes,
+                    rows.c.count,
+                ),
+            )
+            await self.session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["user_id", "slice"],
+                    set_={
+                        "bits": stmt.excluded.bits,
+                        "count": stmt.excluded.count,
+                        "updated_at": func.now(),
+                    },
+                )
+            )
+        except SQLAlchemyError as e:
+            raise RepositoryError("Database error when updating seen filters.") from e
+
+    async def delete(self, user_id: int) -> None:
+        try:
+            await self.session.execute(
+                delete(SeenFilterOrm).where(SeenFilterOrm.user_id == user_id)
+            )
+        except SQLAlchemyError as e:
+            raise RepositoryError("Database error when deleting a seen filter.") from e
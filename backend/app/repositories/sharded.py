@@ -0,0 +1,270 @@
+import asyncio
+import functools
+import heapq
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from contextlib import AsyncExitStack
+from typing import Any, TypeVar
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.exceptions import RepositoryError
+from app.core.sharding import ShardRouter
+from app.models.user_model import SexEnumDB, UserProfileOrm
+from app.repositories.preferences_repository import UserPreferenceRepository
+from app.repositories.profile_repository import UserProfileRepository
+from app.utils.bloom import ScalableBloomFilter
+from app.utils.geo import Circle
+
+R = TypeVar("R")
+
+
+def _by_telegram_id(user: UserProfileOrm | dict) -> int:
+    if isinstance(user, dict):
+        return user["telegram_id"]
+    return user.telegram_id
+
+
+def _by_rank(found: tuple[UserProfileOrm | dict, float]) -> tuple[float, int]:
+    user, rank = found
+    return -rank, _by_telegram_id(user)
+
+
+async def _run(
+    session_maker: async_sessionmaker[AsyncSession],
+    repository: type,
+    call: Callable[[Any], Awaitable[R]],
+) -> R:
+    # Every call is a single statement, so it runs in its own shard transaction
+    try:
+        async with session_maker() as session, session.begin():
+            return await call(repository(session))
+    except SQLAlchemyError as e:
+        raise RepositoryError("Database error occurred on a shard") from e
+
+
+class ShardedProfileRepository:
+    """
+    Profile repository spread over the shards of a `ShardRouter`.
+
+    Calls with one Telegram id go to the owning shard. Calls over many profiles
+    query all the shards concurrently and merge the results by Telegram id, so
+    keyset pages stay exact across shards.
+
+    With `mappings`, the shard repositories read plain dicts, as in the mappings
+    read mode of `SQLAlchemyRepository`.
+    """
+
+    def __init__(self, router: ShardRouter, mappings: bool = False) -> None:
+        self.router = router
+        self.repository = functools.partial(UserProfileRepository, mappings=mappings)
+
+    async def _on_shard(
+        self, telegram_id: int, call: Callable[[UserProfileRepository], Awaitable[R]]
+    ) -> R:
+        session_maker = self.router.session_maker_for(telegram_id)
+        return await _run(session_maker, self.repository, call)
+
+    async def _on_all_shards(
+        self, call: Callable[[UserProfileRepository], Awaitable[R]]
+    ) -> list[R]:
+        return await asyncio.gather(
+            *(
+                _run(session_maker, self.repository, call)
+                for session_maker in self.router.session_makers.values()
+            )
+        )
+
+    async def _on_groups(
+        self,
+        groups: dict[str, list],
+        call: Callable[[UserProfileRepository, list], Awaitable[R]],
+    ) -> list[R]:
+        return await asyncio.gather(
+            *(
+                _run(
+                    self.router.session_makers[shard],
+                    self.repository,
+                    lambda repo, items=items: call(repo, items),
+                )
+                for shard, items in groups.items()
+            )
+        )
+
+    async def add_one_returning(self, data: dict) -> int | None:
+        return await self._on_shard(
+            data["telegram_id"], lambda repo: repo.add_one_returning(data)
+        )
+
+    async def add_many(self, data: Sequence[dict]) -> list[int]:
+        groups = self.router.ring.group(data, key=lambda row: row["telegram_id"])
+        created = await self._on_groups(groups, lambda repo, rows: repo.add_many(rows))
+        return [telegram_id for ids in created for telegram_id in ids]
+
+    async def find(self, id: int) -> UserProfileOrm | None:
+        return await self._on_shard(id, lambda repo: repo.find(id))
+
+    async def find_with_preference(
+        self, id: int
+    ) -> tuple[UserProfileOrm, SexEnumDB | None] | None:
+        return await self._on_shard(id, lambda repo: repo.find_with_preference(id))
+
+    async def find_all(self) -> list[UserProfileOrm]:
+        results = await self._on_all_shards(lambda repo: repo.find_all())
+        return [row for rows in results for row in rows]
+
+    async def find_page(self, after: int | None, limit: int) -> list[UserProfileOrm]:
+        # The first `limit` rows overall are among the first `limit` of every shard
+        pages = await self._on_all_shards(lambda repo: repo.find_page(after, limit))
+        return list(heapq.merge(*pages, key=_by_telegram_id))[:limit]
+
+    async def find_many(self, ids: Sequence[int]) -> list[UserProfileOrm]:
+        groups = self.router.ring.group(ids)
+        found = await self._on_groups(groups, lambda repo, ids: repo.find_many(ids))
+        return list(heapq.merge(*found, key=_by_telegram_id))
+
+    async def find_candidates(
+        self,
+        id: int,
+        city: str | None,
+        sexes: Sequence[SexEnumDB],
+        accepted_by: Sequence[SexEnumDB],
+        age_min: int,
+        age_max: int,
+        after: int | None,
+        limit: int,
+        seen: ScalableBloomFilter | None = None,
+        near: Circle | None = None,
+    ) -> list[UserProfileOrm]:
+        pages = await self._on_all_shards(
+            lambda repo: repo.find_candidates(
+                id,
+                city,
+                sexes,
+                accepted_by,
+                age_min,
+                age_max,
+                after,
+                limit,
+                seen,
+                near,
+            )
+        )
+        return list(heapq.merge(*pages, key=_by_telegram_id))[:limit]
+
+    async def count_matches(self, text: str, limit: int, fuzzy: bool = False) -> int:
+        counts = await self._on_all_shards(
+            lambda repo: repo.count_matches(text, limit, fuzzy)
+        )
+        return min(sum(counts), limit)
+
+    async def search(
+        self,
+        text: str,
+        after: tuple[float, int] | None,
+        limit: int,
+        fuzzy: bool = False,
+    ) -> list[tuple[UserProfileOrm, float]]:
+        pages = await self._on_all_shards(
+            lambda repo: repo.search(text, after, limit, fuzzy)
+        )
+        return list(heapq.merge(*pages, key=_by_rank))[:limit]
+
+    async def stream_all(
+        self, batch_size: int
+    ) -> AsyncIterator[Sequence[UserProfileOrm]]:
+        async with AsyncExitStack() as stack:
+            streams = []
+            for session_maker in self.router.session_makers.values():
+                session = await stack.enter_async_context(session_maker())
+                repo = self.repository(session)
+                streams.append(_iter_rows(repo.stream_all(batch_size)))
+
+            batch = []
+            async for user in _merge(streams, key=_by_telegram_id):
+                batch.append(user)
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+    async def patch_returning(self, id: int, user_update: dict) -> int | None:
+        return await self._on_shard(
+            id, lambda repo: repo.patch_returning(id, user_update)
+        )
+
+    async def delete_returning(self, id: int) -> int | None:
+        return await self._on_shard(id, lambda repo: repo.delete_returning(id))
+
+    async def delete_all(self) -> None:
+        await self._on_all_shards(lambda repo: repo.delete_all())
+
+
+class ShardedPreferenceRepository:
+    """
+    Preference repository spread over the shards of a `ShardRouter`.
+
+    A preference lives on the shard of its profile, so the foreign key between
+    them still holds within every shard.
+    """
+
+    def __init__(self, router: ShardRouter) -> None:
+        self.router = router
+
+    async def add_one_for_profile(self, data: dict) -> tuple[bool, int | None]:
+        session_maker = self.router.session_maker_for(data["telegram_id"])
+        return await _run(
+            session_maker,
+            UserPreferenceRepository,
+            lambda repo: repo.add_one_for_profile(data),
+        )
+
+
+class ShardedUnitOfWork:
+    """
+    Unit of work over the shards: every repository call is its own transaction.
+
+    The service layer only performs single-statement writes, so nothing needs
+    to span several calls; entering and leaving the unit of work is a no-op.
+    """
+
+    def __init__(self, router: ShardRouter, mappings: bool = False) -> None:
+        self.router = router
+        self.profiles = ShardedProfileRepository(router, mappings=mappings)
+        self.preferences = ShardedPreferenceRepository(router)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+async def _iter_rows(partitions: AsyncIterator[Sequence[R]]) -> AsyncIterator[R]:
+    async for partition in partitions:
+        for row in partition:
+            yield row
+
+
+async def _merge(
+    streams: list[AsyncIterator[R]], key: Callable[[R], Any]
+) -> AsyncIterator[R]:
+    """
+    Merge async iterators that are each sorted by `key` into one sorted stream.
+    """
+    heap = []
+    for index, stream in enumerate(streams):
+        row = await anext(stream, None)
+        if row is not None:
+            heap.append((key(row), index, row))
+    heapq.heapify(heap)
+
+    while heap:
+        _, index, row = heap[0]
+        yield row
+        following = await anext(streams[index], None)
+        if following is None:
+            heapq.heappop(heap)
+        else:
+            heapq.heapreplace(heap, (key(following), index, following))
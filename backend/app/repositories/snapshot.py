@@ -0,0 +1,240 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.user_model import SexEnumDB, UserPreferenceOrm, UserProfileOrm
+from app.utils.bloom import ScalableBloomFilter
+
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional dependency: pip install backend[snapshot]
+    np = None
+
+# Compact integer codes of the sexes, in declaration order of SexEnumDB
+SEX_CODES = {sex: code for code, sex in enumerate(SexEnumDB)}
+UNSPECIFIED = SEX_CODES[SexEnumDB.unspecified]
+NO_PREFERENCE = len(SEX_CODES)  # The user has not set a preference
+
+
+def sex_code(sex: SexEnumDB | str | None) -> int:
+    if sex is None:
+        return NO_PREFERENCE
+    return SEX_CODES[SexEnumDB(sex)]
+
+
+class ProfileSnapshot:
+    """
+    In-process columnar copy of the profile fields used by candidate matching.
+
+    Every field lives in its own NumPy array, so filtering candidates is a single
+    vectorized mask. Rows are kept dense: a removed row is replaced by the last
+    one, and `_rows` maps a Telegram id to its row index.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        if np is None:
+            raise RuntimeError("The profile snapshot requires numpy to be installed.")
+
+        capacity = max(capacity, 1)
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.ages = np.zeros(capacity, dtype=np.int16)
+        self.sexes = np.zeros(capacity, dtype=np.int8)
+        self.cities = np.zeros(capacity, dtype=np.int32)
+        self.preferences = np.full(capacity, NO_PREFERENCE, dtype=np.int8)
+        self.size = 0
+
+        self._rows: dict[int, int] = {}
+        self._city_ids: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, telegram_id: int) -> bool:
+        return telegram_id in self._rows
+
+    @classmethod
+    async def load(
+        cls,
+        session_maker: async_sessionmaker[AsyncSession],
+        batch_size: int = 10_000,
+    ) -> "ProfileSnapshot":
+        """
+        Build a snapshot from the matchable fields of every profile.
+
+        Args:
+            session_maker (async_sessionmaker[AsyncSession]): Factory of the session to read with.
+            batch_size (int): Rows fetched per round-trip of the server-side cursor.
+
+        Returns:
+            ProfileSnapshot: Snapshot holding all current profiles.
+        """
+        snapshot = cls()
+        await snapshot.load_rows(session_maker, batch_size)
+        return snapshot
+
+    async def load_rows(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        batch_size: int = 10_000,
+    ) -> None:
+        """
+        Add the matchable fields of every profile of one database, e.g. a shard.
+
+        Args:
+            session_maker (async_sessionmaker[AsyncSession]): Factory of the session to read with.
+            batch_size (int): Rows fetched per round-trip of the server-side cursor.
+        """
+        stmt = (
+            select(
+                UserProfileOrm.telegram_id,
+                UserProfileOrm.age,
+                UserProfileOrm.sex,
+                UserProfileOrm.city,
+                UserPreferenceOrm.sex,
+            )
+            .outerjoin(UserPreferenceOrm)
+            .execution_options(yield_per=batch_size)
+        )
+        async with session_maker() as session:
+            res = await session.stream(stmt)
+            async for rows in res.partitions():
+                for telegram_id, age, sex, city, preference in rows:
+                    self.add_profile(telegram_id, age, sex, city, preference)
+
+    def _city_id(self, city: str) -> int:
+        city_id = self._city_ids.get(city)
+        if city_id is None:
+            city_id = self._city_ids[city] = len(self._city_ids)
+        return city_id
+
+    def _grow(self) -> None:
+        capacity = len(self.ids) * 2
+        for name in ("ids", "ages", "sexes", "cities", "preferences"):
+            old = getattr(self, name)
+            new = np.full(capacity, NO_PREFERENCE, dtype=old.dtype)
+            new[: self.size] = old[: self.size]
+            setattr(self, name, new)
+
+    def add_profile(
+        self,
+        telegram_id: int,
+        age: int,
+        sex: SexEnumDB | str,
+        city: str,
+        preference: SexEnumDB | str | None = None,
+    ) -> None:
+        row = self._rows.get(telegram_id)
+        if row is None:
+            if self.size == len(self.ids):
+                self._grow()
+            row = self._rows[telegram_id] = self.size
+            self.size += 1
+
+        self.ids[row] = telegram_id
+        self.ages[row] = age
+        self.sexes[row] = sex_code(sex)
+        self.cities[row] = self._city_id(city)
+        self.preferences[row] = sex_code(preference)
+
+    def patch_profile(
+        self,
+        telegram_id: int,
+        age: int | None = None,
+        sex: SexEnumDB | str | None = None,
+        city: str | None = None,
+    ) -> None:
+        row = self._rows.get(telegram_id)
+        if row is None:
+            return
+
+        if age is not None:
+            self.ages[row] = age
+        if sex is not None:
+            self.sexes[row] = sex_code(sex)
+        if city is not None:
+            self.cities[row] = self._city_id(city)
+
+    def set_preference(
+        self, telegram_id: int, preference: SexEnumDB | str | None
+    ) -> None:
+        row = self._rows.get(telegram_id)
+        if row is not None:
+            self.preferences[row] = sex_code(preference)
+
+    def remove(self, telegram_id: int) -> None:
+        row = self._rows.pop(telegram_id, None)
+        if row is None:
+            return
+
+        # Move the last row into the hole to keep the arrays dense
+        last = self.size - 1
+        if row != last:
+            for array in (
+                self.ids,
+                self.ages,
+                self.sexes,
+                self.cities,
+                self.preferences,
+            ):
+                array[row] = array[last]
+            self._rows[int(self.ids[row])] = row
+        self.size = last
+
+    def get_age(self, telegram_id: int) -> int | None:
+        row = self._rows.get(telegram_id)
+        return None if row is None else int(self.ages[row])
+
+    def find_candidates(
+        self,
+        telegram_id: int,
+        age_min: int,
+        age_max: int,
+        after: int | None,
+        limit: int,
+        seen: ScalableBloomFilter | None = None,
+    ) -> list[int] | None:
+        """
+        Find Telegram ids of candidates with the same rules as the SQL query of
+        `UserProfileRepository.find_candidates`.
+
+        Args:
+            telegram_id (int): User to find candidates for.
+            age_min (int): Lower age bound.
+            age_max (int): Upper age bound.
+            after (int | None): Telegram id the page starts after.
+            limit (int): Maximum number of ids to return.
+            seen (ScalableBloomFilter | None): Filter of the ids to leave out.
+
+        Returns:
+            list[int] | None: Ascending Telegram ids, or None if the user is not in the snapshot.
+        """
+        row = self._rows.get(telegram_id)
+        if row is None:
+            return None
+
+        n = self.size
+        ids = self.ids[:n]
+        sexes = self.sexes[:n]
+        preferences = self.preferences[:n]
+        ages = self.ages[:n]
+        my_sex = self.sexes[row]
+        my_preference = self.preferences[row]
+
+        mask = (self.cities[:n] == self.cities[row]) & (ids != telegram_id)
+        mask &= (ages >= age_min) & (ages <= age_max)
+        if my_preference not in (UNSPECIFIED, NO_PREFERENCE):
+            mask &= sexes == my_preference
+        mask &= (
+            (preferences == NO_PREFERENCE)
+            | (preferences == UNSPECIFIED)
+            | (preferences == my_sex)
+        )
+        if after is not None:
+            mask &= ids > after
+
+        matched = ids[mask]
+        if seen is not None:
+            matched = matched[~seen.contains_many(matched)]
+        if len(matched) > limit:
+            # Only the smallest `limit` ids need to be sorted
+            matched = np.partition(matched, limit - 1)[:limit]
+        return np.sort(matched).tolist()
@@ -0,0 +1,92 @@
+from collections.abc import Sequence
+
+from sqlalchemy import BigInteger, Boolean, and_, bindparam, func, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import RepositoryError
+from app.models.swipe_model import SwipeOrm
+
+
+class SwipeRepository:
+    """
+    Append-only repository of swipes.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add_many(self, data: Sequence[dict]) -> None:
+        """
+        Multi-row INSERT ... SELECT FROM unnest(...) ON CONFLICT DO NOTHING.
+
+        A repeated swipe keeps the first decision, which also makes a batch safe
+        to insert again.
+        """
+        if not data:
+            return
+        try:
+            # One array parameter per column keeps one prepared statement for any
+            # number of rows, and stays far below the limit of bind parameters
+            rows = (
+                func.unnest(
+                    bindparam(
+                        "swiper_ids",
+                        [row["swiper_id"] for row in data],
+                        type_=ARRAY(BigInteger),
+                    ),
+                    bindparam(
+                        "swipee_ids",
+                        [row["swipee_id"] for row in data],
+                        type_=ARRAY(BigInteger),
+                    ),
+                    bindparam(
+                        "liked", [row["liked"] for row in data], type_=ARRAY(Boolean)
+                    ),
+                )
+                .table_valued("swiper_id", "swipee_id", "liked")
+                .render_derived("rows")
+            )
+            stmt = (
+                pg_insert(SwipeOrm.__table__)
+                .from_select(
+                    ["swiper_id", "swipee_id", "liked"],
+                    select(rows.c.swiper_id, rows.c.swipee_id, rows.c.liked),
+                )
+                .on_conflict_do_nothing()
+            )
+            await self.session.execute(stmt)
+        except SQLAlchemyError as e:
+            raise RepositoryError("Database error when adding swipes.") from e
+
+    async def find_decisions(
+        self, swiper_id: int, swipee_id: int
+    ) -> tuple[bool | None, bool | None]:
+        """
+        Stored decisions of a pair of users about each other: primary key lookups
+        in the partitions of both.
+
+        Returns:
+            tuple[bool | None, bool | None]: Whether `swiper_id` liked `swipee_id`
+                and whether `swipee_id` liked `swiper_id`, None for no swipe.
+        """
+        try:
+            stmt = select(SwipeOrm.swiper_id, SwipeOrm.liked).where(
+                or_(
+                    and_(
+                        SwipeOrm.swiper_id == swiper_id,
+                        SwipeOrm.swipee_id == swipee_id,
+                    ),
+                    and_(
+                        SwipeOrm.swiper_id == swipee_id,
+                        SwipeOrm.swipee_id == swiper_id,
+                    ),
+                )
+            )
+            res = await self.session.execute(stmt)
+            decisions = dict(res.all())
+            return decisions.get(swiper_id), decisions.get(swipee_id)
+        except SQLAlchemyError as e:
+            raise RepositoryError("Database error when searching for swipes.") from e
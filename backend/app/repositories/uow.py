@@ -2,23 +2,33 @@ from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.exceptions import RepositoryError
+from app.core.metrics import UOW_LATENCY
+from app.repositories.feed_repository import FeedRepository
 from app.repositories.preferences_repository import UserPreferenceRepository
 from app.repositories.profile_repository import UserProfileRepository
+from app.repositories.seen_repository import SeenFilterRepository
+from app.repositories.swipe_repository import SwipeRepository
 
 
 class UnitOfWork:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, mappings: bool = False):
         self.session = session
-        self.profiles = UserProfileRepository(session)
-        self.preferences = UserPreferenceRepository(session)
+        # With `mappings`, reads return plain dicts (see `SQLAlchemyRepository`)
+        self.profiles = UserProfileRepository(session, mappings=mappings)
+        self.preferences = UserPreferenceRepository(session, mappings=mappings)
+        self.swipes = SwipeRepository(session)
+        self.feeds = FeedRepository(session)
+        self.seen = SeenFilterRepository(session)
 
     async def __aenter__(self):
-        return self
+        with UOW_LATENCY.time("enter"):
+            return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if exc_type:
             try:
-                await self.session.rollback()
+                with UOW_LATENCY.time("rollback"):
+                    await self.session.rollback()
             except Exception:
                 pass
 
@@ -28,9 +38,33 @@ class UnitOfWork:
             return False
         else:
             try:
-                await self.session.commit()
+                with UOW_LATENCY.time("commit"):
+                    await self.session.commit()
             except SQLAlchemyError as commit_error:
                 await self.session.rollback()
                 raise RepositoryError(
                     "Database error occurred during commit"
                 ) from commit_error
+
+
+class ReadOnlyUnitOfWork(UnitOfWork):
+    """
+    Unit of work for pure reads: the transaction is rolled back instead of committed.
+
+    Bind it to a session of a read-only engine (see `get_read_session`), which may
+    point at a replica, so that an accidental write fails instead of going unnoticed.
+    """
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            with UOW_LATENCY.time("rollback"):
+                await self.session.rollback()
+        except SQLAlchemyError as rollback_error:
+            if exc_type is None:
+                raise RepositoryError(
+                    "Database error occurred during rollback"
+                ) from rollback_error
+
+        if exc_type and issubclass(exc_type, SQLAlchemyError):
+            raise RepositoryError("Database error occurred") from exc_val
+        return False
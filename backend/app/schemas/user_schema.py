@@ -1,6 +1,11 @@
 from enum import Enum
+from typing import Generic, TypeVar
 
-from pydantic import BaseModel, ConfigDict, Field, PositiveInt
+from pydantic import BaseModel, ConfigDict, Field, PositiveInt, model_validator
+
+from app.core.config import settings
+
+T = TypeVar("T")
 
 
 class SexEnum(str, Enum):
@@ -9,7 +14,23 @@ class SexEnum(str, Enum):
     unspecified = "Не указан"
 
 
-class UserProfileCreate(BaseModel):
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+LOCATION_FIELDS = frozenset({"latitude", "longitude"})
+
+
+def _check_location(profile: BaseModel) -> BaseModel:
+    # A patch that clears the location sets both fields to null
+    given = LOCATION_FIELDS & profile.model_fields_set
+    if (profile.latitude is None) != (profile.longitude is None) or len(given) == 1:
+        raise ValueError("latitude and longitude must be set together")
+    return profile
+
+
+class UserProfileBase(BaseModel):
     name: str = Field(max_length=100)
     about_me: str | None = Field(default=None, max_length=300)
     age: PositiveInt = Field(le=120)
@@ -19,7 +40,20 @@ class UserProfileCreate(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
-class UserProfileRead(UserProfileCreate):
+class UserProfileCreate(UserProfileBase):
+    latitude: float | None = Field(default=None, ge=-90, le=90)
+    longitude: float | None = Field(default=None, ge=-180, le=180)
+
+    _location = model_validator(mode="after")(_check_location)
+
+
+class UserProfileRecord(UserProfileCreate):
+    # A whole profile to store, location included
+    telegram_id: PositiveInt
+
+
+class UserProfileRead(UserProfileBase):
+    # Profiles are shown to other users, so the location is left out
     telegram_id: PositiveInt
 
 
@@ -29,9 +63,13 @@ class UserProfilePatch(BaseModel):
     age: PositiveInt | None = Field(le=120, default=None)
     city: str | None = Field(default=None)
     sex: SexEnum | None = Field(default=None)
+    latitude: float | None = Field(default=None, ge=-90, le=90)
+    longitude: float | None = Field(default=None, ge=-180, le=180)
 
     model_config = ConfigDict(from_attributes=True)
 
+    _location = model_validator(mode="after")(_check_location)
+
 
 class UserPreferencesCreate(BaseModel):
     sex: SexEnum = Field(default="Не указан")
@@ -41,3 +79,44 @@ class UserPreferencesCreate(BaseModel):
 
 class UserPreferencesRead(UserPreferencesCreate):
     telegram_id: PositiveInt
+
+
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: str | None = Field(default=None)
+
+
+class BulkImportRowError(BaseModel):
+    index: int  # Position of the row in the request body
+    telegram_id: int | None = Field(default=None)
+    detail: str
+
+
+class BulkImportResult(BaseModel):
+    received: int = Field(default=0)
+    created: int = Field(default=0)
+    conflicts: list[BulkImportRowError] = Field(default_factory=list)
+    errors: list[BulkImportRowError] = Field(default_factory=list)
+
+
+class ProfilesBatchGetRequest(BaseModel):
+    telegram_ids: list[PositiveInt] = Field(
+        min_length=1, max_length=settings.MAX_BATCH_GET_IDS
+    )
+
+
+class ProfilesBatchGetResult(BaseModel):
+    items: list[UserProfileRead]  # In the order of the requested ids
+    missing: list[int] = Field(default_factory=list)
+
+
+class SwipeCreate(BaseModel):
+    swipee_id: PositiveInt  # Telegram id of the swiped user
+    liked: bool
+
+
+class SwipeResult(BaseModel):
+    swiper_id: int
+    swipee_id: int
+    liked: bool  # Stored decision, the first one of a repeated swipe
+    match: bool  # Whether the swipee liked the swiper too
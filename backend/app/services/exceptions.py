@@ -8,3 +8,33 @@ class EntityAlreadyExistsException(Exception):
     """The exception is whtn the entity already created"""
 
     pass
+
+
+class InvalidCursorException(Exception):
+    """The exception is when the pagination cursor cannot be decoded."""
+
+    pass
+
+
+class InvalidPayloadException(Exception):
+    """The exception is when the request body cannot be parsed."""
+
+    pass
+
+
+class MissingLocationException(Exception):
+    """The exception is when a search needs the location the user did not set."""
+
+    pass
+
+
+class QueryTooBroadException(Exception):
+    """The exception is when a search query matches too many profiles to rank."""
+
+    pass
+
+
+class ServiceOverloadedException(Exception):
+    """The exception is when a write cannot be accepted before a timeout."""
+
+    pass
@@ -1,16 +1,136 @@
-from sqlalchemy.ext.asyncio import AsyncSession
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
 
-from app.repositories.uow import UnitOfWork
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.cache import CacheBackend, QueueCache
+from app.core.sharding import ShardRouter
+from app.core.singleflight import SingleFlight
+from app.core.work_queue import KeyedWorkQueue
+from app.core.write_behind import WriteBehindBuffer
+from app.core.write_log import WriteLog
+from app.repositories.sharded import ShardedUnitOfWork
+from app.repositories.snapshot import ProfileSnapshot
+from app.repositories.uow import ReadOnlyUnitOfWork, UnitOfWork
+from app.services.feed_service import FeedService
+from app.services.matching_service import MatchingService
 from app.services.preferences_service import UserPreferencesService
 from app.services.profile_service import UserProfilesService
+from app.services.swipe_service import SwipeService
 
 
 class ServiceFactory:
-    def __init__(self, session: AsyncSession):
-        self.uow = UnitOfWork(session)
+    def __init__(
+        self,
+        session: AsyncSession,
+        read_session: AsyncSession | None = None,
+        snapshot: ProfileSnapshot | None = None,
+        profile_cache: CacheBackend | None = None,
+        profile_write_log: WriteLog | None = None,
+        single_flight: SingleFlight | None = None,
+        shard_router: ShardRouter | None = None,
+        swipe_buffer: WriteBehindBuffer[dict] | None = None,
+        feed_cache: QueueCache | None = None,
+        feed_refiller: KeyedWorkQueue[int] | None = None,
+        read_session_maker: async_sessionmaker[AsyncSession] | None = None,
+        replica_lag: float = 0.0,
+    ):
+        # Reads shared by concurrent requests run on sessions of their own
+        self.read_session_maker = read_session_maker
+        # Seconds a write may take to reach the read session, 0 without a replica
+        self.replica_lag = replica_lag
+        if shard_router is not None:
+            # Every repository call opens its own transaction on the owning shard.
+            # Writes are single statements that load nothing, so reads can be dicts
+            self.uow = self.read_uow = ShardedUnitOfWork(shard_router, mappings=True)
+            self.read_session_maker = None
+            self.replica_lag = 0.0
+        else:
+            self.uow = UnitOfWork(session)
+            # Reads go to the read-only session, e.g. of a replica, when there is one,
+            # and load plain dicts: nothing read there is written back
+            self.read_uow = ReadOnlyUnitOfWork(read_session or session, mappings=True)
+        # Swipes and feeds are not sharded, they always live in the primary database
+        self.primary_uow = self.uow if shard_router is None else UnitOfWork(session)
+        self.swipe_buffer = swipe_buffer
+        self.feed_cache = feed_cache
+        self.feed_refiller = feed_refiller
+        self.snapshot = snapshot
+        self.profile_cache = profile_cache
+        self.profile_write_log = profile_write_log
+        self.single_flight = single_flight
 
     def get_profiles_services(self):
-        return UserProfilesService(uow=self.uow)
+        return self._profiles_services(feeds=self.get_feed_services())
+
+    def _profiles_services(self, feeds: FeedService | None = None):
+        return UserProfilesService(
+            uow=self.uow,
+            read_uow=self.read_uow,
+            snapshot=self.snapshot,
+            cache=self.profile_cache,
+            write_log=self.profile_write_log,
+            single_flight=self.single_flight,
+            feeds=feeds,
+            shared_read_uow=None
+            if self.read_session_maker is None
+            else self._shared_read_uow,
+            replica_lag=self.replica_lag,
+        )
+
+    @asynccontextmanager
+    async def _shared_read_uow(self) -> AsyncIterator[UnitOfWork]:
+        async with self.read_session_maker() as session:
+            yield ReadOnlyUnitOfWork(session, mappings=True)
 
     def get_preferences_services(self):
-        return UserPreferencesService(uow=self.uow)
+        return UserPreferencesService(
+            uow=self.uow, snapshot=self.snapshot, feeds=self.get_feed_services()
+        )
+
+    def get_matching_services(self):
+        return MatchingService(uow=self.read_uow, snapshot=self.snapshot)
+
+    def get_swipe_services(self):
+        return SwipeService(uow=self.primary_uow, buffer=self.swipe_buffer)
+
+    def get_feed_services(self):
+        return FeedService(
+            uow=self.primary_uow,
+            matching=self.get_matching_services(),
+            # Candidates are only read, the feed invalidates nothing
+            profiles=self._profiles_services(),
+            cache=self.feed_cache,
+            refiller=self.feed_refiller,
+            swipe_buffer=self.swipe_buffer,
+        )
+
+
+def feed_refill(
+    session_maker: async_sessionmaker[AsyncSession],
+    read_session_maker: async_sessionmaker[AsyncSession],
+    **kwargs,
+) -> Callable[[int], Awaitable[int]]:
+    """
+    Handler of the background feed refills: one refill per pair of sessions.
+
+    Args:
+        session_maker (async_sessionmaker[AsyncSession]): Sessions of the primary.
+        read_session_maker (async_sessionmaker[AsyncSession]): Read-only sessions.
+        **kwargs: Shared state passed to `ServiceFactory`, e.g. the snapshot.
+
+    Returns:
+        Callable[[int], Awaitable[int]]: Refills the queue of a Telegram id.
+    """
+
+    async def refill(telegram_id: int) -> int:
+        async with session_maker() as session, read_session_maker() as read_session:
+            factory = ServiceFactory(
+                session,
+                read_session=read_session,
+                read_session_maker=read_session_maker,
+                **kwargs,
+            )
+            return await factory.get_feed_services().refill(telegram_id)
+
+    return refill
@@ -0,0 +1,210 @@
+from app.core.cache import QueueCache
+from app.core.config import settings
+from app.core.metrics import timed_methods
+from app.core.work_queue import KeyedWorkQueue
+from app.core.write_behind import WriteBehindBuffer
+from app.repositories.uow import UnitOfWork
+from app.services.exceptions import EntityNotFoundException
+from app.services.matching_service import MatchingService
+from app.services.profile_service import UserProfilesService
+
+MAX_REFILL_PAGES = 10  # Candidate searches per refill, bounds work on buffered swipes
+
+
+@timed_methods("feeds")
+class FeedService:
+    """
+    Serve candidates one by one from a queue precomputed per user.
+
+    The next candidate is popped from the head of the queue, or from the front
+    cache of the heads claimed by this process. A queue that drops below the
+    low-water mark is refilled by the background workers of `refiller`; an empty
+    one is refilled inline. A refill continues the candidate search where the
+    previous one stopped.
+
+    Candidates are added to the user's Bloom filter of seen profiles as they are
+    claimed, and swiped users as their swipes are written (see `swipe_writer`).
+    The candidate search leaves out the profiles in the filter, so a candidate is
+    not shown twice, while up to `seen_fp_rate` of the others are missed too,
+    however many profiles the user has seen.
+
+    A change of the matching fields of a user resets the user's queue and removes
+    them from the other queues (see `invalidate`). Heads cached by other
+    processes are not reset, so up to `fetch_size` candidates claimed before the
+    change may still be served there. A new profile enters existing queues once
+    their candidate search starts over.
+
+    Claims and the pushes of refills take turns on the feed row of the user, so
+    a refill drops the candidates claimed while it searched.
+    """
+
+    def __init__(
+        self,
+        uow: UnitOfWork,
+        matching: MatchingService,
+        profiles: UserProfilesService,
+        cache: QueueCache | None = None,
+        refiller: KeyedWorkQueue[int] | None = None,
+        swipe_buffer: WriteBehindBuffer[dict] | None = None,
+        queue_size: int = settings.FEED_QUEUE_SIZE,
+        low_water_mark: int = settings.FEED_LOW_WATER_MARK,
+        fetch_size: int = settings.FEED_FETCH_SIZE,
+        seen_capacity: int = settings.SEEN_FILTER_CAPACITY,
+        seen_fp_rate: float = settings.SEEN_FILTER_FP_RATE,
+    ) -> None:
+        self.uow = uow
+        self.matching = matching
+        self.profiles = profiles
+        self.cache = cache
+        self.refiller = refiller
+        self.swipe_buffer = swipe_buffer
+        self.queue_size = queue_size
+        self.low_water_mark = low_water_mark
+        self.fetch_size = fetch_size
+        self.seen_capacity = seen_capacity
+        self.seen_fp_rate = seen_fp_rate
+
+    async def next_candidate_json(self, telegram_id: int) -> bytes | None:
+        """
+        Pop the next candidate of a user, encoded as JSON for the response.
+
+        Returns:
+            bytes | None: Profile of the candidate, None if there is no candidate left.
+        """
+        while True:
+            candidate_id = await self.next_candidate_id(telegram_id)
+            if candidate_id is None:
+                return None
+            try:
+                return await self.profiles.find_user_json(candidate_id)
+            except EntityNotFoundException:
+                continue  # Deleted after it was queued
+
+    async def next_candidate_id(self, telegram_id: int) -> int | None:
+        if self.cache is not None:
+            candidate_id = self.cache.pop(telegram_id)
+            if candidate_id is not None:
+                return candidate_id
+
+        claimed, queued = await self._claim(telegram_id)
+        if not claimed:
+            # An empty queue, e.g. on the first request of a user, cannot wait
+            await self.refill(telegram_id)
+            claimed, queued = await self._claim(telegram_id)
+            if not claimed:
+                return None
+        if queued < self.low_water_mark and self.refiller is not None:
+            self.refiller.submit(telegram_id)
+
+        if self.cache is not None:
+            self.cache.extend(telegram_id, claimed[1:])
+        return claimed[0]
+
+    async def _claim(self, telegram_id: int) -> tuple[list[int], int]:
+        # Without a front cache, every pop takes a single candidate
+        limit = self.fetch_size if self.cache is not None else 1
+        async with self.uow:
+            await self.uow.feeds.lock(telegram_id)
+            claimed = await self.uow.feeds.pop(telegram_id, limit)
+            queued = await self.uow.feeds.count(telegram_id, self.low_water_mark)
+            if claimed:
+                await self.uow.seen.add_many(
+                    {telegram_id: claimed}, self.seen_capacity, self.seen_fp_rate
+                )
+        return claimed, queued
+
+    async def refill(self, telegram_id: int) -> int:
+        """
+        Top the queue of a user up to `queue_size` candidates.
+
+        Candidates are searched without holding the feed row, so pops go on in
+        the meantime. A refill whose feed was pushed to or reset in the meantime,
+        by any process, gives up.
+
+        Args:
+            telegram_id (int): User whose queue to refill.
+
+        Returns:
+            int: Number of candidates queued.
+
+        Raises:
+            EntityNotFoundException: The user does not exist.
+        """
+        async with self.uow:
+            state = await self.uow.feeds.lock(telegram_id)
+            seen = await self.uow.seen.get(
+                telegram_id, self.seen_capacity, self.seen_fp_rate
+            )
+            missing = self.queue_size - await self.uow.feeds.count(
+                telegram_id, self.queue_size
+            )
+
+        cursor, _ = state
+        queued = []
+        for _ in range(MAX_REFILL_PAGES):
+            if len(queued) >= missing:
+                break
+            limit = missing - len(queued)
+            after_id = cursor
+            candidate_ids = await self.matching.find_candidate_ids(
+                telegram_id, after_id, limit, seen=seen
+            )
+            if candidate_ids:
+                cursor = candidate_ids[-1]
+                # Swipes still buffered are not in the filter yet
+                queued += [
+                    candidate_id
+                    for candidate_id in candidate_ids
+                    if not self._swipe_buffered(telegram_id, candidate_id)
+                ]
+            if len(candidate_ids) < limit:
+                # The search pass is over, the next refill starts over. So
+                # does this one, rather than leave the queue empty
+                cursor = None
+                if after_id is None or queued or missing < self.queue_size:
+                    break
+
+        async with self.uow:
+            if await self.uow.feeds.lock(telegram_id) != state:
+                return 0
+            # Candidates claimed during the search are in the filter by now
+            seen = await self.uow.seen.get(
+                telegram_id, self.seen_capacity, self.seen_fp_rate
+            )
+            if seen is not None:
+                queued = [
+                    candidate_id for candidate_id in queued if candidate_id not in seen
+                ]
+            await self.uow.feeds.push(telegram_id, queued, cursor)
+        return len(queued)
+
+    def _swipe_buffered(self, telegram_id: int, candidate_id: int) -> bool:
+        if self.swipe_buffer is None:
+            return False
+        return self.swipe_buffer.get((telegram_id, candidate_id)) is not None
+
+    async def invalidate(self, telegram_id: int) -> None:
+        """
+        Reset the queue of a user whose matching fields changed, and remove the
+        user from the queues of others.
+
+        Args:
+            telegram_id (int): User whose profile or preference changed.
+        """
+        async with self.uow:
+            await self.uow.feeds.reset(telegram_id)
+        if self.cache is not None:
+            self.cache.delete(telegram_id)
+
+    async def remove(self, telegram_id: int) -> None:
+        """
+        Delete the feed and the seen profiles of a deleted user.
+
+        Args:
+            telegram_id (int): Deleted user.
+        """
+        async with self.uow:
+            await self.uow.feeds.reset(telegram_id)
+            await self.uow.seen.delete(telegram_id)
+        if self.cache is not None:
+            self.cache.delete(telegram_id)
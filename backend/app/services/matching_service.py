@@ -0,0 +1,182 @@
+from app.core.config import settings
+from app.core.metrics import timed_methods
+from app.models.user_model import SexEnumDB
+from app.repositories.snapshot import ProfileSnapshot
+from app.repositories.uow import UnitOfWork
+from app.schemas.user_schema import Page, UserProfileRead
+from app.services.exceptions import EntityNotFoundException, MissingLocationException
+from app.utils.bloom import ScalableBloomFilter
+from app.utils.geo import Circle
+from app.utils.pagination import clamp_page_size, decode_id_cursor, encode_cursor
+from app.utils.serialization import type_adapter
+
+_profiles_adapter = type_adapter(list[UserProfileRead])
+
+# Profile fields that decide who the user matches, besides the preference
+MATCHING_FIELDS = frozenset({"age", "sex", "city"})
+
+
+def matching_sexes(preference: SexEnumDB | None) -> list[SexEnumDB]:
+    """
+    Sexes accepted by a preference; a missing or unspecified one accepts anyone.
+    """
+    if preference is None or preference == SexEnumDB.unspecified:
+        return list(SexEnumDB)
+    return [SexEnumDB(preference)]
+
+
+@timed_methods("matching")
+class MatchingService:
+    def __init__(
+        self, uow: UnitOfWork, snapshot: ProfileSnapshot | None = None
+    ) -> None:
+        self.uow = uow
+        self.snapshot = snapshot
+
+    async def find_candidates(
+        self,
+        telegram_id: int,
+        after: str | None = None,
+        limit: int = settings.DEFAULT_PAGE_SIZE,
+        age_min: int | None = None,
+        age_max: int | None = None,
+        radius_km: float | None = None,
+    ) -> Page[UserProfileRead]:
+        """
+        Find a page of candidates in the city of the user, or within `radius_km`
+        of the user's location when given.
+
+        Raises:
+            EntityNotFoundException: The user does not exist.
+            MissingLocationException: A radius is given and the user has no location.
+        """
+        after_id = decode_id_cursor(after)
+        limit = clamp_page_size(limit)
+
+        # The snapshot has no coordinates, proximity searches go to the database
+        if (
+            self.snapshot is not None
+            and radius_km is None
+            and telegram_id in self.snapshot
+        ):
+            return await self._find_candidates_in_snapshot(
+                telegram_id, after_id, limit, age_min, age_max
+            )
+
+        async with self.uow:
+            found = await self.uow.profiles.find_with_preference(telegram_id)
+            if found is None:
+                raise EntityNotFoundException("User not found.")
+            user, preference = found
+
+            if age_min is None:
+                age_min = user.age - settings.CANDIDATE_AGE_WINDOW
+            if age_max is None:
+                age_max = user.age + settings.CANDIDATE_AGE_WINDOW
+
+            near = None
+            if radius_km is not None:
+                if user.latitude is None:
+                    raise MissingLocationException("User has no location.")
+                near = Circle(user.latitude, user.longitude, radius_km)
+
+            # Fetch one extra row to find out whether there is a next page
+            candidates = await self.uow.profiles.find_candidates(
+                id=telegram_id,
+                city=user.city if near is None else None,
+                sexes=matching_sexes(preference),
+                accepted_by=[SexEnumDB.unspecified, user.sex],
+                age_min=age_min,
+                age_max=age_max,
+                after=after_id,
+                limit=limit + 1,
+                near=near,
+            )
+            items = _profiles_adapter.validate_python(
+                candidates[:limit], from_attributes=True
+            )
+
+        next_cursor = None
+        if len(candidates) > limit:
+            next_cursor = encode_cursor(items[-1].telegram_id)
+        return Page[UserProfileRead](items=items, next_cursor=next_cursor)
+
+    async def find_candidate_ids(
+        self,
+        telegram_id: int,
+        after_id: int | None,
+        limit: int,
+        seen: ScalableBloomFilter | None = None,
+    ) -> list[int]:
+        """
+        Find Telegram ids of candidates in the default age window, without
+        loading their profiles when the snapshot has the user.
+
+        Args:
+            telegram_id (int): User to find candidates for.
+            after_id (int | None): Telegram id the candidates come after.
+            limit (int): Maximum number of ids to return.
+            seen (ScalableBloomFilter | None): Filter of the profiles to leave out.
+
+        Returns:
+            list[int]: Ascending Telegram ids.
+        """
+        if self.snapshot is not None and telegram_id in self.snapshot:
+            age = self.snapshot.get_age(telegram_id)
+            return self.snapshot.find_candidates(
+                telegram_id,
+                age - settings.CANDIDATE_AGE_WINDOW,
+                age + settings.CANDIDATE_AGE_WINDOW,
+                after=after_id,
+                limit=limit,
+                seen=seen,
+            )
+
+        async with self.uow:
+            found = await self.uow.profiles.find_with_preference(telegram_id)
+            if found is None:
+                raise EntityNotFoundException("User not found.")
+            user, preference = found
+
+            candidates = await self.uow.profiles.find_candidates(
+                id=telegram_id,
+                city=user.city,
+                sexes=matching_sexes(preference),
+                accepted_by=[SexEnumDB.unspecified, user.sex],
+                age_min=user.age - settings.CANDIDATE_AGE_WINDOW,
+                age_max=user.age + settings.CANDIDATE_AGE_WINDOW,
+                after=after_id,
+                limit=limit,
+                seen=seen,
+            )
+        return [
+            row["telegram_id"] if isinstance(row, dict) else row.telegram_id
+            for row in candidates
+        ]
+
+    async def _find_candidates_in_snapshot(
+        self,
+        telegram_id: int,
+        after_id: int | None,
+        limit: int,
+        age_min: int | None,
+        age_max: int | None,
+    ) -> Page[UserProfileRead]:
+        age = self.snapshot.get_age(telegram_id)
+        if age_min is None:
+            age_min = age - settings.CANDIDATE_AGE_WINDOW
+        if age_max is None:
+            age_max = age + settings.CANDIDATE_AGE_WINDOW
+
+        # Filtering happens in memory, the database only loads the page by id
+        ids = self.snapshot.find_candidates(
+            telegram_id, age_min, age_max, after=after_id, limit=limit + 1
+        )
+        async with self.uow:
+            candidates = await self.uow.profiles.find_many(ids[:limit])
+            items = _profiles_adapter.validate_python(candidates, from_attributes=True)
+
+        next_cursor = None
+        if len(ids) > limit:
+            next_cursor = encode_cursor(ids[limit - 1])
+        return Page[UserProfileRead](items=items, next_cursor=next_cursor)
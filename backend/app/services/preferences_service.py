@@ -1,26 +1,39 @@
+from app.core.metrics import timed_methods
+from app.repositories.snapshot import ProfileSnapshot
 from app.repositories.uow import UnitOfWork
 from app.schemas.user_schema import UserPreferencesCreate
 from app.services.exceptions import (
     EntityAlreadyExistsException,
     EntityNotFoundException,
 )
+from app.services.feed_service import FeedService
 
 
+@timed_methods("preferences")
 class UserPreferencesService:
-    def __init__(self, uow: UnitOfWork) -> None:
+    def __init__(
+        self,
+        uow: UnitOfWork,
+        snapshot: ProfileSnapshot | None = None,
+        feeds: FeedService | None = None,
+    ) -> None:
         self.uow = uow
+        self.snapshot = snapshot
+        self.feeds = feeds
 
     async def add_preference(self, telegram_id: int, preference: UserPreferencesCreate):
         async with self.uow:
-            user_exists = await self.uow.profiles.find(telegram_id)
-            if user_exists is None:
+            preference_dict = preference.model_dump()
+            user_exists, new_id = await self.uow.preferences.add_one_for_profile(
+                preference_dict
+            )
+            if not user_exists:
                 raise EntityNotFoundException("User not found.")
-
-            preference_exists = await self.uow.preferences.find(telegram_id)
-            if preference_exists:
+            if new_id is None:
                 raise EntityAlreadyExistsException("Preference already exists.")
 
-            preference_dict = preference.model_dump()
-            new_preference = await self.uow.preferences.add_one(preference_dict)
-
-            return new_preference.telegram_id
+        if self.snapshot is not None:
+            self.snapshot.set_preference(new_id, preference.sex)
+        if self.feeds is not None:
+            await self.feeds.invalidate(new_id)
+        return new_id
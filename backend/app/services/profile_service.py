@@ -1,53 +1,423 @@
+from collections.abc import AsyncIterable, AsyncIterator, Callable
+from contextlib import AbstractAsyncContextManager
+from typing import TYPE_CHECKING, Any
+
+from pydantic import ValidationError
+
+from app.core.cache import CacheBackend
+from app.core.config import settings
+from app.core.metrics import timed_methods
+from app.core.singleflight import SingleFlight
+from app.core.write_log import WriteLog
+from app.repositories.snapshot import ProfileSnapshot
 from app.repositories.uow import UnitOfWork
-from app.schemas.user_schema import UserProfileCreate, UserProfilePatch, UserProfileRead
+from app.schemas.user_schema import (
+    LOCATION_FIELDS,
+    BulkImportResult,
+    BulkImportRowError,
+    ExportFormat,
+    Page,
+    ProfilesBatchGetResult,
+    UserProfileCreate,
+    UserProfilePatch,
+    UserProfileRead,
+    UserProfileRecord,
+)
 from app.services.exceptions import (
     EntityAlreadyExistsException,
     EntityNotFoundException,
+    QueryTooBroadException,
 )
+from app.services.matching_service import MATCHING_FIELDS
+from app.utils.export import serialize_csv, serialize_ndjson
+from app.utils.geo import geohash
+from app.utils.pagination import (
+    clamp_page_size,
+    decode_id_cursor,
+    decode_rank_cursor,
+    encode_cursor,
+)
+from app.utils.serialization import type_adapter
+
+if TYPE_CHECKING:
+    from app.services.feed_service import FeedService
+
+_profiles_adapter = type_adapter(list[UserProfileRead])
+_records_adapter = type_adapter(list[UserProfileRecord])
+
+
+def profile_cache_key(telegram_id: int) -> str:
+    return f"profile:{telegram_id}"
+
+
+def _validation_detail(error: ValidationError) -> str:
+    return "; ".join(
+        ".".join(str(part) for part in item["loc"]) + ": " + item["msg"]
+        if item["loc"]
+        else item["msg"]
+        for item in error.errors()
+    )
+
+
+def _with_geohash(data: dict) -> dict:
+    # Coordinates are validated to come in pairs, the key follows them. Every row
+    # of a multi-row insert needs the key, patches only when they move the user
+    if "latitude" in data:
+        latitude, longitude = data["latitude"], data["longitude"]
+        data["geohash"] = None if latitude is None else geohash(latitude, longitude)
+    return data
 
 
+def _validate_row(row: Any) -> UserProfileRecord:
+    if isinstance(row, bytes):
+        return UserProfileRecord.model_validate_json(row)
+    return UserProfileRecord.model_validate(row)
+
+
+@timed_methods("profiles")
 class UserProfilesService:
-    def __init__(self, uow: UnitOfWork) -> None:
+    def __init__(
+        self,
+        uow: UnitOfWork,
+        snapshot: ProfileSnapshot | None = None,
+        cache: CacheBackend | None = None,
+        single_flight: SingleFlight | None = None,
+        read_uow: UnitOfWork | None = None,
+        feeds: "FeedService | None" = None,
+        fuzzy_search: bool = settings.PROFILE_SEARCH_FUZZY,
+        max_search_matches: int = settings.MAX_SEARCH_MATCHES,
+        shared_read_uow: Callable[[], AbstractAsyncContextManager[UnitOfWork]]
+        | None = None,
+        replica_lag: float = 0.0,
+        write_log: WriteLog | None = None,
+    ) -> None:
         self.uow = uow
+        self.read_uow = read_uow or uow
+        # Opens a unit of work on a session of its own, see `_load_user_once`
+        self.shared_read_uow = shared_read_uow
+        self.snapshot = snapshot
+        self.cache = cache
+        self.single_flight = single_flight
+        self.feeds = feeds
+        self.fuzzy_search = fuzzy_search
+        self.max_search_matches = max_search_matches
+        # Reads within this many seconds of a write may miss it, see `_fill_cache`
+        self.replica_lag = replica_lag
+        # Writes seen by the cache, shared by the services of a process.
+        # Without one, only the writes of this service keep its reads out of the cache
+        if cache is not None and write_log is None:
+            write_log = WriteLog(max_age=max(settings.PROFILE_CACHE_TTL, replica_lag))
+        self.write_log = write_log
+
+    async def _invalidate(self, telegram_id: int) -> None:
+        key = profile_cache_key(telegram_id)
+        if self.cache is not None:
+            self.write_log.record(key)
+            await self.cache.delete(key)
+        if self.single_flight is not None:
+            # Reads started after the write must not join a read from before it
+            self.single_flight.forget(key)
 
     async def add_user(self, user: UserProfileCreate) -> int:
         async with self.uow:
-            user_exists = await self.uow.profiles.find(user.telegram_id)
-            if user_exists:
+            user_dict = _with_geohash(user.model_dump())
+            telegram_id = await self.uow.profiles.add_one_returning(user_dict)
+            if telegram_id is None:
                 raise EntityAlreadyExistsException("User already exists")
 
-            user_dict = user.model_dump()
-            new_user = await self.uow.profiles.add_one(user_dict)
+        if self.snapshot is not None:
+            self.snapshot.add_profile(telegram_id, user.age, user.sex, user.city)
+        await self._invalidate(telegram_id)
+        return telegram_id
+
+    async def import_users(
+        self,
+        rows: AsyncIterable[Any],
+        batch_size: int = settings.BULK_IMPORT_BATCH_SIZE,
+    ) -> BulkImportResult:
+        """
+        Create profiles from a stream of rows, one transaction per batch.
+
+        Rows are decoded objects or raw JSON documents. Invalid rows and rows
+        whose Telegram id already exists are reported by their position and do
+        not prevent the rest of the batch from being created.
+        """
+        result = BulkImportResult()
+        batch = []
+        async for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                await self._import_batch(batch, result)
+                batch = []
+        if batch:
+            await self._import_batch(batch, result)
+        return result
+
+    async def _import_batch(self, batch: list[Any], result: BulkImportResult) -> None:
+        offset = result.received
+        result.received += len(batch)
 
-            return new_user.telegram_id
+        # Validate decoded rows in one call, and only fall back to row by row
+        # validation to find out which rows are invalid. Raw lines are always
+        # validated one by one: joined, a line could complete or split another
+        valid = None
+        if not any(isinstance(row, bytes) for row in batch):
+            try:
+                users = _records_adapter.validate_python(batch)
+                valid = list(enumerate(users, start=offset))
+            except ValidationError:
+                pass
+        if valid is None:
+            valid = []
+            for index, row in enumerate(batch, start=offset):
+                try:
+                    valid.append((index, _validate_row(row)))
+                except ValidationError as e:
+                    result.errors.append(
+                        BulkImportRowError(index=index, detail=_validation_detail(e))
+                    )
+        if not valid:
+            return
 
-    async def find_all_users(self) -> list[UserProfileRead]:
         async with self.uow:
-            users = await self.uow.profiles.find_all()
-            res = [UserProfileRead.model_validate(user[0]) for user in users]
-            return res
+            created = set(
+                await self.uow.profiles.add_many(
+                    [_with_geohash(user.model_dump()) for _, user in valid]
+                )
+            )
+
+        result.created += len(created)
+        for index, user in valid:
+            if user.telegram_id in created:
+                # A Telegram id repeated within the batch is created only once
+                created.discard(user.telegram_id)
+                if self.snapshot is not None:
+                    self.snapshot.add_profile(
+                        user.telegram_id, user.age, user.sex, user.city
+                    )
+                await self._invalidate(user.telegram_id)
+            else:
+                result.conflicts.append(
+                    BulkImportRowError(
+                        index=index,
+                        telegram_id=user.telegram_id,
+                        detail="User already exists",
+                    )
+                )
+
+    async def find_users_page(
+        self, after: str | None = None, limit: int = settings.DEFAULT_PAGE_SIZE
+    ) -> Page[UserProfileRead]:
+        after_id = decode_id_cursor(after)
+        limit = clamp_page_size(limit)
+        async with self.read_uow:
+            # Fetch one extra row to find out whether there is a next page
+            users = await self.read_uow.profiles.find_page(after_id, limit + 1)
+            items = _profiles_adapter.validate_python(
+                users[:limit], from_attributes=True
+            )
+
+        next_cursor = None
+        if len(users) > limit:
+            next_cursor = encode_cursor(items[-1].telegram_id)
+        return Page[UserProfileRead](items=items, next_cursor=next_cursor)
+
+    async def search_users(
+        self,
+        text: str,
+        after: str | None = None,
+        limit: int = settings.DEFAULT_PAGE_SIZE,
+    ) -> Page[UserProfileRead]:
+        """
+        Search profiles by name and about_me, best matches first.
+
+        Every page ranks all the matches of the query, so a query matching more
+        than `max_search_matches` profiles is rejected rather than ranked.
+
+        Args:
+            text (str): Words to search for, in the web search syntax of Postgres:
+                quoted phrases, `or`, and `-` before a word to leave out.
+            after (str | None): Cursor returned as `next_cursor` by the previous page.
+            limit (int): Maximum number of profiles on the page.
+
+        Returns:
+            Page[UserProfileRead]: Page of matching profiles and the cursor of the
+                next page.
+
+        Raises:
+            InvalidCursorException: The cursor is malformed.
+            QueryTooBroadException: The query matches too many profiles.
+        """
+        after_rank = decode_rank_cursor(after)
+        limit = clamp_page_size(limit)
+        async with self.read_uow:
+            matches = await self.read_uow.profiles.count_matches(
+                text, self.max_search_matches + 1, fuzzy=self.fuzzy_search
+            )
+            if matches > self.max_search_matches:
+                raise QueryTooBroadException(
+                    "The query matches too many profiles, add words to narrow it."
+                )
+            found = await self.read_uow.profiles.search(
+                text, after_rank, limit + 1, fuzzy=self.fuzzy_search
+            )
+            items = _profiles_adapter.validate_python(
+                [user for user, _ in found[:limit]], from_attributes=True
+            )
+
+        next_cursor = None
+        if len(found) > limit:
+            _, rank = found[limit - 1]
+            next_cursor = encode_cursor(rank, items[-1].telegram_id)
+        return Page[UserProfileRead](items=items, next_cursor=next_cursor)
+
+    async def export_users(
+        self,
+        export_format: ExportFormat = ExportFormat.ndjson,
+        batch_size: int = settings.EXPORT_BATCH_SIZE,
+    ) -> AsyncIterator[bytes]:
+        async with self.read_uow:
+            header = export_format is ExportFormat.csv
+            async for users in self.read_uow.profiles.stream_all(batch_size):
+                batch = _profiles_adapter.validate_python(users, from_attributes=True)
+                if export_format is ExportFormat.csv:
+                    yield serialize_csv(batch, header=header)
+                    header = False
+                else:
+                    yield serialize_ndjson(batch)
+
+            # An empty table still produces a valid CSV document
+            if header:
+                yield serialize_csv([], header=True)
 
     async def find_user(self, user_id: int) -> UserProfileRead:
-        async with self.uow:
-            user = await self.uow.profiles.find(user_id)
+        if self.cache is not None:
+            cached = await self.cache.get(profile_cache_key(user_id))
+            if cached is not None:
+                return UserProfileRead.model_validate_json(cached)
+        return await self._load_user_once(user_id)
+
+    async def find_user_json(self, user_id: int) -> bytes:
+        """
+        Find a user, encoded as JSON for the response.
+
+        A cached profile is returned as it was cached, without being validated and
+        encoded again.
+        """
+        if self.cache is not None:
+            cached = await self.cache.get(profile_cache_key(user_id))
+            if cached is not None:
+                return cached
+        profile = await self._load_user_once(user_id)
+        return profile.model_dump_json().encode()
+
+    async def _load_user_once(self, user_id: int) -> UserProfileRead:
+        if self.single_flight is None:
+            return await self._load_user(user_id)
+        # Concurrent misses for the same profile share the query of the first one.
+        # It outlives the request of that caller when other callers still wait,
+        # so it must not run on the session of the request
+        key = profile_cache_key(user_id)
+        return await self.single_flight.do(key, lambda: self._load_user_shared(user_id))
+
+    async def _load_user_shared(self, user_id: int) -> UserProfileRead:
+        if self.shared_read_uow is None:
+            return await self._load_user(user_id)
+        async with self.shared_read_uow() as read_uow:
+            return await self._load_user(user_id, read_uow)
+
+    async def _load_user(
+        self, user_id: int, read_uow: UnitOfWork | None = None
+    ) -> UserProfileRead:
+        read_uow = read_uow or self.read_uow
+        mark = self.write_log.mark() if self.write_log is not None else 0
+        async with read_uow:
+            user = await read_uow.profiles.find(user_id)
             if user is None:
                 raise EntityNotFoundException("User not found.")
-            return UserProfileRead.model_validate(user)
+            profile = UserProfileRead.model_validate(user)
+
+        await self._fill_cache(profile, mark)
+        return profile
+
+    async def _fill_cache(self, profile: UserProfileRead, mark: int) -> None:
+        if self.cache is None:
+            return
+        # A write committed during the read has already invalidated the key:
+        # caching what was read before it would bring back the old profile
+        key = profile_cache_key(profile.telegram_id)
+        if self.write_log.written_since(key, mark):
+            return
+        # A lagging replica may still return the profile as it was before a recent
+        # write: caching it would hide the write until the entry expires
+        if self.replica_lag > 0 and self.write_log.written_within(
+            key, self.replica_lag
+        ):
+            return
+        await self.cache.set(key, profile.model_dump_json().encode())
+
+    async def find_users_batch(self, user_ids: list[int]) -> ProfilesBatchGetResult:
+        # Duplicated ids are returned once, at their first position
+        user_ids = list(dict.fromkeys(user_ids))
+        found: dict[int, UserProfileRead] = {}
+
+        if self.cache is not None:
+            for user_id in user_ids:
+                cached = await self.cache.get(profile_cache_key(user_id))
+                if cached is not None:
+                    found[user_id] = UserProfileRead.model_validate_json(cached)
+
+        misses = [user_id for user_id in user_ids if user_id not in found]
+        if misses:
+            mark = self.write_log.mark() if self.write_log is not None else 0
+            async with self.read_uow:
+                users = await self.read_uow.profiles.find_many(misses)
+                loaded = _profiles_adapter.validate_python(users, from_attributes=True)
+
+            for profile in loaded:
+                found[profile.telegram_id] = profile
+                await self._fill_cache(profile, mark)
+
+        return ProfilesBatchGetResult(
+            items=[found[user_id] for user_id in user_ids if user_id in found],
+            missing=[user_id for user_id in user_ids if user_id not in found],
+        )
 
     async def patch_user(self, user_id: int, user_update: UserProfilePatch) -> None:
         async with self.uow:
             user_update_dict = user_update.model_dump(exclude_defaults=True)
-            user = await self.uow.profiles.find(user_id)
-            if user is None:
+            # Only the location can be cleared, by setting it to null
+            user_update_dict |= user_update.model_dump(
+                include=LOCATION_FIELDS, exclude_unset=True
+            )
+            patched_id = await self.uow.profiles.patch_returning(
+                user_id, _with_geohash(dict(user_update_dict))
+            )
+            if patched_id is None:
                 raise EntityNotFoundException("User not found.")
-            await self.uow.profiles.patch(user, user_update_dict)
+
+        if self.snapshot is not None:
+            self.snapshot.patch_profile(
+                user_id,
+                age=user_update_dict.get("age"),
+                sex=user_update_dict.get("sex"),
+                city=user_update_dict.get("city"),
+            )
+        await self._invalidate(user_id)
+        if self.feeds is not None and MATCHING_FIELDS & user_update_dict.keys():
+            await self.feeds.invalidate(user_id)
 
     async def delete_user(self, user_id: int) -> None:
         async with self.uow:
-            user = await self.uow.profiles.find(user_id)
-            if user is None:
+            deleted_id = await self.uow.profiles.delete_returning(user_id)
+            if deleted_id is None:
                 raise EntityNotFoundException("User not found.")
-            await self.uow.profiles.delete(user)
+
+        if self.snapshot is not None:
+            self.snapshot.remove(user_id)
+        await self._invalidate(user_id)
+        if self.feeds is not None:
+            await self.feeds.remove(user_id)
 
     async def delete_all(self) -> None:
         async with self.uow:
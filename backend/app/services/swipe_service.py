@@ -0,0 +1,125 @@
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.metrics import timed_methods
+from app.core.write_behind import WriteBehindBuffer
+from app.repositories.uow import UnitOfWork
+from app.schemas.user_schema import SwipeCreate, SwipeResult
+from app.services.exceptions import (
+    InvalidPayloadException,
+    ServiceOverloadedException,
+)
+
+
+def swipe_key(swipe: dict) -> tuple[int, int]:
+    return swipe["swiper_id"], swipe["swipee_id"]
+
+
+def seen_by_swiper(swipes: list[dict]) -> dict[int, list[int]]:
+    seen = {}
+    for swipe in swipes:
+        seen.setdefault(swipe["swiper_id"], []).append(swipe["swipee_id"])
+    return seen
+
+
+async def add_swipes(uow: UnitOfWork, swipes: list[dict]) -> None:
+    # Swiped users join the seen filters in the same transaction
+    await uow.swipes.add_many(swipes)
+    await uow.seen.add_many(
+        seen_by_swiper(swipes),
+        settings.SEEN_FILTER_CAPACITY,
+        settings.SEEN_FILTER_FP_RATE,
+    )
+
+
+def swipe_writer(
+    session_maker: async_sessionmaker[AsyncSession],
+) -> Callable[[list[dict]], Awaitable[None]]:
+    """
+    Flush function of the swipe buffer: one multi-row INSERT per transaction,
+    plus the update of the swipers' seen filters.
+
+    Args:
+        session_maker (async_sessionmaker[AsyncSession]): Sessions of the primary.
+
+    Returns:
+        Callable[[list[dict]], Awaitable[None]]: Writes a batch of swipes.
+    """
+
+    async def write(swipes: list[dict]) -> None:
+        async with session_maker() as session, UnitOfWork(session) as uow:
+            await add_swipes(uow, swipes)
+
+    return write
+
+
+@timed_methods("swipes")
+class SwipeService:
+    """
+    Record swipes and detect mutual likes.
+
+    A repeated swipe on the same user keeps the first decision, which is the one
+    reported, and a match is only reported when it is a like.
+
+    With a buffer, a swipe is accepted once buffered and written later in a
+    batch. A like of the other side is then either still buffered, where it
+    stays until its batch is committed, or already in the database. Looking in
+    the buffer right after buffering the swipe, then in the database, misses no
+    match made through this process. Buffers of other processes are not visible:
+    with several workers, a like made at the same instant through another one may
+    be reported to neither side, while both swipes are still stored.
+    """
+
+    def __init__(
+        self,
+        uow: UnitOfWork,
+        buffer: WriteBehindBuffer[dict] | None = None,
+        buffer_timeout: float = settings.SWIPE_BUFFER_TIMEOUT,
+    ) -> None:
+        self.uow = uow
+        self.buffer = buffer
+        self.buffer_timeout = buffer_timeout
+
+    async def swipe(self, swiper_id: int, swipe: SwipeCreate) -> SwipeResult:
+        if swipe.swipee_id == swiper_id:
+            raise InvalidPayloadException("Users cannot swipe themselves.")
+
+        row = {
+            "swiper_id": swiper_id,
+            "swipee_id": swipe.swipee_id,
+            "liked": swipe.liked,
+        }
+        if self.buffer is None:
+            async with self.uow:
+                await add_swipes(self.uow, [row])
+                # A repeated swipe was dropped, the first decision is stored
+                liked, liked_back = await self.uow.swipes.find_decisions(
+                    swiper_id, swipe.swipee_id
+                )
+        else:
+            try:
+                await self.buffer.put(row, timeout=self.buffer_timeout)
+            except TimeoutError as e:
+                raise ServiceOverloadedException("Too many swipes, retry later.") from e
+            # No await since the put: neither swipe can be flushed in between. A
+            # repeated swipe was not buffered, the first one is
+            own = self.buffer.get((swiper_id, swipe.swipee_id))
+            pending = self.buffer.get((swipe.swipee_id, swiper_id))
+            async with self.uow:
+                liked, liked_back = await self.uow.swipes.find_decisions(
+                    swiper_id, swipe.swipee_id
+                )
+            # A written swipe wins over a buffered one, whose insert does nothing
+            if liked is None:
+                liked = own["liked"]
+            if liked_back is None and pending is not None:
+                liked_back = pending["liked"]
+
+        return SwipeResult(
+            swiper_id=swiper_id,
+            swipee_id=swipe.swipee_id,
+            liked=liked,
+            match=liked and bool(liked_back),
+        )
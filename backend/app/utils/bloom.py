@@ -0,0 +1,227 @@
+import math
+from collections.abc import Iterable
+from typing import Any
+
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional dependency: pip install backend[snapshot]
+    np = None
+
+# Bit positions are derived from two hashes of the id, (h1 + i * h2) mod size.
+# Each hash mixes the low and high 31 bits of the id modulo a 31-bit prime, so
+# every product fits a signed 64-bit integer: the same positions can be computed
+# in Python, with NumPy and in SQL (see `not_seen`).
+PRIME = 2**31 - 1
+LOW_BITS = 2**31
+HASH_PARAMS = (
+    (1_103_515_245, 1_435_476_341, 12_345),
+    (1_664_525_357, 1_013_904_223, 2_147_001_325),
+)
+
+# Each slice of a `ScalableBloomFilter` holds GROWTH times the items of the
+# previous one, at TIGHTENING times its false-positive rate
+GROWTH = 2
+TIGHTENING = 0.5
+
+
+def optimal_size(capacity: int, fp_rate: float) -> tuple[int, int]:
+    """
+    Size a Bloom filter for `capacity` items at a false-positive rate.
+
+    Args:
+        capacity (int): Expected number of items.
+        fp_rate (float): Wanted false-positive rate once `capacity` items are in.
+
+    Returns:
+        tuple[int, int]: Number of bits, rounded up to whole bytes, and of hashes.
+    """
+    capacity = max(capacity, 1)
+    bits = math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2)
+    bits = max(8, -(-bits // 8) * 8)
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    return bits, hashes
+
+
+def _hash(item: Any, params: tuple[int, int, int]) -> Any:
+    # Works on ints, NumPy arrays and SQL expressions alike
+    low_factor, high_factor, offset = params
+    return (
+        item % LOW_BITS * low_factor % PRIME
+        + item // LOW_BITS * high_factor % PRIME
+        + offset
+    ) % PRIME
+
+
+def hash_pair(item: Any, size: int) -> tuple[Any, Any]:
+    """
+    The two hashes whose combinations give the bit positions of an item.
+
+    The second one is never a multiple of `size`, so the positions differ.
+
+    Args:
+        item (Any): A non-negative id, an int64 NumPy array of them, or a SQL
+            expression of a BIGINT column.
+        size (int): Number of bits of the filter.
+
+    Returns:
+        tuple[Any, Any]: The hashes, of the same kind as `item`.
+    """
+    first = _hash(item, HASH_PARAMS[0])
+    second = _hash(item, HASH_PARAMS[1]) % (size - 1) + 1
+    return first, second
+
+
+class BloomFilter:
+    """
+    Set of ids with no false negatives and a tunable rate of false positives.
+
+    Bits are stored in the order of PostgreSQL's `get_bit`: bit `n` is bit
+    `n % 8`, counted from the least significant, of byte `n // 8`.
+
+    Args:
+        bits (bytes | bytearray): The bit array, its length sets the size.
+        hashes (int): Number of bits set per item.
+        count (int): Number of items added so far.
+    """
+
+    def __init__(self, bits: bytes | bytearray, hashes: int, count: int = 0) -> None:
+        self.bits = bytearray(bits)
+        self.hashes = hashes
+        self.count = count
+
+    @classmethod
+    def for_capacity(cls, capacity: int, fp_rate: float) -> "BloomFilter":
+        size, hashes = optimal_size(capacity, fp_rate)
+        return cls(bytes(size // 8), hashes)
+
+    @property
+    def size(self) -> int:
+        return len(self.bits) * 8
+
+    def positions(self, item: int) -> list[int]:
+        first, second = hash_pair(item, self.size)
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item: int) -> None:
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, items: Iterable[int]) -> None:
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: int) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self.positions(item)
+        )
+
+    def contains_many(self, items: "np.ndarray") -> "np.ndarray":
+        """
+        Vectorized membership test.
+
+        Args:
+            items (np.ndarray): Non-negative int64 ids.
+
+        Returns:
+            np.ndarray: Boolean mask, True where the id may have been added.
+        """
+        bits = np.frombuffer(bytes(self.bits), dtype=np.uint8)
+        first, second = hash_pair(items.astype(np.int64), self.size)
+        mask = np.ones(len(items), dtype=bool)
+        for i in range(self.hashes):
+            position = (first + i * second) % self.size
+            mask &= (bits[position >> 3] >> (position & 7)) & 1 == 1
+        return mask
+
+    def false_positive_rate(self) -> float:
+        """
+        Expected false-positive rate at the current count; it keeps growing once
+        the filter holds more items than it was sized for.
+        """
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+
+class ScalableBloomFilter:
+    """
+    Bloom filter that keeps its false-positive rate below `fp_rate` however many
+    items are added, by adding slices (Almeida et al., "Scalable Bloom Filters").
+
+    Items go to the last slice. Once it holds its capacity, a new slice is added,
+    `GROWTH` times larger and at a `TIGHTENING` times lower rate. The rates of
+    the full slices add up to less than `fp_rate`, and the size stays
+    proportional to the number of items.
+
+    The slices are sized from `capacity` and `fp_rate` when they are added, so a
+    filter read back only needs its slices and the current settings.
+
+    Args:
+        capacity (int): Number of items of the first slice.
+        fp_rate (float): Bound on the false-positive rate.
+        slices (list[BloomFilter] | None): Existing slices, oldest first.
+    """
+
+    def __init__(
+        self, capacity: int, fp_rate: float, slices: list[BloomFilter] | None = None
+    ) -> None:
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.slices = list(slices) if slices else [self._new_slice(0)]
+
+    def _new_slice(self, index: int) -> BloomFilter:
+        return BloomFilter.for_capacity(
+            self.slice_capacity(index),
+            self.fp_rate * (1 - TIGHTENING) * TIGHTENING**index,
+        )
+
+    def slice_capacity(self, index: int) -> int:
+        return self.capacity * GROWTH**index
+
+    @property
+    def count(self) -> int:
+        return sum(bloom.count for bloom in self.slices)
+
+    @property
+    def size(self) -> int:
+        return sum(bloom.size for bloom in self.slices)
+
+    def add(self, item: int) -> None:
+        # An item in the filter already, e.g. swiped after it was shown, would
+        # only fill a slice up
+        if item in self:
+            return
+        if self.slices[-1].count >= self.slice_capacity(len(self.slices) - 1):
+            self.slices.append(self._new_slice(len(self.slices)))
+        self.slices[-1].add(item)
+
+    def update(self, items: Iterable[int]) -> None:
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: int) -> bool:
+        return any(item in bloom for bloom in self.slices)
+
+    def contains_many(self, items: "np.ndarray") -> "np.ndarray":
+        """
+        Vectorized membership test.
+
+        Args:
+            items (np.ndarray): Non-negative int64 ids.
+
+        Returns:
+            np.ndarray: Boolean mask, True where the id may have been added.
+        """
+        mask = np.zeros(len(items), dtype=bool)
+        for bloom in self.slices:
+            mask |= bloom.contains_many(items)
+        return mask
+
+    def false_positive_rate(self) -> float:
+        """
+        Expected false-positive rate at the current count, about `fp_rate` at most.
+        """
+        rate = 1.0
+        for bloom in self.slices:
+            rate *= 1 - bloom.false_positive_rate()
+        return 1 - rate
@@ -0,0 +1,54 @@
+import json
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import Any
+
+from app.services.exceptions import InvalidPayloadException
+
+NDJSON_MEDIA_TYPES = frozenset({"application/x-ndjson", "application/ndjson"})
+
+
+async def iter_json_array(body: bytes) -> AsyncIterator[Any]:
+    """
+    Iterate over the items of a JSON array document.
+
+    Args:
+        body (bytes): Whole request body.
+
+    Returns:
+        AsyncIterator[Any]: Decoded items of the array.
+    """
+    try:
+        rows = json.loads(body)
+    except ValueError:
+        raise InvalidPayloadException("Request body is not valid JSON.") from None
+    if not isinstance(rows, list):
+        raise InvalidPayloadException("Request body must be a JSON array.")
+
+    for row in rows:
+        yield row
+
+
+async def iter_ndjson(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """
+    Split a newline-delimited JSON stream into lines as it arrives.
+
+    Lines are not decoded here: each one is validated as JSON by Pydantic, so a
+    malformed line is reported as an error of that row only.
+
+    Args:
+        chunks (AsyncIterable[bytes]): Body chunks, e.g. `Request.stream()`.
+
+    Returns:
+        AsyncIterator[bytes]: Non-blank lines of the stream.
+    """
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            line = line.strip()
+            if line:
+                yield line
+    pending = pending.strip()
+    if pending:
+        yield pending
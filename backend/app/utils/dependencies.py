@@ -1,5 +1,8 @@
 from fastapi import Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from app.core.config import settings
+from app.core.sharding import ShardRouter
 from app.services.factories import ServiceFactory
 
 
@@ -9,5 +12,50 @@ async def get_session(request: Request):
         yield session
 
 
-async def get_service_factory(session=Depends(get_session)) -> ServiceFactory:
-    return ServiceFactory(session)
+def _read_session_maker(request: Request) -> async_sessionmaker[AsyncSession]:
+    # Without a dedicated read session maker, reads share the primary one
+    state = request.app.state
+    return getattr(state, "async_read_session_maker", state.async_session_maker)
+
+
+async def get_read_session(request: Request):
+    async with _read_session_maker(request)() as session:
+        yield session
+
+
+async def get_session_maker(request: Request) -> async_sessionmaker[AsyncSession]:
+    return request.app.state.async_session_maker
+
+
+async def get_read_session_maker(
+    request: Request,
+) -> async_sessionmaker[AsyncSession]:
+    return _read_session_maker(request)
+
+
+async def get_shard_router(request: Request) -> ShardRouter | None:
+    return getattr(request.app.state, "shard_router", None)
+
+
+async def get_service_factory(
+    request: Request,
+    session=Depends(get_session),
+    read_session=Depends(get_read_session),
+) -> ServiceFactory:
+    state = request.app.state
+    return ServiceFactory(
+        session,
+        read_session=read_session,
+        snapshot=getattr(state, "profile_snapshot", None),
+        profile_cache=getattr(state, "profile_cache", None),
+        profile_write_log=getattr(state, "profile_write_log", None),
+        single_flight=getattr(state, "single_flight", None),
+        shard_router=getattr(state, "shard_router", None),
+        swipe_buffer=getattr(state, "swipe_buffer", None),
+        feed_cache=getattr(state, "feed_cache", None),
+        feed_refiller=getattr(state, "feed_refiller", None),
+        read_session_maker=_read_session_maker(request),
+        replica_lag=settings.REPLICA_MAX_LAG
+        if getattr(state, "replica_engine", None) is not None
+        else 0.0,
+    )
@@ -0,0 +1,47 @@
+import csv
+import io
+from collections.abc import Iterable
+
+from app.schemas.user_schema import ExportFormat, UserProfileRead
+
+# Column order of the CSV export
+CSV_FIELDS = ("telegram_id", "name", "about_me", "age", "city", "sex")
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
+def serialize_ndjson(users: Iterable[UserProfileRead]) -> bytes:
+    """
+    Serialize a batch of profiles as newline-delimited JSON.
+
+    Args:
+        users (Iterable[UserProfileRead]): Profiles to serialize.
+
+    Returns:
+        bytes: One JSON document per line.
+    """
+    return "".join(user.model_dump_json() + "\n" for user in users).encode()
+
+
+def serialize_csv(users: Iterable[UserProfileRead], header: bool = False) -> bytes:
+    """
+    Serialize a batch of profiles as CSV rows.
+
+    Args:
+        users (Iterable[UserProfileRead]): Profiles to serialize.
+        header (bool): Whether to prepend the header row.
+
+    Returns:
+        bytes: UTF-8 encoded CSV rows.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(CSV_FIELDS)
+    for user in users:
+        row = user.model_dump(mode="json", include=set(CSV_FIELDS))
+        writer.writerow([row[field] for field in CSV_FIELDS])
+    return buffer.getvalue().encode()
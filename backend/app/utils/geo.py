@@ -0,0 +1,145 @@
+import math
+from types import ModuleType
+from typing import Any, NamedTuple
+
+EARTH_RADIUS_KM = 6371.0088  # Mean radius
+
+# Geohash keys interleave the bits of the longitude and latitude cells, longitude
+# first, like the characters of a base32 geohash: a key of 2 * GEOHASH_BITS bits
+# and its top 5 * n bits encode the same cell as an n-character geohash. Keys
+# that share a prefix form a contiguous range, one per cell of a coarser grid.
+GEOHASH_BITS = 26  # Per axis, cells of about 60 cm
+COVER_SPLITS = 4  # Covering cells per side of the bounding box of a search, at least
+
+
+class Circle(NamedTuple):
+    latitude: float
+    longitude: float
+    radius_km: float
+
+
+def _spread(x: Any) -> Any:
+    # Moves bit i of a 32-bit value to bit 2i. Works on ints and NumPy arrays
+    x = (x | (x << 16)) & 0x0000FFFF0000FFFF
+    x = (x | (x << 8)) & 0x00FF00FF00FF00FF
+    x = (x | (x << 4)) & 0x0F0F0F0F0F0F0F0F
+    x = (x | (x << 2)) & 0x3333333333333333
+    return (x | (x << 1)) & 0x5555555555555555
+
+
+def _cell_index(value: float, low: float, span: float, bits: int) -> int:
+    return min(int((value - low) / span * (1 << bits)), (1 << bits) - 1)
+
+
+def geohash(latitude: Any, longitude: Any) -> Any:
+    """
+    Geohash key of a point.
+
+    Args:
+        latitude (Any): Degrees in [-90, 90], a float or a NumPy array.
+        longitude (Any): Degrees in [-180, 180], a float or a NumPy array.
+
+    Returns:
+        Any: Key of 2 * `GEOHASH_BITS` bits, an int or an int64 NumPy array.
+    """
+    cells = 1 << GEOHASH_BITS
+    if isinstance(latitude, float | int):
+        lat = _cell_index(latitude, -90.0, 180.0, GEOHASH_BITS)
+        lon = _cell_index(longitude, -180.0, 360.0, GEOHASH_BITS)
+    else:
+        lat = ((latitude + 90.0) / 180.0 * cells).astype("int64").clip(0, cells - 1)
+        lon = ((longitude + 180.0) / 360.0 * cells).astype("int64").clip(0, cells - 1)
+    return (_spread(lon) << 1) | _spread(lat)
+
+
+def haversine_km(
+    lat1: Any, lon1: Any, lat2: Any, lon2: Any, lib: ModuleType | Any = math
+) -> Any:
+    """
+    Great-circle distance between points, in kilometers.
+
+    Args:
+        lat1 (Any): Latitude of the first point, in degrees.
+        lon1 (Any): Longitude of the first point, in degrees.
+        lat2 (Any): Latitude of the second point, in degrees.
+        lon2 (Any): Longitude of the second point, in degrees.
+        lib (ModuleType | Any): Provides `radians`, `sin`, `cos`, `asin` and
+            `sqrt`: `math`, `numpy`, or `sqlalchemy.func` for a SQL expression.
+
+    Returns:
+        Any: The distance, of the same kind as the arguments.
+    """
+    lat1, lon1, lat2, lon2 = (lib.radians(x) for x in (lat1, lon1, lat2, lon2))
+    a = lib.sin((lat2 - lat1) / 2) * lib.sin((lat2 - lat1) / 2) + lib.cos(
+        lat1
+    ) * lib.cos(lat2) * lib.sin((lon2 - lon1) / 2) * lib.sin((lon2 - lon1) / 2)
+    return 2 * EARTH_RADIUS_KM * lib.asin(lib.sqrt(a))
+
+
+def covering_ranges(
+    circle: Circle, splits: int = COVER_SPLITS
+) -> list[tuple[int, int]]:
+    """
+    Ranges of geohash keys that hold every point of a circle.
+
+    The cells are those of the finest grid whose cells are at least as large as
+    the bounding box of the circle divided by `splits`, so at most
+    (splits + 1) x (splits + 1) of them cover it.
+
+    Args:
+        circle (Circle): Center and radius of the search.
+        splits (int): More, smaller cells cover less area outside the circle.
+
+    Returns:
+        list[tuple[int, int]]: Sorted, disjoint ranges, lower bound included and
+            upper bound excluded.
+    """
+    angle = min(circle.radius_km / EARTH_RADIUS_KM, math.pi)
+    dlat = math.degrees(angle)
+    lat_low = max(circle.latitude - dlat, -90.0)
+    lat_high = min(circle.latitude + dlat, 90.0)
+    # Longitude extent of the circle, whole when it reaches a pole
+    cos_lat = math.cos(math.radians(circle.latitude))
+    if lat_low <= -90.0 or lat_high >= 90.0 or math.sin(angle) >= cos_lat:
+        dlon = 180.0
+    else:
+        dlon = math.degrees(math.asin(math.sin(angle) / cos_lat))
+
+    bits = min(
+        GEOHASH_BITS,
+        max(0, math.floor(math.log2(180.0 * splits / (2 * dlat))))
+        if dlat
+        else GEOHASH_BITS,
+        max(0, math.floor(math.log2(360.0 * splits / (2 * dlon))))
+        if dlon
+        else GEOHASH_BITS,
+    )
+
+    lat_cells = range(
+        _cell_index(lat_low, -90.0, 180.0, bits),
+        _cell_index(lat_high, -90.0, 180.0, bits) + 1,
+    )
+    if dlon >= 180.0:
+        lon_cells = set(range(1 << bits))
+    else:
+        # The box may cross the antimeridian, where longitudes wrap around
+        lon_low = (circle.longitude - dlon + 180.0) % 360.0 - 180.0
+        lon_high = (circle.longitude + dlon + 180.0) % 360.0 - 180.0
+        low = _cell_index(lon_low, -180.0, 360.0, bits)
+        high = _cell_index(lon_high, -180.0, 360.0, bits)
+        if low <= high:
+            lon_cells = set(range(low, high + 1))
+        else:
+            lon_cells = set(range(low, 1 << bits)) | set(range(high + 1))
+
+    shift = 2 * (GEOHASH_BITS - bits)
+    cells = sorted(
+        (_spread(lon) << 1) | _spread(lat) for lon in lon_cells for lat in lat_cells
+    )
+    ranges: list[tuple[int, int]] = []
+    for cell in cells:
+        if ranges and ranges[-1][1] == cell << shift:
+            ranges[-1] = (ranges[-1][0], (cell + 1) << shift)
+        else:
+            ranges.append((cell << shift, (cell + 1) << shift))
+    return ranges
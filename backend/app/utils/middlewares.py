@@ -1,14 +1,226 @@
+import time
+import uuid
+from collections.abc import Mapping
+
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import REQUEST_LATENCY
+
+# Pure ASGI middlewares: unlike BaseHTTPMiddleware they do not run the endpoint in
+# a separate task or buffer the response through a memory stream, so streaming
+# responses pass straight through.
+
+
+class ErrorHandlingMiddleware:
+    """
+    Turn an unhandled exception into a 500 JSON response.
+
+    If the response has already started the exception is re-raised, since the
+    status line cannot be changed any more.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
 
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
 
-class ErrorHandlingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
         try:
-            response = await call_next(request)
-            return response
+            await self.app(scope, receive, send_wrapper)
         except Exception:
-            return JSONResponse(
+            if response_started:
+                raise
+            response = JSONResponse(
                 status_code=500,
                 content={"error": "Internal Server Error"},
             )
+            await response(scope, receive, send)
+
+
+class RequestIdMiddleware:
+    """
+    Attach a request id to `request.state.request_id` and to the response headers.
+
+    A well-formed id sent by the client is reused, so a request can be traced
+    across services; otherwise a new one is generated.
+    """
+
+    header_name = "x-request-id"
+    max_length = 128
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get(self.header_name, "")
+        if not (0 < len(request_id) <= self.max_length and request_id.isprintable()):
+            request_id = uuid.uuid4().hex
+        scope.setdefault("state", {})["request_id"] = request_id
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append(self.header_name, request_id)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class TimingMiddleware:
+    """
+    Report the time spent before the response started in a `Server-Timing` header.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                duration_ms = (time.perf_counter() - start) * 1000
+                MutableHeaders(scope=message).append(
+                    "server-timing", f"app;dur={duration_ms:.2f}"
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class MetricsMiddleware:
+    """
+    Record the latency of every request, by method, route template and status.
+
+    The route is the path template of the matched route, e.g.
+    `/users/{telegram_id}/profiles`, so ids do not end up in the labels. The time
+    runs until the response body is fully sent, which also covers streaming.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route in the shared scope
+            route = scope.get("route")
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status_code),
+            )
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class BodySizeLimitMiddleware:
+    """
+    Reject request bodies larger than a limit with a 413 response.
+
+    The declared Content-Length is checked up front, and the bytes actually
+    received are counted as well, for chunked bodies.
+
+    Args:
+        app (ASGIApp): Application to wrap.
+        max_body_size (int): Default limit, in bytes.
+        path_limits (Mapping[str, int] | None): Limits of specific paths, e.g. bulk uploads.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_body_size: int,
+        path_limits: Mapping[str, int] | None = None,
+    ) -> None:
+        self.app = app
+        self.max_body_size = max_body_size
+        self.path_limits = dict(path_limits or {})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.path_limits.get(scope["path"], self.max_body_size)
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length is not None and content_length.isdigit():
+            if int(content_length) > limit:
+                await self._reject(scope, receive, send, limit)
+                return
+
+        received = 0
+        response_started = False
+        rejected = False
+
+        async def receive_wrapper() -> Message:
+            nonlocal received, rejected
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    if not response_started and not rejected:
+                        await self._reject(scope, receive, send, limit)
+                        rejected = True
+                    # Abort the endpoint: FastAPI may turn this into its own error
+                    # response, which `send_wrapper` then drops
+                    raise _BodyTooLarge
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if rejected:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        except _BodyTooLarge:
+            if not rejected:
+                raise
+
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send, limit: int) -> None:
+        response = JSONResponse(
+            status_code=413,
+            content={"detail": f"Request body exceeds {limit} bytes."},
+        )
+        await response(scope, receive, send)
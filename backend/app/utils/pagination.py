@@ -0,0 +1,102 @@
+import base64
+import binascii
+import json
+
+from app.core.config import settings
+from app.services.exceptions import InvalidCursorException
+
+
+def encode_cursor(*values: int | float | str) -> str:
+    """
+    Encode the keyset position of the last returned row into an opaque cursor.
+
+    Args:
+        *values: Values of the sort key of the last row on the page.
+
+    Returns:
+        str: URL-safe cursor string.
+    """
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, size: int = 1) -> list[int | float | str]:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): Cursor received from the client.
+        size (int): Expected number of values in the cursor.
+
+    Raises:
+        InvalidCursorException: If the cursor is malformed.
+
+    Returns:
+        list: Values of the sort key the next page starts after.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursorException("Invalid pagination cursor.") from None
+
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursorException("Invalid pagination cursor.")
+    return values
+
+
+def decode_id_cursor(cursor: str | None) -> int | None:
+    """
+    Decode a cursor of a page ordered by Telegram id.
+
+    Args:
+        cursor (str | None): Cursor received from the client.
+
+    Raises:
+        InvalidCursorException: If the cursor is malformed.
+
+    Returns:
+        int | None: Telegram id the next page starts after.
+    """
+    if cursor is None:
+        return None
+
+    (telegram_id,) = decode_cursor(cursor)
+    if type(telegram_id) is not int:
+        raise InvalidCursorException("Invalid pagination cursor.")
+    return telegram_id
+
+
+def decode_rank_cursor(cursor: str | None) -> tuple[float, int] | None:
+    """
+    Decode a cursor of a page ordered by rank, then by Telegram id.
+
+    Args:
+        cursor (str | None): Cursor received from the client.
+
+    Raises:
+        InvalidCursorException: If the cursor is malformed.
+
+    Returns:
+        tuple[float, int] | None: Rank and Telegram id the next page starts after.
+    """
+    if cursor is None:
+        return None
+
+    rank, telegram_id = decode_cursor(cursor, size=2)
+    if type(rank) not in (int, float) or type(telegram_id) is not int:
+        raise InvalidCursorException("Invalid pagination cursor.")
+    return float(rank), telegram_id
+
+
+def clamp_page_size(limit: int) -> int:
+    """
+    Clamp the requested page size to the configured hard cap.
+
+    Args:
+        limit (int): Requested page size.
+
+    Returns:
+        int: Page size between 1 and `settings.MAX_PAGE_SIZE`.
+    """
+    return max(1, min(limit, settings.MAX_PAGE_SIZE))
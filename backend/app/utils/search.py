@@ -0,0 +1,26 @@
+import re
+
+# An optional `-`, then a quoted phrase (maybe unterminated) or a bare word
+_TOKEN = re.compile(r'(-?)("[^"]*"?|[^\s"]+)')
+
+
+def plain_terms(text: str) -> str:
+    """
+    Words of a web search query, without its syntax.
+
+    Quotes and `or` are dropped, and so are the words and phrases excluded with `-`,
+    since a profile should not be found by a word the user left out.
+
+    Args:
+        text (str): Query in the syntax of `websearch_to_tsquery`.
+
+    Returns:
+        str: The remaining words separated by spaces, empty when there is none.
+    """
+    words = []
+    for match in _TOKEN.finditer(text):
+        excluded, token = match.groups()
+        if excluded or token.lower() == "or":
+            continue
+        words.extend(token.strip('"').split())
+    return " ".join(words)
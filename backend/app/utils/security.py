@@ -1,16 +1,39 @@
+import hashlib
+import json
+import time
+
 import jwt
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
+from app.core.cache import CacheBackend
 from app.core.config import settings
+from app.core.metrics import AUTH_LATENCY
 
 security = HTTPBearer()
 
+# Cached value of an accepted token, a rejection is cached as [status, detail]
+_ACCEPTED = b""
 
-async def verify_jwt_token(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-):
-    token = credentials.credentials
+
+def token_cache_key(token: str) -> str:
+    # Only the digest is kept, so the cache never holds a usable token
+    return "jwt:" + hashlib.sha256(token.encode()).hexdigest()
+
+
+def decode_token(token: str) -> dict:
+    """
+    Verify the signature, expiry and bot id of a token.
+
+    Args:
+        token (str): Encoded JWT.
+
+    Returns:
+        dict: Payload of the token.
+
+    Raises:
+        HTTPException: 401 if the token expired, 403 if it is invalid.
+    """
     try:
         payload = jwt.decode(token, settings.SECRET_API_KEY, algorithms=["HS256"])
         if payload.get("bot_id") != "telegram-bot":
@@ -19,3 +42,44 @@ async def verify_jwt_token(
         raise HTTPException(status_code=401, detail="Token expired") from None
     except jwt.PyJWTError:
         raise HTTPException(status_code=403, detail="Invalid token") from None
+    return payload
+
+
+async def verify_jwt_token(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+):
+    with AUTH_LATENCY.time():
+        await _verify_token(request, credentials.credentials)
+
+
+async def _verify_token(request: Request, token: str) -> None:
+    token_cache: CacheBackend | None = getattr(request.app.state, "token_cache", None)
+    if token_cache is None:
+        decode_token(token)
+        return
+
+    key = token_cache_key(token)
+    cached = await token_cache.get(key)
+    if cached == _ACCEPTED:
+        return
+    if cached is not None:
+        status_code, detail = json.loads(cached)
+        raise HTTPException(status_code=status_code, detail=detail)
+
+    try:
+        payload = decode_token(token)
+    except HTTPException as e:
+        # Cache rejections briefly, so a client retrying a bad token stays cheap
+        await token_cache.set(
+            key,
+            json.dumps([e.status_code, e.detail]).encode(),
+            ttl=settings.JWT_REJECTION_CACHE_TTL,
+        )
+        raise
+
+    # An accepted token must not outlive its own expiry
+    ttl = settings.JWT_CACHE_MAX_TTL
+    if "exp" in payload:
+        ttl = min(ttl, payload["exp"] - time.time())
+    await token_cache.set(key, _ACCEPTED, ttl=ttl)
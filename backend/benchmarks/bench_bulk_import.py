@@ -0,0 +1,127 @@
+"""
+Compare the throughput of the bulk profile import with one request per profile.
+
+Usage (from the backend directory, against a throwaway database):
+
+    python -m benchmarks.bench_bulk_import --rows 100000 --per-request-rows 5000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import jwt
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.core.config import settings
+from app.main import app
+from benchmarks.common import report
+from benchmarks.seed import CITIES, seed_profiles
+
+
+def make_profiles(count: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "telegram_id": telegram_id,
+            "name": f"Юзер {telegram_id}",
+            "about_me": "Какие-нибудь данные",
+            "age": rng.randint(18, 60),
+            "city": rng.choice(CITIES),
+            "sex": rng.choice(["Мужской", "Женский", "Не указан"]),
+        }
+        for telegram_id in range(1, count + 1)
+    ]
+
+
+async def truncate_profiles(engine: AsyncEngine) -> None:
+    # Truncate rather than recreate the tables: the prepared statements cached on
+    # the connections of the application stay valid between runs
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql("TRUNCATE user_profiles CASCADE")
+
+
+async def per_request(client: AsyncClient, profiles: list[dict]) -> None:
+    for profile in profiles:
+        telegram_id = profile["telegram_id"]
+        body = {key: value for key, value in profile.items() if key != "telegram_id"}
+        response = await client.post(f"/users/{telegram_id}/profiles", json=body)
+        response.raise_for_status()
+
+
+async def bulk_json(client: AsyncClient, profiles: list[dict]) -> None:
+    response = await client.post("/users/profiles:bulk", json=profiles)
+    response.raise_for_status()
+    assert response.json()["created"] == len(profiles)
+
+
+async def bulk_ndjson(client: AsyncClient, profiles: list[dict]) -> None:
+    body = "".join(
+        json.dumps(profile, ensure_ascii=False) + "\n" for profile in profiles
+    )
+    response = await client.post(
+        "/users/profiles:bulk",
+        content=body.encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    response.raise_for_status()
+    assert response.json()["created"] == len(profiles)
+
+
+async def run(rows: int, per_request_rows: int) -> None:
+    token = jwt.encode(
+        {"bot_id": "telegram-bot", "exp": time.time() + 3600},
+        settings.SECRET_API_KEY,
+        algorithm="HS256",
+    )
+    profiles = make_profiles(rows)
+    engine = create_async_engine(settings.DATABASE_URL, echo=False)
+    await seed_profiles(engine, 0)
+
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://test",
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=None,
+        ) as client:
+            for name, func, count in (
+                ("per_request", per_request, per_request_rows),
+                ("bulk_json", bulk_json, rows),
+                ("bulk_ndjson", bulk_ndjson, rows),
+            ):
+                await truncate_profiles(engine)
+                start = time.perf_counter()
+                await func(client, profiles[:count])
+                seconds = time.perf_counter() - start
+                report(
+                    "bulk_import",
+                    path=name,
+                    rows=count,
+                    batch_size=settings.BULK_IMPORT_BATCH_SIZE,
+                    seconds=seconds,
+                    rows_per_second=count / seconds,
+                )
+
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument(
+        "--per-request-rows",
+        type=int,
+        default=5_000,
+        help="Profiles created one request at a time (the slow path)",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(run(args.rows, args.per_request_rows))
+
+
+if __name__ == "__main__":
+    main()
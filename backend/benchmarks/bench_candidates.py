@@ -0,0 +1,98 @@
+"""
+Compare candidate matching through SQL with the in-memory profile snapshot.
+
+Usage (from the backend directory, against a throwaway database):
+
+    python -m benchmarks.bench_candidates --sizes 100000 1000000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.repositories.snapshot import ProfileSnapshot
+from app.services.factories import ServiceFactory
+from benchmarks.common import measure, report, summarize
+from benchmarks.seed import seed_profiles
+
+
+async def run(size: int, queries: int, limit: int) -> None:
+    engine = create_async_engine(settings.DATABASE_URL, echo=False)
+    session_maker = async_sessionmaker(engine)
+    await seed_profiles(engine, size)
+
+    start = time.perf_counter()
+    snapshot = await ProfileSnapshot.load(session_maker)
+    load_seconds = time.perf_counter() - start
+    snapshot_bytes = sum(
+        array.nbytes
+        for array in (
+            snapshot.ids,
+            snapshot.ages,
+            snapshot.sexes,
+            snapshot.cities,
+            snapshot.preferences,
+        )
+    )
+    report(
+        "snapshot_load",
+        profiles=size,
+        seconds=load_seconds,
+        array_bytes=snapshot_bytes,
+    )
+
+    users = random.Random(1).sample(range(1, size + 1), queries)
+
+    def candidates(use_snapshot: bool):
+        users_iter = iter(users)
+
+        async def query() -> None:
+            async with session_maker() as session:
+                factory = ServiceFactory(
+                    session, snapshot=snapshot if use_snapshot else None
+                )
+                service = factory.get_matching_services()
+                await service.find_candidates(next(users_iter), limit=limit)
+
+        return query
+
+    def snapshot_filter():
+        users_iter = iter(users)
+
+        async def query() -> None:
+            telegram_id = next(users_iter)
+            age = snapshot.get_age(telegram_id)
+            snapshot.find_candidates(
+                telegram_id, age - 5, age + 5, after=None, limit=limit + 1
+            )
+
+        return query
+
+    for name, func in (
+        ("sql", candidates(use_snapshot=False)),
+        ("snapshot", candidates(use_snapshot=True)),
+        ("snapshot_filter_only", snapshot_filter()),
+    ):
+        samples = await measure(func, queries)
+        report("candidates", path=name, profiles=size, **summarize(samples))
+
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=settings.DEFAULT_PAGE_SIZE)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        asyncio.run(run(size, args.queries, args.limit))
+
+
+if __name__ == "__main__":
+    main()
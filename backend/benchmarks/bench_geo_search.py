@@ -0,0 +1,128 @@
+"""
+Compare proximity search through the geohash index with a naive distance scan.
+
+Usage (from the backend directory, against a throwaway database):
+
+    python -m benchmarks.bench_geo_search --profiles 1000000 --radii 5 25 100
+"""
+
+import argparse
+import asyncio
+import random
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.models.user_model import SexEnumDB, UserPreferenceOrm, UserProfileOrm
+from app.repositories.profile_repository import UserProfileRepository
+from app.utils.geo import Circle, covering_ranges, haversine_km
+from benchmarks.common import measure, report, summarize
+from benchmarks.seed import seed_profiles
+
+
+async def naive_scan(
+    session: AsyncSession, user: UserProfileOrm, circle: Circle, limit: int
+) -> list[UserProfileOrm]:
+    # `find_candidates` with the distance as the only location filter
+    distance = haversine_km(
+        circle.latitude,
+        circle.longitude,
+        UserProfileOrm.latitude,
+        UserProfileOrm.longitude,
+        lib=func,
+    )
+    stmt = (
+        select(UserProfileOrm)
+        .outerjoin(UserPreferenceOrm)
+        .where(
+            UserProfileOrm.sex.in_(list(SexEnumDB)),
+            UserProfileOrm.age.between(user.age - 5, user.age + 5),
+            UserProfileOrm.telegram_id != user.telegram_id,
+            or_(
+                UserPreferenceOrm.sex.is_(None),
+                UserPreferenceOrm.sex.in_([SexEnumDB.unspecified, user.sex]),
+            ),
+            distance <= circle.radius_km,
+        )
+        .order_by(UserProfileOrm.telegram_id)
+        .limit(limit)
+    )
+    res = await session.execute(stmt)
+    return list(res.scalars())
+
+
+async def run(profiles: int, radii: list[float], queries: int, limit: int) -> None:
+    engine = create_async_engine(settings.DATABASE_URL, echo=False)
+    session_maker = async_sessionmaker(engine)
+    await seed_profiles(engine, profiles, locations=True)
+
+    async with session_maker() as session:
+        sample = random.Random(1).sample(range(1, profiles + 1), queries)
+        res = await session.execute(
+            select(UserProfileOrm).where(UserProfileOrm.telegram_id.in_(sample))
+        )
+        users = list(res.scalars())
+
+    for radius_km in radii:
+        found = {"geohash": 0, "naive_scan": 0}
+
+        def search(path: str, radius_km: float, found: dict[str, int]):
+            users_iter = iter(users)
+
+            async def query() -> None:
+                user = next(users_iter)
+                circle = Circle(user.latitude, user.longitude, radius_km)
+                async with session_maker() as session:
+                    if path == "naive_scan":
+                        candidates = await naive_scan(session, user, circle, limit)
+                    else:
+                        candidates = await UserProfileRepository(
+                            session
+                        ).find_candidates(
+                            id=user.telegram_id,
+                            city=None,
+                            sexes=list(SexEnumDB),
+                            accepted_by=[SexEnumDB.unspecified, user.sex],
+                            age_min=user.age - 5,
+                            age_max=user.age + 5,
+                            after=None,
+                            limit=limit,
+                            near=circle,
+                        )
+                found[path] += len(candidates)
+
+            return query
+
+        cells = sum(
+            len(covering_ranges(Circle(user.latitude, user.longitude, radius_km)))
+            for user in users
+        )
+        for path in ("geohash", "naive_scan"):
+            samples = await measure(search(path, radius_km, found), len(users))
+            report(
+                "geo_search",
+                path=path,
+                profiles=profiles,
+                radius_km=radius_km,
+                mean_candidates=found[path] / len(users),
+                mean_key_ranges=cells / len(users),
+                **summarize(samples),
+            )
+
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--profiles", type=int, default=1_000_000)
+    parser.add_argument("--radii", type=float, nargs="+", default=[5, 25, 100])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=settings.DEFAULT_PAGE_SIZE)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.profiles, args.radii, args.queries, args.limit))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Micro-benchmark the repository round-trips and the model conversions of the hot paths.
+
+Usage (from the backend directory, against a throwaway database):
+
+    python -m benchmarks.bench_internals --profiles 10000 --repeat 2000
+
+Every case prints one JSON line with its latency percentiles and, from a second
+pass under tracemalloc, the peak and retained memory per call.
+"""
+
+import argparse
+import asyncio
+import random
+from collections.abc import Awaitable, Callable
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import create_engine
+from app.repositories.profile_repository import UserProfileRepository
+from app.schemas.user_schema import UserProfileCreate, UserProfileRead
+from benchmarks.common import measure, measure_allocations, report, summarize
+from benchmarks.seed import seed_profiles
+
+
+async def run(profiles: int, repeat: int, page_size: int) -> None:
+    engine = create_engine(settings.DATABASE_URL)
+    await seed_profiles(engine, profiles)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    rng = random.Random(0)
+
+    def random_id() -> int:
+        return rng.randint(1, profiles)
+
+    async def repo_find() -> None:
+        async with session_maker() as session:
+            await UserProfileRepository(session).find(random_id())
+
+    async def repo_find_page() -> None:
+        async with session_maker() as session:
+            after = rng.randint(0, max(profiles - page_size, 0))
+            await UserProfileRepository(session).find_page(after, page_size)
+
+    async def repo_find_all() -> None:
+        async with session_maker() as session:
+            await UserProfileRepository(session).find_all()
+
+    async def repo_patch() -> None:
+        # Load the ORM object, then flush the change, as `patch` expects
+        async with session_maker() as session, session.begin():
+            repo = UserProfileRepository(session)
+            user = await repo.find(random_id())
+            await repo.patch(user, {"age": rng.randint(18, 60)})
+
+    async def repo_patch_returning() -> None:
+        async with session_maker() as session, session.begin():
+            await UserProfileRepository(session).patch_returning(
+                random_id(), {"age": rng.randint(18, 60)}
+            )
+
+    # Detached ORM objects of one page, as the services convert them
+    async with session_maker() as session:
+        page = list(await UserProfileRepository(session).find_page(None, page_size))
+    reads = [UserProfileRead.model_validate(user) for user in page]
+    create = UserProfileCreate(**reads[0].model_dump(exclude={"telegram_id"}))
+
+    async def orm_to_read() -> None:
+        [UserProfileRead.model_validate(user) for user in page]
+
+    async def rebuild_for_create() -> None:
+        # As in `create_user_profile`
+        UserProfileRead(telegram_id=1, **create.model_dump())
+
+    response_field = create_model_field(
+        "Response", list[UserProfileRead], mode="serialization"
+    )
+
+    async def serialize_page() -> None:
+        # What FastAPI does with the return value of a route with a response model
+        content = await serialize_response(field=response_field, response_content=reads)
+        JSONResponse(content)
+
+    cases: dict[str, Callable[[], Awaitable]] = {
+        "repo_find": repo_find,
+        "repo_find_page": repo_find_page,
+        "repo_find_all": repo_find_all,
+        "repo_patch": repo_patch,
+        "repo_patch_returning": repo_patch_returning,
+        "orm_to_read": orm_to_read,
+        "rebuild_for_create": rebuild_for_create,
+        "serialize_page": serialize_page,
+    }
+    for name, func in cases.items():
+        # find_all loads the whole table, fewer calls are enough
+        calls = max(repeat // 100, 5) if name == "repo_find_all" else repeat
+        await measure(func, min(calls, 100))
+        samples = await measure(func, calls)
+        allocations = await measure_allocations(func, min(calls, 200))
+        report(
+            "internals",
+            case=name,
+            profiles=profiles,
+            page_size=page_size,
+            **summarize(samples),
+            **allocations,
+        )
+
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--profiles", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=2_000)
+    parser.add_argument("--page-size", type=int, default=settings.DEFAULT_PAGE_SIZE)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.profiles, args.repeat, args.page_size))
+
+
+if __name__ == "__main__":
+    main()
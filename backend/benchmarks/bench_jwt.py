@@ -0,0 +1,81 @@
+"""
+Measure the authentication overhead per request with and without the token cache.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.bench_jwt --calls 20000
+"""
+
+import argparse
+import asyncio
+import time
+from functools import partial
+from types import SimpleNamespace
+
+import jwt
+from fastapi.security import HTTPAuthorizationCredentials
+from httpx import ASGITransport, AsyncClient
+
+from app.core.cache import InMemoryCache
+from app.core.config import settings
+from app.main import app
+from app.utils.security import verify_jwt_token
+from benchmarks.common import measure, report, summarize
+
+
+def make_token_cache() -> InMemoryCache:
+    return InMemoryCache(
+        max_size=settings.JWT_CACHE_SIZE, ttl=settings.JWT_CACHE_MAX_TTL
+    )
+
+
+async def run(calls: int, requests: int) -> None:
+    token = jwt.encode(
+        {"bot_id": "telegram-bot", "exp": time.time() + 3600},
+        settings.SECRET_API_KEY,
+        algorithm="HS256",
+    )
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    # The dependency alone
+    for name, token_cache in (("uncached", None), ("cached", make_token_cache())):
+        request = SimpleNamespace(
+            app=SimpleNamespace(state=SimpleNamespace(token_cache=token_cache))
+        )
+        samples = await measure(partial(verify_jwt_token, request, credentials), calls)
+        report("verify_jwt_token", path=name, **summarize(samples))
+
+    # A whole request to an endpoint that only authenticates
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://test",
+            headers={"Authorization": f"Bearer {token}"},
+        ) as client:
+
+            async def get() -> None:
+                response = await client.get("/internal/cache")
+                response.raise_for_status()
+
+            # Warm up the routing and validation paths before measuring
+            await measure(get, min(requests, 500))
+            for name, token_cache in (
+                ("uncached", None),
+                ("cached", make_token_cache()),
+            ):
+                app.state.token_cache = token_cache
+                samples = await measure(get, requests)
+                report("authenticated_request", path=name, **summarize(samples))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=5_000)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.calls, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Compare the pure ASGI middleware stack with the former BaseHTTPMiddleware handler.
+
+Usage (from the backend directory, against a throwaway database):
+
+    python -m benchmarks.bench_middleware --requests 5000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections.abc import Callable
+
+import jwt
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.api import main_router
+from app.core.config import settings
+from app.main import app
+from app.utils.middlewares import ErrorHandlingMiddleware
+from benchmarks.common import measure, report, summarize
+from benchmarks.seed import seed_profiles
+
+
+class LegacyErrorHandlingMiddleware(BaseHTTPMiddleware):
+    # The error handler as it was before the pure ASGI rewrite
+    async def dispatch(self, request, call_next):
+        try:
+            response = await call_next(request)
+            return response
+        except Exception:
+            return JSONResponse(
+                status_code=500,
+                content={"error": "Internal Server Error"},
+            )
+
+
+def make_app(middleware: type) -> FastAPI:
+    bench_app = FastAPI(title=app.title)
+    bench_app.include_router(main_router)
+    bench_app.exception_handlers.update(app.exception_handlers)
+    bench_app.add_middleware(middleware)
+    return bench_app
+
+
+async def run(profiles: int, requests: int) -> None:
+    engine = create_async_engine(settings.DATABASE_URL, echo=False)
+    await seed_profiles(engine, profiles)
+    await engine.dispose()
+
+    token = jwt.encode(
+        {"bot_id": "telegram-bot", "exp": time.time() + 3600},
+        settings.SECRET_API_KEY,
+        algorithm="HS256",
+    )
+    rng = random.Random(0)
+    routes = {
+        "/ping": lambda: "/ping",
+        "/users/{telegram_id}/profiles": (
+            lambda: f"/users/{rng.randint(1, profiles)}/profiles"
+        ),
+        "/users/profiles": lambda: "/users/profiles?limit=50",
+    }
+
+    for name, bench_app in (
+        ("base_http_middleware", make_app(LegacyErrorHandlingMiddleware)),
+        ("asgi_error_handler", make_app(ErrorHandlingMiddleware)),
+        ("asgi_full_stack", app),
+    ):
+        async with bench_app.router.lifespan_context(bench_app):
+            async with AsyncClient(
+                transport=ASGITransport(app=bench_app),
+                base_url="http://test",
+                headers={"Authorization": f"Bearer {token}"},
+            ) as client:
+                for route, make_url in routes.items():
+
+                    async def get(make_url: Callable[[], str] = make_url) -> None:
+                        response = await client.get(make_url())
+                        response.raise_for_status()
+
+                    # Warm up the connection pool and the caches first
+                    await measure(get, min(requests, 500))
+                    samples = await measure(get, requests)
+                    report(
+                        "middleware",
+                        stack=name,
+                        route=route,
+                        requests_per_second=len(samples) / sum(samples),
+                        **summarize(samples),
+                    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--profiles", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=5_000)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.profiles, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Compare the indexed profile search with a naive ILIKE scan as the table grows.
+
+The same number of needle profiles is planted in every table, so the selective
+queries match as many profiles whatever its size. The broad query matches every
+profile, so the indexed search rejects it after counting MAX_SEARCH_MATCHES + 1
+matches, as the service does.
+
+Usage (from the backend directory, against a throwaway UTF8 database):
+
+    python -m benchmarks.bench_profile_search --profiles 100000 300000 1000000
+"""
+
+import argparse
+import asyncio
+import random
+
+from sqlalchemy import or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.models.user_model import UserProfileOrm, has_pg_trgm
+from app.repositories.profile_repository import UserProfileRepository
+from benchmarks.common import measure, report, summarize
+from benchmarks.seed import seed_profiles
+
+NEEDLE_ABOUT_ME = "Увлекаюсь альпинизмом и фотографией"
+NEEDLE_NAME = "Альпинист {}"
+QUERIES = {
+    # Search query, substring of the naive scan, whether to match similar names
+    "needle": ("альпинизм", "альпинизм", False),
+    "needle_phrase": ('"альпинизм и фотография"', "альпинизмом и фото", False),
+    "needle_typo": ("Алпинист", "Алпинист", True),
+    "broad": ("данные", "данные", False),
+}
+
+
+async def naive_scan(session: AsyncSession, substring: str, limit: int) -> list[int]:
+    # Unranked substring match on both fields
+    pattern = f"%{substring}%"
+    stmt = (
+        select(UserProfileOrm.telegram_id)
+        .where(
+            or_(
+                UserProfileOrm.name.ilike(pattern),
+                UserProfileOrm.about_me.ilike(pattern),
+            )
+        )
+        .order_by(UserProfileOrm.telegram_id)
+        .limit(limit)
+    )
+    res = await session.execute(stmt)
+    return list(res.scalars())
+
+
+async def run(sizes: list[int], needles: int, queries: int, limit: int) -> None:
+    engine = create_async_engine(settings.DATABASE_URL, echo=False)
+    session_maker = async_sessionmaker(engine)
+
+    for profiles in sizes:
+        await seed_profiles(engine, profiles)
+        async with engine.begin() as conn:
+            ids = random.Random(1).sample(range(1, profiles + 1), needles)
+            await conn.execute(
+                text(
+                    "UPDATE user_profiles SET name = :prefix || telegram_id, "
+                    "about_me = :about_me WHERE telegram_id = ANY(:ids)"
+                ),
+                {
+                    "prefix": NEEDLE_NAME.format(""),
+                    "about_me": NEEDLE_ABOUT_ME,
+                    "ids": ids,
+                },
+            )
+            await conn.execute(text("ANALYZE user_profiles"))
+            fuzzy_available = await conn.run_sync(has_pg_trgm)
+
+        for name, (query, substring, fuzzy) in QUERIES.items():
+            if fuzzy and not fuzzy_available:
+                report("profile_search", path="skipped", query=name, profiles=profiles)
+                continue
+
+            found = {}
+
+            def search(path: str, query: str, substring: str, fuzzy: bool, found: dict):
+                async def first_page() -> None:
+                    async with session_maker() as session:
+                        if path == "naive_scan":
+                            rows = await naive_scan(session, substring, limit)
+                        else:
+                            repo = UserProfileRepository(session)
+                            bound = settings.MAX_SEARCH_MATCHES
+                            count = await repo.count_matches(
+                                query, bound + 1, fuzzy=fuzzy
+                            )
+                            if count > bound:
+                                found[path] = "rejected"
+                                return
+                            rows = await repo.search(
+                                query, after=None, limit=limit, fuzzy=fuzzy
+                            )
+                    found[path] = len(rows)
+
+                return first_page
+
+            for path in ("indexed", "naive_scan"):
+                samples = await measure(
+                    search(path, query, substring, fuzzy, found), queries
+                )
+                report(
+                    "profile_search",
+                    path=path,
+                    query=name,
+                    profiles=profiles,
+                    found=found[path],
+                    **summarize(samples),
+                )
+
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--profiles", type=int, nargs="+", default=[100_000, 300_000, 1_000_000]
+    )
+    parser.add_argument("--needles", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=settings.DEFAULT_PAGE_SIZE)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.profiles, args.needles, args.queries, args.limit))
+
+
+if __name__ == "__main__":
+    main()
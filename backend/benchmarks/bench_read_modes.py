@@ -0,0 +1,116 @@
+"""
+Compare the ORM and the mappings read modes of the repositories, per row.
+
+Usage (from the backend directory, against a throwaway database):
+
+    python -m benchmarks.bench_read_modes --profiles 10000 --repeat 200
+
+Every read of the services runs in both modes, including the conversion of the
+rows to `UserProfileRead` as the services do it. Each case prints one JSON line
+per mode with the CPU time and the peak traced memory per row.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import create_engine
+from app.repositories.profile_repository import UserProfileRepository
+from app.schemas.user_schema import UserProfileRead
+from app.utils.serialization import type_adapter
+from benchmarks.common import measure_allocations, report
+from benchmarks.seed import seed_profiles
+
+_profiles_adapter = type_adapter(list[UserProfileRead])
+
+
+async def cpu_per_call(func: Callable[[], Awaitable], repeat: int) -> float:
+    """
+    Await `func` `repeat` times and return its CPU time per call, in seconds.
+    """
+    start = time.process_time()
+    for _ in range(repeat):
+        await func()
+    return (time.process_time() - start) / repeat
+
+
+async def run(profiles: int, repeat: int, page_size: int, batch_size: int) -> None:
+    engine = create_engine(settings.DATABASE_URL)
+    await seed_profiles(engine, profiles)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    rng = random.Random(0)
+    ids = [rng.randint(1, profiles) for _ in range(page_size)]
+
+    def make_cases(mappings: bool) -> dict[str, tuple[Callable[[], Awaitable], int]]:
+        async def find() -> None:
+            async with session_maker() as session:
+                repo = UserProfileRepository(session, mappings=mappings)
+                UserProfileRead.model_validate(
+                    await repo.find(rng.randint(1, profiles))
+                )
+
+        async def find_page() -> None:
+            async with session_maker() as session:
+                repo = UserProfileRepository(session, mappings=mappings)
+                after = rng.randint(0, max(profiles - page_size, 0))
+                rows = await repo.find_page(after, page_size)
+                _profiles_adapter.validate_python(rows, from_attributes=True)
+
+        async def find_many() -> None:
+            async with session_maker() as session:
+                repo = UserProfileRepository(session, mappings=mappings)
+                rows = await repo.find_many(ids)
+                _profiles_adapter.validate_python(rows, from_attributes=True)
+
+        async def stream_all() -> None:
+            async with session_maker() as session:
+                repo = UserProfileRepository(session, mappings=mappings)
+                async for rows in repo.stream_all(batch_size):
+                    _profiles_adapter.validate_python(rows, from_attributes=True)
+
+        # Each case and the number of rows it reads per call
+        return {
+            "find": (find, 1),
+            "find_page": (find_page, page_size),
+            "find_many": (find_many, len(set(ids))),
+            "stream_all": (stream_all, profiles),
+        }
+
+    for mode in ("orm", "mappings"):
+        for name, (func, rows) in make_cases(mode == "mappings").items():
+            # A full export per call, fewer calls are enough
+            calls = max(repeat // 100, 3) if name == "stream_all" else repeat
+            await func()
+            cpu = await cpu_per_call(func, calls)
+            allocations = await measure_allocations(func, min(calls, 50))
+            report(
+                "read_modes",
+                case=name,
+                mode=mode,
+                profiles=profiles,
+                rows_per_call=rows,
+                cpu_us_per_row=cpu / rows * 1_000_000,
+                peak_bytes_per_row=allocations["peak_bytes_p50"] / rows,
+            )
+
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--profiles", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=settings.DEFAULT_PAGE_SIZE)
+    parser.add_argument("--batch-size", type=int, default=settings.EXPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.profiles, args.repeat, args.page_size, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Compare leaving seen profiles out of the candidate search with a Bloom filter
+against exact sets: an id array, and an anti-join on the swipes table.
+
+Usage (from the backend directory, against a throwaway database):
+
+    python -m benchmarks.bench_seen_filter --profiles 200000 --seen 100 1000 10000
+"""
+
+import argparse
+import asyncio
+import random
+
+from sqlalchemy import BigInteger, ColumnElement, bindparam, exists, func, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.models.feed_model  # noqa: F401, creates the seen_filters table
+from app.core.config import settings
+from app.models.swipe_model import SwipeOrm
+from app.models.user_model import UserProfileOrm
+from app.repositories.seen_repository import not_seen
+from app.utils.bloom import BloomFilter, ScalableBloomFilter
+from benchmarks.common import measure, report, summarize
+from benchmarks.seed import seed_profiles
+
+
+async def find_candidate_ids(
+    session: AsyncSession,
+    user: UserProfileOrm,
+    condition: ColumnElement[bool] | None,
+    limit: int,
+) -> list[int]:
+    # The filters of `ProfileRepository.find_candidates`, preferences aside
+    stmt = (
+        select(UserProfileOrm.telegram_id)
+        .where(
+            UserProfileOrm.city == user.city,
+            UserProfileOrm.sex != user.sex,
+            UserProfileOrm.age.between(user.age - 5, user.age + 5),
+            UserProfileOrm.telegram_id != user.telegram_id,
+        )
+        .order_by(UserProfileOrm.telegram_id)
+        .limit(limit)
+    )
+    if condition is not None:
+        stmt = stmt.where(condition)
+    res = await session.execute(stmt)
+    return list(res.scalars())
+
+
+async def run(profiles: int, seen_counts: list[int], users: int, limit: int) -> None:
+    engine = create_async_engine(settings.DATABASE_URL, echo=False)
+    session_maker = async_sessionmaker(engine)
+    await seed_profiles(engine, profiles)
+
+    async with session_maker() as session:
+        sample = random.Random(1).sample(range(1, profiles + 1), users)
+        res = await session.execute(
+            select(UserProfileOrm).where(UserProfileOrm.telegram_id.in_(sample))
+        )
+        sample_users = list(res.scalars())
+
+    rng = random.Random(2)
+    for count in seen_counts:
+        # Seen profiles are the first candidates, as after paging through the
+        # feed, and random others up to `count`
+        seen = {}
+        async with session_maker() as session:
+            for user in sample_users:
+                ids = set(await find_candidate_ids(session, user, None, count))
+                while len(ids) < count:
+                    ids.add(rng.randint(1, profiles))
+                ids.discard(user.telegram_id)
+                seen[user.telegram_id] = sorted(ids)
+
+        async with engine.begin() as conn:
+            await conn.execute(text("TRUNCATE swipes"))
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                "swipes",
+                records=[
+                    (user_id, swipee_id, False)
+                    for user_id, ids in seen.items()
+                    for swipee_id in ids
+                ],
+                columns=["swiper_id", "swipee_id", "liked"],
+            )
+            await conn.execute(text("ANALYZE swipes"))
+            # Heap and primary key of every partition
+            res = await conn.execute(
+                text(
+                    "SELECT sum(pg_total_relation_size(inhrelid))::bigint "
+                    "FROM pg_inherits WHERE inhparent = 'swipes'::regclass"
+                )
+            )
+            swipes_bytes = res.scalar_one()
+
+        configured = {}
+        for user_id, ids in seen.items():
+            configured[user_id] = ScalableBloomFilter(
+                settings.SEEN_FILTER_CAPACITY, settings.SEEN_FILTER_FP_RATE
+            )
+            configured[user_id].update(ids)
+        # A single slice of the right size, the least a filter can take
+        sized = BloomFilter.for_capacity(count, settings.SEEN_FILTER_FP_RATE)
+        some_filter = next(iter(configured.values()))
+        report(
+            "seen_memory",
+            seen=count,
+            bloom_slices=len(some_filter.slices),
+            bloom_bytes=some_filter.size // 8,
+            bloom_expected_fp_rate=some_filter.false_positive_rate(),
+            bloom_sized_for_seen_bytes=sized.size // 8,
+            swipes_bytes=swipes_bytes // len(seen),
+        )
+
+        def candidates(condition_of):
+            users_iter = iter(sample_users)
+
+            async def query() -> None:
+                user = next(users_iter)
+                async with session_maker() as session:
+                    await find_candidate_ids(session, user, condition_of(user), limit)
+
+            return query
+
+        # The seen ids of this count are bound, not read from the loop
+        def bloom(
+            user: UserProfileOrm, configured: dict = configured
+        ) -> ColumnElement[bool]:
+            return not_seen(UserProfileOrm.telegram_id, configured[user.telegram_id])
+
+        def exact_array(user: UserProfileOrm, seen: dict = seen) -> ColumnElement[bool]:
+            ids = bindparam("seen_ids", seen[user.telegram_id], type_=ARRAY(BigInteger))
+            return UserProfileOrm.telegram_id != func.all(ids)
+
+        def anti_join(user: UserProfileOrm) -> ColumnElement[bool]:
+            return ~exists().where(
+                SwipeOrm.swiper_id == user.telegram_id,
+                SwipeOrm.swipee_id == UserProfileOrm.telegram_id,
+            )
+
+        for name, condition_of in (
+            ("none", lambda user: None),
+            ("bloom", bloom),
+            ("exact_array", exact_array),
+            ("anti_join", anti_join),
+        ):
+            samples = await measure(candidates(condition_of), len(sample_users))
+            report(
+                "seen_candidates",
+                path=name,
+                profiles=profiles,
+                seen=count,
+                **summarize(samples),
+            )
+
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--profiles", type=int, default=200_000)
+    parser.add_argument("--seen", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=settings.FEED_QUEUE_SIZE)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.profiles, args.seen, args.users, args.limit))
+
+
+if __name__ == "__main__":
+    main()
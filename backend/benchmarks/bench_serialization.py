@@ -0,0 +1,144 @@
+"""
+Compare the CPU cost of the old and the fast serialization of profile responses.
+
+Usage (from the backend directory, no database needed):
+
+    python -m benchmarks.bench_serialization --profiles 1000 --rounds 200
+
+Every path prints one JSON line with its CPU time per 1,000 profiles, and the
+fast paths also print the CPU time they save over the path they replace.
+
+- `page_*`: a page of ORM rows, as `GET /users/profiles` and the candidates.
+  The old path validated every row into a model, then FastAPI validated the page
+  again against the response model and encoded it with `jsonable_encoder` and
+  `json.dumps`. The fast path validates the rows once with a cached adapter and
+  dumps the page straight to bytes.
+- `cached_*`: a profile found in the cache, as `GET /users/{telegram_id}/profiles`.
+  The old path parsed the cached JSON into a model to encode it again, the fast
+  path sends the cached bytes.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.models.user_model import SexEnumDB, UserProfileOrm
+from app.schemas.user_schema import Page, UserProfileRead
+from app.utils.serialization import json_response, type_adapter
+from benchmarks.common import report
+from benchmarks.seed import CITIES
+
+
+def make_rows(count: int) -> list[UserProfileOrm]:
+    rng = random.Random(0)
+    sexes = list(SexEnumDB)
+    return [
+        UserProfileOrm(
+            telegram_id=telegram_id,
+            name=f"Юзер {telegram_id}",
+            about_me="Какие-нибудь данные",
+            age=rng.randint(18, 60),
+            city=rng.choice(CITIES),
+            sex=rng.choice(sexes),
+        )
+        for telegram_id in range(1, count + 1)
+    ]
+
+
+async def cpu_per_round(func: Callable[[], Awaitable], rounds: int) -> float:
+    """
+    Await `func` `rounds` times and return its CPU time per call, in seconds.
+    """
+    for _ in range(min(rounds, 10)):
+        await func()
+    start = time.process_time()
+    for _ in range(rounds):
+        await func()
+    return (time.process_time() - start) / rounds
+
+
+async def run(profiles: int, rounds: int, page_size: int) -> None:
+    rows = make_rows(profiles)
+    pages = [rows[i : i + page_size] for i in range(0, len(rows), page_size)]
+    cached = [UserProfileRead.model_validate(row).model_dump_json() for row in rows]
+    cached_bytes = [value.encode() for value in cached]
+
+    page_field = create_model_field(
+        "Response", Page[UserProfileRead], mode="serialization"
+    )
+    profile_field = create_model_field(
+        "Response", UserProfileRead, mode="serialization"
+    )
+    adapter = type_adapter(list[UserProfileRead])
+
+    async def page_legacy() -> None:
+        for page in pages:
+            items = [UserProfileRead.model_validate(row) for row in page]
+            content = await serialize_response(
+                field=page_field, response_content=Page(items=items)
+            )
+            JSONResponse(content)
+
+    async def page_fast() -> None:
+        for page in pages:
+            items = adapter.validate_python(page, from_attributes=True)
+            json_response(Page[UserProfileRead](items=items))
+
+    async def cached_legacy() -> None:
+        for value in cached:
+            user = UserProfileRead.model_validate_json(value)
+            content = await serialize_response(
+                field=profile_field, response_content=user
+            )
+            JSONResponse(content)
+
+    async def cached_fast() -> None:
+        for value in cached_bytes:
+            Response(value, media_type="application/json")
+
+    # Each fast path and the old path it replaces
+    cases = {
+        "page": (page_legacy, page_fast),
+        "cached": (cached_legacy, cached_fast),
+    }
+    per_thousand = 1000 / profiles
+    for name, (legacy, fast) in cases.items():
+        legacy_cpu = await cpu_per_round(legacy, rounds) * per_thousand
+        fast_cpu = await cpu_per_round(fast, rounds) * per_thousand
+        report(
+            "serialization",
+            case=f"{name}_legacy",
+            profiles=profiles,
+            page_size=page_size,
+            cpu_ms_per_1000=legacy_cpu * 1000,
+        )
+        report(
+            "serialization",
+            case=f"{name}_fast",
+            profiles=profiles,
+            page_size=page_size,
+            cpu_ms_per_1000=fast_cpu * 1000,
+            saved_cpu_ms_per_1000=(legacy_cpu - fast_cpu) * 1000,
+            speedup=legacy_cpu / fast_cpu if fast_cpu else None,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--profiles", type=int, default=1_000)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.profiles, args.rounds, args.page_size))
+
+
+if __name__ == "__main__":
+    main()
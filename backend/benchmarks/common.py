@@ -0,0 +1,94 @@
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+
+
+def summarize(samples: list[float]) -> dict:
+    """
+    Summarize latency samples, in seconds, as milliseconds.
+
+    Args:
+        samples (list[float]): Measured durations in seconds.
+
+    Returns:
+        dict: Count, mean and p50/p95/p99 latency in milliseconds.
+    """
+    ordered = sorted(samples)
+
+    def percentile(q: float) -> float:
+        index = min(len(ordered) - 1, round(q * (len(ordered) - 1)))
+        return ordered[index] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+    }
+
+
+async def measure(func: Callable[[], Awaitable], repeat: int) -> list[float]:
+    """
+    Await `func` `repeat` times and collect the duration of every call.
+
+    Args:
+        func (Callable[[], Awaitable]): Coroutine factory to measure.
+        repeat (int): Number of calls.
+
+    Returns:
+        list[float]: Duration of every call in seconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def measure_allocations(func: Callable[[], Awaitable], repeat: int) -> dict:
+    """
+    Await `func` `repeat` times under tracemalloc and summarize its allocations.
+
+    Tracing slows every allocation down, so time `func` separately with `measure`.
+
+    Args:
+        func (Callable[[], Awaitable]): Coroutine factory to measure.
+        repeat (int): Number of calls.
+
+    Returns:
+        dict: Median and max peak of traced memory per call, and the memory still
+            held after the calls, per call, in bytes.
+    """
+    tracemalloc.start()
+    try:
+        await func()
+        peaks = []
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(repeat):
+            start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            await func()
+            peaks.append(tracemalloc.get_traced_memory()[1] - start)
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "peak_bytes_p50": statistics.median(peaks),
+        "peak_bytes_max": max(peaks),
+        "retained_bytes_per_call": retained / repeat,
+    }
+
+
+def report(name: str, **fields) -> None:
+    """
+    Print one benchmark result as a JSON line.
+    """
+    json.dump({"benchmark": name, **fields}, sys.stdout, ensure_ascii=False)
+    sys.stdout.write("\n")
+    sys.stdout.flush()
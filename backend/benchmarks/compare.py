@@ -0,0 +1,58 @@
+"""
+Compare two load-test runs saved with `python -m benchmarks.load_test --output`.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.compare baseline.json candidate.json
+
+Prints one JSON line per transport and endpoint with the throughput and
+latency percentiles of both runs and their relative change.
+"""
+
+import argparse
+import json
+
+from benchmarks.common import report
+
+FIELDS = ("requests_per_second", "p50_ms", "p95_ms", "p99_ms")
+
+
+def load(path: str) -> tuple[str | None, dict[tuple[str, str], dict]]:
+    with open(path, encoding="utf-8") as f:
+        document = json.load(f)
+    results = {
+        (result["transport"], result["endpoint"]): result
+        for result in document["results"]
+    }
+    return document.get("commit"), results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    baseline_commit, baseline = load(args.baseline)
+    candidate_commit, candidate = load(args.candidate)
+
+    for key in sorted(baseline.keys() & candidate.keys()):
+        before, after = baseline[key], candidate[key]
+        fields = {}
+        for name in FIELDS:
+            fields[name] = {"baseline": before[name], "candidate": after[name]}
+            if before[name]:
+                fields[name]["change"] = after[name] / before[name] - 1
+        transport, endpoint = key
+        report(
+            "compare",
+            baseline_commit=baseline_commit,
+            candidate_commit=candidate_commit,
+            transport=transport,
+            endpoint=endpoint,
+            **fields,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""
+Load-test every route of /users, in process and over a real uvicorn socket.
+
+Usage (from the backend directory, against a throwaway database):
+
+    python -m benchmarks.load_test --profiles 100000 --concurrency 32 \
+        --requests 2000 --output results.json
+
+Every endpoint prints one JSON line with its throughput and p50/p95/p99 latency.
+With `--output` the whole run is also saved, along with the commit and the
+parameters, and `python -m benchmarks.compare old.json new.json` diffs two runs.
+
+The database is seeded again before every transport, so both see the same data.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+import jwt
+from httpx import ASGITransport, AsyncClient, Limits, TransportError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+from app.main import app
+from benchmarks.common import report, summarize
+from benchmarks.seed import CITIES, seed_profiles
+
+SEXES = ["Мужской", "Женский", "Не указан"]
+BULK_ROWS = 100  # Profiles per bulk import request
+BATCH_GET_IDS = 50  # Telegram ids per batch read
+FEED_USERS = 100  # Active users browsing their feed, so that queues get reused
+
+
+@dataclass
+class LoadState:
+    """
+    Data shared by the scenarios of one run: ids of seeded and created profiles.
+    """
+
+    profiles: int
+    rng: random.Random = field(default_factory=lambda: random.Random(0))
+    next_id: int = 0
+    created: list[int] = field(default_factory=list)
+    without_preference: list[int] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        # Profiles created by the run never collide with the seeded ones
+        self.next_id = self.profiles + 1
+
+    def new_id(self) -> int:
+        telegram_id = self.next_id
+        self.next_id += 1
+        return telegram_id
+
+    def seeded_id(self) -> int:
+        return self.rng.randint(1, self.profiles)
+
+    def new_profile(self, telegram_id: int) -> dict:
+        return {
+            "telegram_id": telegram_id,
+            "name": f"Юзер {telegram_id}",
+            "about_me": "Какие-нибудь данные",
+            "age": self.rng.randint(18, 60),
+            "city": self.rng.choice(CITIES),
+            "sex": self.rng.choice(SEXES),
+        }
+
+
+# A scenario builds the (method, url, request options) of its next request
+Scenario = Callable[[LoadState], tuple[str, str, dict]]
+
+
+def create_profile(state: LoadState) -> tuple[str, str, dict]:
+    telegram_id = state.new_id()
+    state.created.append(telegram_id)
+    state.without_preference.append(telegram_id)
+    profile = state.new_profile(telegram_id)
+    del profile["telegram_id"]
+    return "POST", f"/users/{telegram_id}/profiles", {"json": profile}
+
+
+def create_preferences(state: LoadState) -> tuple[str, str, dict]:
+    # Created profiles have no preference yet, fall back to new ids (404s)
+    if state.without_preference:
+        telegram_id = state.without_preference.pop()
+    else:
+        telegram_id = state.new_id()
+    sex = state.rng.choice(SEXES)
+    return "POST", f"/users/{telegram_id}/preferences", {"json": {"sex": sex}}
+
+
+def get_profile(state: LoadState) -> tuple[str, str, dict]:
+    return "GET", f"/users/{state.seeded_id()}/profiles", {}
+
+
+def patch_profile(state: LoadState) -> tuple[str, str, dict]:
+    body = {"age": state.rng.randint(18, 60)}
+    return "PATCH", f"/users/{state.seeded_id()}/profiles", {"json": body}
+
+
+def batch_get_profiles(state: LoadState) -> tuple[str, str, dict]:
+    ids = [state.seeded_id() for _ in range(BATCH_GET_IDS)]
+    return "POST", "/users/profiles:batchGet", {"json": {"telegram_ids": ids}}
+
+
+def list_profiles(state: LoadState) -> tuple[str, str, dict]:
+    return "GET", "/users/profiles", {"params": {"limit": 50}}
+
+
+def get_candidates(state: LoadState) -> tuple[str, str, dict]:
+    return "GET", f"/users/{state.seeded_id()}/candidates", {"params": {"limit": 20}}
+
+
+def feed_next(state: LoadState) -> tuple[str, str, dict]:
+    telegram_id = state.rng.randint(1, min(FEED_USERS, state.profiles))
+    return "GET", f"/users/{telegram_id}/feed/next", {}
+
+
+def swipe(state: LoadState) -> tuple[str, str, dict]:
+    swiper_id = state.seeded_id()
+    # Any other seeded profile, a user cannot swipe themselves
+    swipee_id = swiper_id % state.profiles + 1
+    body = {"swipee_id": swipee_id, "liked": state.rng.random() < 0.5}
+    return "POST", f"/users/{swiper_id}/swipes", {"json": body}
+
+
+def export_profiles(state: LoadState) -> tuple[str, str, dict]:
+    return "GET", "/users/profiles:export", {"params": {"format": "ndjson"}}
+
+
+def bulk_import(state: LoadState) -> tuple[str, str, dict]:
+    rows = [state.new_profile(state.new_id()) for _ in range(BULK_ROWS)]
+    body = "\n".join(json.dumps(row, ensure_ascii=False) for row in rows)
+    return (
+        "POST",
+        "/users/profiles:bulk",
+        {"content": body.encode(), "headers": {"content-type": "application/x-ndjson"}},
+    )
+
+
+def delete_profile(state: LoadState) -> tuple[str, str, dict]:
+    telegram_id = state.created.pop() if state.created else state.new_id()
+    return "DELETE", f"/users/{telegram_id}/profiles", {}
+
+
+# In run order: preferences and deletes use the profiles created before them.
+# The second value marks heavy endpoints, which get `--heavy-requests` requests
+SCENARIOS: dict[str, tuple[Scenario, bool]] = {
+    "create_profile": (create_profile, False),
+    "create_preferences": (create_preferences, False),
+    "get_profile": (get_profile, False),
+    "patch_profile": (patch_profile, False),
+    "batch_get_profiles": (batch_get_profiles, False),
+    "list_profiles": (list_profiles, False),
+    "get_candidates": (get_candidates, False),
+    "feed_next": (feed_next, False),
+    "swipe": (swipe, False),
+    "export_profiles": (export_profiles, True),
+    "bulk_import": (bulk_import, True),
+    "delete_profile": (delete_profile, False),
+}
+
+
+def make_token() -> str:
+    return jwt.encode(
+        {"bot_id": "telegram-bot", "exp": time.time() + 3600},
+        settings.SECRET_API_KEY,
+        algorithm="HS256",
+    )
+
+
+async def drive(
+    client: AsyncClient,
+    scenario: Scenario,
+    state: LoadState,
+    requests: int,
+    concurrency: int,
+) -> dict:
+    """
+    Send `requests` requests of a scenario from `concurrency` concurrent workers.
+
+    Returns:
+        dict: Throughput, error count and latency summary of the scenario.
+    """
+    samples: list[float] = []
+    statuses: dict[int, int] = {}
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            method, url, options = scenario(state)
+            start = time.perf_counter()
+            response = await client.request(method, url, **options)
+            await response.aread()
+            samples.append(time.perf_counter() - start)
+            status = response.status_code
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    errors = sum(count for status, count in statuses.items() if status >= 400)
+    return {
+        "requests_per_second": len(samples) / elapsed,
+        "errors": errors,
+        "statuses": statuses,
+        **summarize(samples),
+    }
+
+
+async def run_scenarios(
+    client: AsyncClient, transport: str, args: argparse.Namespace
+) -> list[dict]:
+    state = LoadState(profiles=args.profiles)
+    results = []
+    for name in args.endpoints:
+        scenario, heavy = SCENARIOS[name]
+        requests = args.heavy_requests if heavy else args.requests
+
+        # Warm up the connection pools, the caches and the prepared statements
+        await drive(client, scenario, state, min(requests, 50), args.concurrency)
+        result = await drive(client, scenario, state, requests, args.concurrency)
+
+        result = {"transport": transport, "endpoint": name, **result}
+        report("load_test", concurrency=args.concurrency, **result)
+        results.append(result)
+    return results
+
+
+async def seed(profiles: int) -> None:
+    engine = create_async_engine(settings.DATABASE_URL, echo=False)
+    await seed_profiles(engine, profiles)
+    await engine.dispose()
+
+
+async def run_asgi(args: argparse.Namespace) -> list[dict]:
+    await seed(args.profiles)
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://test",
+            headers={"Authorization": f"Bearer {make_token()}"},
+            timeout=None,
+        ) as client:
+            return await run_scenarios(client, "asgi", args)
+
+
+async def run_uvicorn(args: argparse.Namespace) -> list[dict]:
+    await seed(args.profiles)
+    # A separate process, so that the client does not compete with the server
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(args.port),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        env=os.environ,
+    )
+    try:
+        async with AsyncClient(
+            base_url=f"http://127.0.0.1:{args.port}",
+            headers={"Authorization": f"Bearer {make_token()}"},
+            limits=Limits(max_connections=args.concurrency),
+            timeout=None,
+        ) as client:
+            await wait_until_ready(client, server)
+            return await run_scenarios(client, "uvicorn", args)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def wait_until_ready(client: AsyncClient, server: subprocess.Popen) -> None:
+    for _ in range(100):
+        if server.poll() is not None:
+            raise RuntimeError("uvicorn exited before serving requests")
+        try:
+            response = await client.get("/ping")
+            if response.status_code == 200:
+                return
+        except TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("uvicorn did not start in time")
+
+
+def current_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace) -> None:
+    results = []
+    for transport in args.transports:
+        runner = run_asgi if transport == "asgi" else run_uvicorn
+        results.extend(await runner(args))
+
+    if args.output:
+        document = {
+            "commit": current_commit(),
+            "profiles": args.profiles,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "heavy_requests": args.heavy_requests,
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, ensure_ascii=False, indent=2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--profiles", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1_000)
+    parser.add_argument(
+        "--heavy-requests",
+        type=int,
+        default=20,
+        help="Requests of the export and bulk import endpoints",
+    )
+    parser.add_argument(
+        "--transports", nargs="+", choices=["asgi", "uvicorn"], default=["asgi"]
+    )
+    parser.add_argument(
+        "--endpoints", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS)
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="Save the results as JSON to this file")
+    args = parser.parse_args()
+    # Keep the run order of the scenarios whatever the order on the command line
+    args.endpoints = [name for name in SCENARIOS if name in args.endpoints]
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
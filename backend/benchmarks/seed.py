@@ -0,0 +1,84 @@
+import random
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.database import Base
+from app.models.user_model import SexEnumDB
+from app.utils.geo import geohash
+
+CITIES = [f"Город {i}" for i in range(50)]
+SEXES = [sex.name for sex in SexEnumDB]
+# Centers of the cities, spread over an area the size of European Russia
+_centers = random.Random(42)
+CITY_CENTERS = {
+    city: (_centers.uniform(43.0, 65.0), _centers.uniform(28.0, 60.0))
+    for city in CITIES
+}
+CITY_SPREAD = 0.2  # Standard deviation of profiles around their city, in degrees
+
+
+async def seed_profiles(
+    engine: AsyncEngine,
+    count: int,
+    preference_ratio: float = 0.7,
+    seed: int = 0,
+    locations: bool = False,
+) -> None:
+    """
+    Recreate the schema and fill it with `count` random profiles.
+
+    Rows are loaded with COPY, so a million profiles take seconds. The tables are
+    dropped first: only point this at a throwaway database.
+
+    Args:
+        engine (AsyncEngine): Engine of the benchmark database.
+        count (int): Number of profiles to create.
+        preference_ratio (float): Share of profiles that also get a preference.
+        seed (int): Seed of the random generator, for reproducible datasets.
+        locations (bool): Also give every profile coordinates around its city.
+    """
+    rng = random.Random(seed)
+    profiles = []
+    preferences = []
+    # A generator of its own keeps the profiles the same with and without locations
+    location_rng = random.Random(seed + 1)
+    columns = ["telegram_id", "name", "about_me", "age", "city", "sex"]
+    if locations:
+        columns += ["latitude", "longitude", "geohash"]
+    for telegram_id in range(1, count + 1):
+        profile = (
+            telegram_id,
+            f"Юзер {telegram_id}",
+            "Какие-нибудь данные",
+            rng.randint(18, 60),
+            rng.choice(CITIES),
+            rng.choice(SEXES),
+        )
+        if locations:
+            latitude, longitude = CITY_CENTERS[profile[4]]
+            latitude += location_rng.gauss(0, CITY_SPREAD)
+            longitude += location_rng.gauss(0, CITY_SPREAD)
+            profile += (latitude, longitude, geohash(latitude, longitude))
+        profiles.append(profile)
+        if rng.random() < preference_ratio:
+            preferences.append((telegram_id, rng.choice(SEXES)))
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+        raw = await conn.get_raw_connection()
+        driver = raw.driver_connection
+        await driver.copy_records_to_table(
+            "user_profiles",
+            records=profiles,
+            columns=columns,
+        )
+        await driver.copy_records_to_table(
+            "user_preferences",
+            records=preferences,
+            columns=["telegram_id", "sex"],
+        )
+
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql("ANALYZE user_profiles, user_preferences")
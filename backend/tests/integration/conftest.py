@@ -8,6 +8,8 @@ from sqlalchemy.ext.asyncio import (
 
 from app.core.config import settings
 from app.core.database import Base
+from app.models.feed_model import FeedItemOrm, FeedOrm, SeenFilterOrm  # noqa: F401
+from app.models.swipe_model import SwipeOrm  # noqa: F401
 from app.models.user_model import UserProfileOrm  # noqa: F401
 
 TEST_DATABASE_URL = settings.DATABASE_URL
@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.repositories.feed_repository import FeedRepository
+
+
+@pytest.fixture
+async def clear_feeds(async_engine: AsyncEngine) -> None:
+    async with async_engine.begin() as conn:
+        await conn.execute(text("DELETE FROM feed_items"))
+        await conn.execute(text("DELETE FROM feeds"))
+
+
+@pytest.fixture
+async def repo(async_test_session: AsyncSession) -> FeedRepository:
+    return FeedRepository(async_test_session)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.usefixtures("clear_feeds")
+class TestFeedRepository:
+    async def test_push_and_pop_in_order(self, repo: FeedRepository) -> None:
+        cursor, _ = await repo.lock(1)
+        assert cursor is None
+        await repo.push(1, [30, 10, 20], cursor=30)
+
+        assert await repo.pop(1, 2) == [10, 20]
+        assert await repo.count(1, 10) == 1
+        assert await repo.pop(1, 2) == [30]
+        assert await repo.pop(1, 2) == []
+
+    async def test_push_skips_queued_and_moves_cursor(
+        self, repo: FeedRepository
+    ) -> None:
+        await repo.lock(1)
+        await repo.push(1, [10, 20], cursor=20)
+        await repo.push(1, [20, 30], cursor=None)
+
+        assert await repo.count(1, 10) == 3
+        assert await repo.count(1, 2) == 2
+        cursor, pushed_at = await repo.lock(1)
+        assert cursor is None
+
+        await repo.push(1, [], cursor=40)
+        cursor, last_pushed_at = await repo.lock(1)
+        assert cursor == 40
+        assert last_pushed_at > pushed_at
+
+    async def test_reset_removes_feed_and_candidate(self, repo: FeedRepository) -> None:
+        for user_id in (1, 2):
+            await repo.lock(user_id)
+        await repo.push(1, [2, 3], cursor=3)
+        await repo.push(2, [1, 3], cursor=3)
+
+        await repo.reset(1)
+
+        assert await repo.count(1, 10) == 0
+        cursor, _ = await repo.lock(1)
+        assert cursor is None
+        assert await repo.pop(2, 10) == [3]
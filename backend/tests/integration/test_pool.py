@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+from app.core.database import create_engine
+from app.core.pool import InstrumentedAsyncQueuePool
+
+
+@pytest.fixture
+async def engine():
+    engine = create_async_engine(
+        settings.DATABASE_URL,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.1,
+    )
+    yield engine
+    await engine.dispose()
+
+
+class TestPoolMetrics:
+    async def test_checkouts_and_overflow(self, engine) -> None:
+        metrics = engine.sync_engine.pool.metrics
+
+        async with engine.connect() as first, engine.connect() as second:
+            await first.execute(text("SELECT 1"))
+            await second.execute(text("SELECT 1"))
+
+            stats = metrics.stats()
+            assert stats["checked_out"] == 2
+            assert stats["overflow"] == 1
+
+        stats = metrics.stats()
+        assert stats["connects"] == 2
+        assert stats["overflow_connects"] == 1
+        assert stats["checkouts"] == stats["checkins"] == 2
+        assert stats["checked_out"] == 0
+        assert stats["idle"] == 1  # The overflow connection is closed on checkin
+        assert stats["wait"]["count"] == 2
+
+    async def test_timeout(self, engine) -> None:
+        metrics = engine.sync_engine.pool.metrics
+
+        async with engine.connect(), engine.connect():
+            with pytest.raises(PoolTimeoutError):
+                async with engine.connect():
+                    pass
+
+        stats = metrics.stats()
+        assert stats["timeouts"] == 1
+        assert stats["wait"]["max_ms"] >= 100
+
+
+class TestCreateEngine:
+    async def test_pool_from_settings(self) -> None:
+        engine = create_engine(settings.DATABASE_URL)
+        pool = engine.sync_engine.pool
+
+        assert isinstance(pool, InstrumentedAsyncQueuePool)
+        assert pool.size() == settings.DB_POOL_SIZE
+        assert pool._max_overflow == settings.DB_MAX_OVERFLOW
+
+        async with engine.connect() as conn:
+            assert (await conn.execute(text("SELECT 1"))).scalar() == 1
+        await engine.dispose()
+
+    async def test_pgbouncer_mode(self, monkeypatch) -> None:
+        monkeypatch.setattr(settings, "DB_PGBOUNCER_MODE", True)
+        engine = create_engine(settings.DATABASE_URL)
+
+        # Unnamed statements work the same through PgBouncer and directly
+        async with engine.connect() as conn:
+            for _ in range(2):
+                assert (await conn.execute(text("SELECT 1"))).scalar() == 1
+        await engine.dispose()
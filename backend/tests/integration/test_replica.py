@@ -0,0 +1,133 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from app.api import lifespan
+from app.core.config import settings
+from app.core.database import Base
+from app.core.exceptions import RepositoryError
+from app.repositories.uow import ReadOnlyUnitOfWork
+from app.schemas.user_schema import UserProfileRecord
+from app.services.exceptions import EntityNotFoundException
+from app.services.factories import ServiceFactory
+
+REPLICA_DATABASE = make_url(settings.DATABASE_URL).database + "_replica"
+REPLICA_DATABASE_URL = (
+    make_url(settings.DATABASE_URL)
+    .set(database=REPLICA_DATABASE)
+    .render_as_string(hide_password=False)
+)
+
+
+def make_profile(telegram_id: int) -> dict:
+    return {
+        "telegram_id": telegram_id,
+        "name": "Юзер",
+        "about_me": None,
+        "age": 30,
+        "city": "Москва",
+        "sex": "Мужской",
+    }
+
+
+@pytest.fixture(scope="module")
+async def replica_engine(async_engine: AsyncEngine):
+    # A second database on the same server stands in for the replica
+    async with async_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(f'DROP DATABASE IF EXISTS "{REPLICA_DATABASE}"'))
+        await conn.execute(text(f'CREATE DATABASE "{REPLICA_DATABASE}"'))
+
+    engine = create_async_engine(REPLICA_DATABASE_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+    async with async_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(f'DROP DATABASE "{REPLICA_DATABASE}"'))
+
+
+@pytest.fixture
+async def primary_session(async_engine: AsyncEngine):
+    async with async_sessionmaker(async_engine)() as session:
+        yield session
+    async with async_engine.begin() as conn:
+        await conn.execute(text("DELETE FROM user_profiles"))
+
+
+@pytest.fixture
+async def replica_session(replica_engine: AsyncEngine):
+    read_engine = replica_engine.execution_options(postgresql_readonly=True)
+    async with async_sessionmaker(read_engine)() as session:
+        yield session
+    async with replica_engine.begin() as conn:
+        await conn.execute(text("DELETE FROM user_profiles"))
+
+
+@pytest.mark.asyncio(loop_scope="session")
+class TestReadOnlyUnitOfWork:
+    async def test_reads(self, replica_engine: AsyncEngine, replica_session) -> None:
+        async with replica_engine.begin() as conn:
+            await conn.execute(
+                text(
+                    "INSERT INTO user_profiles (telegram_id, name, age, city, sex) "
+                    "VALUES (1, 'Юзер', 30, 'Москва', 'male')"
+                )
+            )
+
+        async with ReadOnlyUnitOfWork(replica_session) as uow:
+            user = await uow.profiles.find(1)
+            assert user.telegram_id == 1
+        assert not replica_session.in_transaction()
+
+    async def test_rejects_writes(self, replica_session) -> None:
+        with pytest.raises(RepositoryError):
+            async with ReadOnlyUnitOfWork(replica_session) as uow:
+                await uow.profiles.add_one_returning(make_profile(1))
+
+
+@pytest.mark.asyncio(loop_scope="session")
+class TestReplicaRouting:
+    async def test_reads_go_to_replica(self, primary_session, replica_session) -> None:
+        factory = ServiceFactory(primary_session, read_session=replica_session)
+        service = factory.get_profiles_services()
+
+        await service.add_user(UserProfileRecord(**make_profile(1)))
+
+        # Written to the primary, which the stand-in replica does not follow
+        with pytest.raises(EntityNotFoundException):
+            await service.find_user(1)
+        page = await service.find_users_page()
+        assert page.items == []
+
+    async def test_falls_back_to_primary(self, primary_session) -> None:
+        service = ServiceFactory(primary_session).get_profiles_services()
+
+        await service.add_user(UserProfileRecord(**make_profile(1)))
+
+        user = await service.find_user(1)
+        assert user.telegram_id == 1
+
+
+@pytest.mark.asyncio(loop_scope="session")
+class TestLifespan:
+    async def test_without_replica(self, monkeypatch) -> None:
+        monkeypatch.setattr(settings, "REPLICA_DATABASE_URL", None)
+        app = pytest.importorskip("fastapi").FastAPI()
+
+        async with lifespan(app):
+            assert app.state.replica_engine is None
+            read_engine = app.state.async_read_session_maker.kw["bind"]
+            assert read_engine.sync_engine.pool is app.state.engine.sync_engine.pool
+
+    async def test_with_replica(self, monkeypatch, replica_engine) -> None:
+        monkeypatch.setattr(settings, "REPLICA_DATABASE_URL", REPLICA_DATABASE_URL)
+        app = pytest.importorskip("fastapi").FastAPI()
+
+        async with lifespan(app):
+            read_engine = app.state.async_read_session_maker.kw["bind"]
+            assert read_engine.url.database == REPLICA_DATABASE
+            assert app.state.engine.url.database != REPLICA_DATABASE
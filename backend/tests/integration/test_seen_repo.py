@@ -0,0 +1,83 @@
+import random
+
+import pytest
+from sqlalchemy import BigInteger, bindparam, func, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.repositories.seen_repository import SeenFilterRepository, not_seen
+from app.utils.bloom import ScalableBloomFilter
+
+
+@pytest.fixture
+async def clear_seen(async_engine: AsyncEngine) -> None:
+    async with async_engine.begin() as conn:
+        await conn.execute(text("DELETE FROM seen_filters"))
+
+
+@pytest.fixture
+async def repo(async_test_session: AsyncSession) -> SeenFilterRepository:
+    return SeenFilterRepository(async_test_session)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.usefixtures("clear_seen")
+class TestSeenFilterRepository:
+    async def test_add_many_creates_and_updates(
+        self, repo: SeenFilterRepository
+    ) -> None:
+        assert await repo.get(1, capacity=100, fp_rate=0.01) is None
+
+        await repo.add_many({1: [10, 20], 2: [10]}, capacity=100, fp_rate=0.01)
+        await repo.add_many({1: [30]}, capacity=100, fp_rate=0.01)
+
+        first = await repo.get(1, capacity=100, fp_rate=0.01)
+        assert first.count == 3
+        assert all(item in first for item in (10, 20, 30))
+        second = await repo.get(2, capacity=100, fp_rate=0.01)
+        assert second.count == 1
+        assert 10 in second and 20 not in second
+
+    async def test_existing_filter_keeps_its_size(
+        self, repo: SeenFilterRepository
+    ) -> None:
+        await repo.add_many({1: [10]}, capacity=100, fp_rate=0.01)
+        size = (await repo.get(1, capacity=100, fp_rate=0.01)).size
+
+        await repo.add_many({1: [20]}, capacity=10_000, fp_rate=0.001)
+        assert (await repo.get(1, capacity=10_000, fp_rate=0.001)).size == size
+
+    async def test_full_filter_adds_a_slice(self, repo: SeenFilterRepository) -> None:
+        await repo.add_many({1: range(1, 10)}, capacity=10, fp_rate=0.01)
+        await repo.add_many({1: range(10, 41), 2: [1]}, capacity=10, fp_rate=0.01)
+
+        bloom = await repo.get(1, capacity=10, fp_rate=0.01)
+        # Ids that test positive already are not added again
+        assert len(bloom.slices) == 3
+        assert [s.count for s in bloom.slices[:2]] == [10, 20]
+        assert all(item in bloom for item in range(1, 41))
+        assert len((await repo.get(2, capacity=10, fp_rate=0.01)).slices) == 1
+
+    async def test_delete(self, repo: SeenFilterRepository) -> None:
+        await repo.add_many({1: [10]}, capacity=100, fp_rate=0.01)
+        await repo.delete(1)
+
+        assert await repo.get(1, capacity=100, fp_rate=0.01) is None
+
+    async def test_sql_filter_matches_python(
+        self, async_test_session: AsyncSession
+    ) -> None:
+        rng = random.Random(0)
+        # Three slices
+        bloom = ScalableBloomFilter(50, 0.05)
+        bloom.update(rng.sample(range(1, 10**12), 200))
+        ids = [*rng.sample(range(1, 10**12), 300), *list(range(1, 300))]
+        ids += list(range(10**9, 10**9 + 5000, 17))
+
+        id_column = func.unnest(
+            bindparam("ids", ids, type_=ARRAY(BigInteger))
+        ).column_valued("id")
+        res = await async_test_session.execute(
+            select(id_column).where(not_seen(id_column, bloom))
+        )
+        assert set(res.scalars()) == {item for item in ids if item not in bloom}
@@ -0,0 +1,225 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+
+from app.core.config import settings
+from app.core.database import Base
+from app.core.sharding import ShardRouter
+from app.repositories.resharding import cleanup, reshard
+from app.repositories.sharded import ShardedUnitOfWork
+from app.schemas.user_schema import UserPreferencesRead, UserProfileRecord
+from app.services.factories import ServiceFactory
+
+SHARD_NAMES = ["s0", "s1", "s2"]
+SHARD_URLS = {
+    name: make_url(settings.DATABASE_URL)
+    .set(database=f"{make_url(settings.DATABASE_URL).database}_{name}")
+    .render_as_string(hide_password=False)
+    for name in SHARD_NAMES
+}
+IDS = range(1, 201)
+
+
+def make_profile(telegram_id: int, **fields) -> dict:
+    return {
+        "telegram_id": telegram_id,
+        "name": "Юзер",
+        "about_me": None,
+        "age": 30,
+        "city": "Москва",
+        "sex": "Мужской",
+    } | fields
+
+
+async def count_rows(engine: AsyncEngine, table: str) -> set[int]:
+    async with engine.connect() as conn:
+        res = await conn.execute(text(f"SELECT telegram_id FROM {table}"))
+        return set(res.scalars())
+
+
+@pytest.fixture(scope="module")
+async def shard_urls(async_engine: AsyncEngine):
+    # Databases on the same server stand in for the shards
+    async with async_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for url in SHARD_URLS.values():
+            database = make_url(url).database
+            await conn.execute(text(f'DROP DATABASE IF EXISTS "{database}"'))
+            await conn.execute(text(f'CREATE DATABASE "{database}"'))
+
+    for url in SHARD_URLS.values():
+        engine = create_async_engine(url)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await engine.dispose()
+
+    yield SHARD_URLS
+
+    async with async_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for url in SHARD_URLS.values():
+            await conn.execute(text(f'DROP DATABASE "{make_url(url).database}"'))
+
+
+async def _make_router(urls: dict[str, str]):
+    router = ShardRouter.from_urls(urls)
+    yield router
+    for engine in router.engines.values():
+        async with engine.begin() as conn:
+            await conn.execute(text("DELETE FROM user_profiles"))
+    await router.dispose()
+
+
+@pytest.fixture
+async def router(shard_urls: dict[str, str]):
+    async for router in _make_router(shard_urls):
+        yield router
+
+
+@pytest.fixture
+async def two_shard_router(shard_urls: dict[str, str]):
+    async for router in _make_router({name: shard_urls[name] for name in ["s0", "s1"]}):
+        yield router
+
+
+@pytest.mark.asyncio(loop_scope="session")
+class TestShardedRepository:
+    async def test_rows_land_on_owning_shard(self, router: ShardRouter) -> None:
+        uow = ShardedUnitOfWork(router)
+
+        created = await uow.profiles.add_many([make_profile(i) for i in IDS])
+
+        assert sorted(created) == list(IDS)
+        for name, engine in router.engines.items():
+            ids = await count_rows(engine, "user_profiles")
+            assert ids
+            assert {router.shard_for(i) for i in ids} == {name}
+
+    async def test_single_row_calls(self, router: ShardRouter) -> None:
+        uow = ShardedUnitOfWork(router)
+
+        assert await uow.profiles.add_one_returning(make_profile(7)) == 7
+        assert await uow.profiles.add_one_returning(make_profile(7)) is None
+        assert await uow.profiles.patch_returning(7, {"age": 31}) == 7
+        assert (await uow.profiles.find(7)).age == 31
+        assert await uow.profiles.delete_returning(7) == 7
+        assert await uow.profiles.find(7) is None
+
+    async def test_preference_is_colocated(self, router: ShardRouter) -> None:
+        uow = ShardedUnitOfWork(router)
+        await uow.profiles.add_many([make_profile(i) for i in IDS])
+
+        for i in IDS:
+            assert await uow.preferences.add_one_for_profile(
+                {"telegram_id": i, "sex": "Женский"}
+            ) == (True, i)
+        assert await uow.preferences.add_one_for_profile(
+            {"telegram_id": 1000, "sex": "Женский"}
+        ) == (False, None)
+
+        for name, engine in router.engines.items():
+            ids = await count_rows(engine, "user_preferences")
+            assert {router.shard_for(i) for i in ids} == {name}
+
+    async def test_scatter_gather_reads(self, router: ShardRouter) -> None:
+        uow = ShardedUnitOfWork(router)
+        await uow.profiles.add_many([make_profile(i) for i in IDS])
+
+        found = await uow.profiles.find_many([150, 3, 77, 5000])
+        assert [user.telegram_id for user in found] == [3, 77, 150]
+        assert len(await uow.profiles.find_all()) == len(IDS)
+
+        page = await uow.profiles.find_page(after=None, limit=10)
+        assert [user.telegram_id for user in page] == list(range(1, 11))
+        page = await uow.profiles.find_page(after=195, limit=10)
+        assert [user.telegram_id for user in page] == list(range(196, 201))
+
+        streamed = [
+            user.telegram_id
+            for batch in [b async for b in uow.profiles.stream_all(batch_size=64)]
+            for user in batch
+        ]
+        assert streamed == list(IDS)
+
+    async def test_scatter_gather_mappings(self, router: ShardRouter) -> None:
+        uow = ShardedUnitOfWork(router, mappings=True)
+        await uow.profiles.add_many([make_profile(i) for i in IDS])
+
+        found = await uow.profiles.find_many([150, 3, 77, 5000])
+        assert [user["telegram_id"] for user in found] == [3, 77, 150]
+        page = await uow.profiles.find_page(after=195, limit=10)
+        assert [user["telegram_id"] for user in page] == list(range(196, 201))
+
+        streamed = [
+            user["telegram_id"]
+            for batch in [b async for b in uow.profiles.stream_all(batch_size=64)]
+            for user in batch
+        ]
+        assert streamed == list(IDS)
+
+    async def test_services(
+        self, router: ShardRouter, async_test_session: AsyncSession
+    ) -> None:
+        # Feeds live in the primary database, next to the swipes
+        factory = ServiceFactory(async_test_session, shard_router=router)
+        profiles = factory.get_profiles_services()
+        for i in IDS:
+            sex = "Женский" if i % 2 else "Мужской"
+            await profiles.add_user(UserProfileRecord(**make_profile(i, sex=sex)))
+        await factory.get_preferences_services().add_preference(
+            1, UserPreferencesRead(telegram_id=1, sex="Мужской")
+        )
+
+        page = await profiles.find_users_page(limit=50)
+        assert [user.telegram_id for user in page.items] == list(range(1, 51))
+        page = await profiles.find_users_page(after=page.next_cursor, limit=50)
+        assert [user.telegram_id for user in page.items] == list(range(51, 101))
+
+        candidates = await factory.get_matching_services().find_candidates(1, limit=20)
+        assert [user.telegram_id for user in candidates.items] == list(range(2, 42, 2))
+
+
+@pytest.mark.asyncio(loop_scope="session")
+class TestReshard:
+    async def test_moves_rows_to_new_owner(
+        self, two_shard_router: ShardRouter, router: ShardRouter
+    ) -> None:
+        source = ShardedUnitOfWork(two_shard_router)
+        await source.profiles.add_many([make_profile(i) for i in IDS])
+        for i in IDS[::3]:
+            await source.preferences.add_one_for_profile(
+                {"telegram_id": i, "sex": "Женский"}
+            )
+
+        dry_run = await reshard(two_shard_router, router, batch_size=16, dry_run=True)
+        moved = await reshard(two_shard_router, router, batch_size=16)
+
+        assert moved == dry_run
+        assert {new for _, new in moved} == {"s2"}
+        # Until the new map is deployed, every profile is still read on its old shard
+        found = await source.profiles.find_many(list(IDS))
+        assert len(found) == len(IDS)
+
+        assert await cleanup(router, batch_size=16, dry_run=True) == {
+            old: count for (old, _), count in moved.items()
+        }
+        deleted = await cleanup(router, batch_size=16)
+        assert sum(deleted.values()) == sum(moved.values())
+        profiles, preferences = {}, set()
+        for name, engine in router.engines.items():
+            ids = await count_rows(engine, "user_profiles")
+            assert {router.shard_for(i) for i in ids} == {name}
+            profiles[name] = ids
+            shard_preferences = await count_rows(engine, "user_preferences")
+            assert shard_preferences <= ids
+            preferences |= shard_preferences
+        assert sorted(i for ids in profiles.values() for i in ids) == list(IDS)
+        assert preferences == set(IDS[::3])
+        assert len(profiles["s2"]) == sum(moved.values())
+
+        # Every row is in place, so another run moves nothing
+        assert not await reshard(two_shard_router, router)
+        assert not await cleanup(router)
+        target = ShardedUnitOfWork(router)
+        assert len(await target.profiles.find_many(list(IDS[::3]))) == len(IDS[::3])
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import create_engine
+from app.core.metrics import current_service_method
+from app.core.slow_queries import SlowQueryLog
+
+
+@pytest.fixture
+async def engine():
+    engine = create_engine(settings.DATABASE_URL)
+    yield engine
+    await engine.dispose()
+
+
+async def wait_for_plans(log: SlowQueryLog) -> None:
+    await asyncio.gather(*log._tasks)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+class TestSlowQueryLog:
+    async def test_fast_statements_are_skipped(self, engine) -> None:
+        log = SlowQueryLog(threshold=10.0)
+        log.instrument(engine, "primary")
+
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+        assert log.total == 0
+
+    async def test_explains_slow_select(self, engine) -> None:
+        log = SlowQueryLog(threshold=0.0, explain_rate=1.0)
+        log.instrument(engine, "primary")
+
+        token = current_service_method.set("profiles.find_user")
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(
+                    text("SELECT telegram_id FROM user_profiles WHERE age > :age"),
+                    {"age": 30},
+                )
+        finally:
+            current_service_method.reset(token)
+        await wait_for_plans(log)
+
+        entry = log.stats()["entries"][0]
+        assert entry["database"] == "primary"
+        assert entry["service_method"] == "profiles.find_user"
+        assert entry["statement"] == (
+            "SELECT telegram_id FROM user_profiles WHERE age > ?"
+        )
+        assert entry["parameters"] == ["int"]
+        assert "actual time" in entry["plan"]
+        # The EXPLAIN itself is not logged
+        assert log.total == 1
+
+    async def test_writes_are_not_explained(self, engine) -> None:
+        log = SlowQueryLog(threshold=0.0, explain_rate=1.0)
+        log.instrument(engine, "primary")
+
+        async with engine.begin() as conn:
+            await conn.execute(text("DELETE FROM user_profiles WHERE telegram_id = -1"))
+        await wait_for_plans(log)
+
+        assert log.total == 1
+        assert log.stats()["entries"][0]["plan"] is None
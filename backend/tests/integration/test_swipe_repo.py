@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.models.swipe_model import SWIPE_PARTITIONS
+from app.repositories.swipe_repository import SwipeRepository
+from app.services.swipe_service import swipe_writer
+
+
+def make_swipe(swiper_id: int, swipee_id: int, liked: bool = True) -> dict:
+    return {"swiper_id": swiper_id, "swipee_id": swipee_id, "liked": liked}
+
+
+@pytest.fixture
+async def clear_swipes(async_engine: AsyncEngine) -> None:
+    async with async_engine.begin() as conn:
+        await conn.execute(text("DELETE FROM swipes"))
+
+
+@pytest.fixture
+async def repo(async_test_session: AsyncSession) -> SwipeRepository:
+    return SwipeRepository(async_test_session)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.usefixtures("clear_swipes")
+class TestSwipeRepository:
+    async def test_rows_spread_over_partitions(
+        self, async_test_session: AsyncSession, repo: SwipeRepository
+    ) -> None:
+        await repo.add_many([make_swipe(i, i + 1) for i in range(1, 201)])
+
+        res = await async_test_session.execute(
+            text("SELECT tableoid::regclass::text, count(*) FROM swipes GROUP BY 1")
+        )
+        counts = dict(res.all())
+        assert len(counts) == SWIPE_PARTITIONS
+        assert sum(counts.values()) == 200
+
+    async def test_first_decision_wins(self, repo: SwipeRepository) -> None:
+        await repo.add_many([make_swipe(1, 2, liked=False)])
+        await repo.add_many([make_swipe(1, 2), make_swipe(1, 3)])
+
+        assert await repo.find_decisions(1, 2) == (False, None)
+        assert await repo.find_decisions(1, 3) == (True, None)
+
+    async def test_find_decisions(self, repo: SwipeRepository) -> None:
+        await repo.add_many([make_swipe(1, 2), make_swipe(3, 1, liked=False)])
+
+        assert await repo.find_decisions(1, 2) == (True, None)
+        assert await repo.find_decisions(2, 1) == (None, True)
+        assert await repo.find_decisions(1, 3) == (None, False)
+        assert await repo.find_decisions(1, 4) == (None, None)
+
+    async def test_add_many_empty(self, repo: SwipeRepository) -> None:
+        await repo.add_many([])
+
+    async def test_writer_commits_batch(self, async_engine: AsyncEngine) -> None:
+        write = swipe_writer(async_sessionmaker(async_engine))
+        await write([make_swipe(1, 2), make_swipe(2, 1)])
+        # Written again after a flush whose outcome was unknown
+        await write([make_swipe(1, 2), make_swipe(2, 1)])
+
+        async with async_engine.connect() as conn:
+            res = await conn.execute(text("SELECT count(*) FROM swipes"))
+            assert res.scalar_one() == 2
@@ -1,9 +1,12 @@
 import pytest
-from sqlalchemy import inspect
+from sqlalchemy import inspect, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.user_model import UserProfileOrm
+from app.models.user_model import SexEnumDB, UserProfileOrm, has_pg_trgm
+from app.repositories.preferences_repository import UserPreferenceRepository
 from app.repositories.profile_repository import UserProfileRepository
+from app.schemas.user_schema import UserProfileRead
+from app.utils.geo import Circle, geohash
 
 
 @pytest.fixture
@@ -11,6 +14,14 @@ async def repo(async_test_session: AsyncSession) -> UserProfileRepository:
     return UserProfileRepository(async_test_session)
 
 
+@pytest.fixture
+async def text_search(async_test_session: AsyncSession) -> None:
+    # Under SQL_ASCII, the text search parser takes Cyrillic for non-letters
+    res = await async_test_session.execute(text("SHOW server_encoding"))
+    if res.scalar_one() != "UTF8":
+        pytest.skip("Text search needs a UTF8 database")
+
+
 @pytest.fixture
 async def new_user(
     async_test_session: AsyncSession, repo: UserProfileRepository
@@ -75,6 +86,285 @@ class TestUserProfileRepository:
         assert res[1][0].city == "Эдем"
         assert res[1][0].sex == "Женский"
 
+    async def test_find_page(self, repo: UserProfileRepository) -> None:
+        for telegram_id in (3, 1, 2):
+            await repo.add_one(
+                {
+                    "telegram_id": telegram_id,
+                    "name": "Юзер",
+                    "age": 20,
+                    "city": "Москва",
+                    "sex": "Мужской",
+                }
+            )
+
+        first_page = await repo.find_page(after=None, limit=2)
+        assert [user.telegram_id for user in first_page] == [1, 2]
+
+        second_page = await repo.find_page(after=2, limit=2)
+        assert [user.telegram_id for user in second_page] == [3]
+
+    async def test_stream_all(self, repo: UserProfileRepository) -> None:
+        for telegram_id in range(1, 6):
+            await repo.add_one(
+                {
+                    "telegram_id": telegram_id,
+                    "name": "Юзер",
+                    "age": 20,
+                    "city": "Москва",
+                    "sex": "Мужской",
+                }
+            )
+
+        batches = [
+            [user.telegram_id for user in batch]
+            async for batch in repo.stream_all(batch_size=2)
+        ]
+        assert batches == [[1, 2], [3, 4], [5]]
+
+    async def test_find_candidates(
+        self,
+        async_test_session: AsyncSession,
+        repo: UserProfileRepository,
+    ) -> None:
+        preferences = UserPreferenceRepository(async_test_session)
+        profiles = [
+            # telegram_id, sex, city, age, preference
+            (1, "Мужской", "Москва", 25, "Женский"),
+            (2, "Женский", "Москва", 24, "Мужской"),
+            (3, "Женский", "Москва", 24, "Женский"),
+            (4, "Женский", "Москва", 24, None),
+            (5, "Женский", "Казань", 24, "Мужской"),
+            (6, "Мужской", "Москва", 24, "Мужской"),
+            (7, "Женский", "Москва", 40, "Мужской"),
+            (8, "Женский", "Москва", 26, "Не указан"),
+        ]
+        for telegram_id, sex, city, age, preference in profiles:
+            await repo.add_one(
+                {
+                    "telegram_id": telegram_id,
+                    "name": "Юзер",
+                    "age": age,
+                    "city": city,
+                    "sex": sex,
+                }
+            )
+            if preference is not None:
+                await preferences.add_one(
+                    {"telegram_id": telegram_id, "sex": preference}
+                )
+        await async_test_session.flush()
+
+        user, preference = await repo.find_with_preference(1)
+        assert user.telegram_id == 1
+        assert preference == SexEnumDB.female
+
+        candidates = await repo.find_candidates(
+            id=1,
+            city="Москва",
+            sexes=[SexEnumDB.female],
+            accepted_by=[SexEnumDB.unspecified, SexEnumDB.male],
+            age_min=20,
+            age_max=30,
+            after=None,
+            limit=10,
+        )
+        assert [c.telegram_id for c in candidates] == [2, 4, 8]
+
+        candidates = await repo.find_candidates(
+            id=1,
+            city="Москва",
+            sexes=[SexEnumDB.female],
+            accepted_by=[SexEnumDB.unspecified, SexEnumDB.male],
+            age_min=20,
+            age_max=30,
+            after=2,
+            limit=1,
+        )
+        assert [c.telegram_id for c in candidates] == [4]
+
+    async def test_find_candidates_near(
+        self, async_test_session: AsyncSession, repo: UserProfileRepository
+    ) -> None:
+        profiles = [
+            # telegram_id, city, latitude, longitude
+            (1, "Москва", 55.7558, 37.6173),
+            (2, "Химки", 55.8970, 37.4297),  # 19 km away
+            (3, "Москва", 55.7520, 37.6175),  # 0.4 km away
+            (4, "Москва", None, None),
+            (5, "Подольск", 55.4312, 37.5458),  # 36 km away
+            (6, "Казань", 55.7963, 49.1088),  # 720 km away
+        ]
+        for telegram_id, city, latitude, longitude in profiles:
+            await repo.add_one(
+                {
+                    "telegram_id": telegram_id,
+                    "name": "Юзер",
+                    "age": 25,
+                    "city": city,
+                    "sex": "Женский",
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "geohash": None
+                    if latitude is None
+                    else geohash(latitude, longitude),
+                }
+            )
+        await async_test_session.flush()
+
+        async def near(radius_km: float) -> list[int]:
+            candidates = await repo.find_candidates(
+                id=1,
+                city=None,
+                sexes=[SexEnumDB.female],
+                accepted_by=list(SexEnumDB),
+                age_min=20,
+                age_max=30,
+                after=None,
+                limit=10,
+                near=Circle(55.7558, 37.6173, radius_km),
+            )
+            return [c.telegram_id for c in candidates]
+
+        assert await near(1) == [3]
+        assert await near(20) == [2, 3]
+        assert await near(50) == [2, 3, 5]
+        assert await near(500) == [2, 3, 5]
+
+    @pytest.mark.usefixtures("text_search")
+    async def test_search(
+        self, async_test_session: AsyncSession, repo: UserProfileRepository
+    ) -> None:
+        profiles = [
+            # telegram_id, name, about_me
+            (1, "Мария", "Люблю программирование и горы"),
+            (2, "Программист Олег", None),
+            (3, "Анна", "Пишу программы"),
+            (4, "Ольга", "Рисую"),
+            (5, "Иван", "Программирую по ночам"),
+        ]
+        for telegram_id, name, about_me in profiles:
+            await repo.add_one(
+                {
+                    "telegram_id": telegram_id,
+                    "name": name,
+                    "about_me": about_me,
+                    "age": 25,
+                    "city": "Москва",
+                    "sex": "Женский",
+                }
+            )
+        await async_test_session.flush()
+
+        found = await repo.search("программа", after=None, limit=10)
+        # Stemmed: "программы" matches, "программирование" does not
+        assert [user.telegram_id for user, _ in found] == [3]
+
+        found = await repo.search("программист or программы", after=None, limit=10)
+        # A name match ranks above an about_me one
+        assert [user.telegram_id for user, _ in found] == [2, 3]
+        assert found[0][1] > found[1][1]
+
+        assert await repo.search("рисую -олег", after=None, limit=10)
+        assert await repo.search("олег -программист", after=None, limit=10) == []
+
+    @pytest.mark.usefixtures("text_search")
+    async def test_search_pages(
+        self, async_test_session: AsyncSession, repo: UserProfileRepository
+    ) -> None:
+        for telegram_id in range(1, 8):
+            await repo.add_one(
+                {
+                    "telegram_id": telegram_id,
+                    "name": "Юзер",
+                    # Profiles 1 and 2 match twice, the rest tie
+                    "about_me": "Горы и горы" if telegram_id <= 2 else "Горы",
+                    "age": 25,
+                    "city": "Москва",
+                    "sex": "Женский",
+                }
+            )
+        await async_test_session.flush()
+
+        pages = []
+        after = None
+        while True:
+            found = await repo.search("горы", after=after, limit=3)
+            if not found:
+                break
+            pages.append([user.telegram_id for user, _ in found])
+            user, rank = found[-1]
+            after = (rank, user.telegram_id)
+        assert pages == [[1, 2, 3], [4, 5, 6], [7]]
+
+        # Counting stops at the limit
+        assert await repo.count_matches("горы", limit=4) == 4
+        assert await repo.count_matches("горы", limit=100) == 7
+        assert await repo.count_matches("равнины", limit=100) == 0
+
+    @pytest.mark.usefixtures("text_search")
+    async def test_search_fuzzy(
+        self, async_test_session: AsyncSession, repo: UserProfileRepository
+    ) -> None:
+        if not await async_test_session.run_sync(has_pg_trgm):
+            pytest.skip("The server does not ship pg_trgm")
+        for telegram_id, name in ((1, "Александр"), (2, "Алексей"), (3, "Мария")):
+            await repo.add_one(
+                {
+                    "telegram_id": telegram_id,
+                    "name": name,
+                    "age": 25,
+                    "city": "Москва",
+                    "sex": "Женский",
+                }
+            )
+        await async_test_session.flush()
+
+        # A typo still finds the name, a closer name ranks higher
+        assert await repo.search("Алексндр", after=None, limit=10) == []
+        found = await repo.search("Алексндр", after=None, limit=10, fuzzy=True)
+        assert [user.telegram_id for user, _ in found][0] == 1
+        assert 3 not in [user.telegram_id for user, _ in found]
+
+        # Only the plain words of the query are compared with the names
+        found = await repo.search('"Алексндр" -Мария', after=None, limit=10, fuzzy=True)
+        assert [user.telegram_id for user, _ in found][0] == 1
+        assert 3 not in [user.telegram_id for user, _ in found]
+
+    async def test_find_many(self, repo: UserProfileRepository) -> None:
+        for telegram_id in (1, 2, 3):
+            await repo.add_one(
+                {
+                    "telegram_id": telegram_id,
+                    "name": "Юзер",
+                    "age": 20,
+                    "city": "Москва",
+                    "sex": "Мужской",
+                }
+            )
+
+        users = await repo.find_many([3, 1, 100])
+        assert [user.telegram_id for user in users] == [1, 3]
+
+        assert await repo.find_many([]) == []
+
+    async def test_add_many(self, repo: UserProfileRepository) -> None:
+        rows = [
+            {
+                "telegram_id": telegram_id,
+                "name": "Юзер",
+                "about_me": None,
+                "age": 20,
+                "city": "Москва",
+                "sex": "Мужской",
+            }
+            for telegram_id in (1, 2, 1)
+        ]
+
+        assert sorted(await repo.add_many(rows)) == [1, 2]
+        assert await repo.add_many(rows[:1] + [{**rows[0], "telegram_id": 3}]) == [3]
+        assert await repo.add_many([]) == []
+
     async def test_find_success(
         self,
         repo: UserProfileRepository,
@@ -106,6 +396,66 @@ class TestUserProfileRepository:
 
         assert user.name == "Новый юзер"
 
+    async def test_add_one_returning(self, repo: UserProfileRepository) -> None:
+        user = {
+            "telegram_id": 10,
+            "name": "Адам",
+            "age": 99,
+            "city": "Эдем",
+            "sex": "Мужской",
+        }
+
+        assert await repo.add_one_returning(user) == 10
+        assert await repo.add_one_returning(user) is None
+
+    async def test_patch_returning(
+        self,
+        repo: UserProfileRepository,
+        new_user: UserProfileOrm,
+    ) -> None:
+        telegram_id = new_user.telegram_id
+
+        assert await repo.patch_returning(telegram_id, {"age": 42}) == telegram_id
+        assert await repo.patch_returning(telegram_id, {}) == telegram_id
+        assert await repo.patch_returning(0, {"age": 42}) is None
+        assert await repo.patch_returning(0, {}) is None
+
+        await repo.session.refresh(new_user)
+        assert new_user.age == 42
+
+    async def test_delete_returning(
+        self,
+        async_test_session: AsyncSession,
+        repo: UserProfileRepository,
+        new_user: UserProfileOrm,
+    ) -> None:
+        telegram_id = new_user.telegram_id
+        preferences = UserPreferenceRepository(async_test_session)
+        await preferences.add_one({"telegram_id": telegram_id, "sex": "Женский"})
+        await async_test_session.flush()
+
+        assert await repo.delete_returning(telegram_id) == telegram_id
+        assert await repo.delete_returning(telegram_id) is None
+        assert await repo.find_many([telegram_id]) == []
+
+    async def test_add_preference_for_profile(
+        self,
+        async_test_session: AsyncSession,
+        new_user: UserProfileOrm,
+    ) -> None:
+        telegram_id = new_user.telegram_id
+        preferences = UserPreferenceRepository(async_test_session)
+        preference = {"telegram_id": telegram_id, "sex": "Женский"}
+
+        assert await preferences.add_one_for_profile(preference) == (
+            True,
+            telegram_id,
+        )
+        assert await preferences.add_one_for_profile(preference) == (True, None)
+        assert await preferences.add_one_for_profile(
+            {"telegram_id": 0, "sex": "Женский"}
+        ) == (False, None)
+
     async def test_delete_success(
         self,
         async_test_session: AsyncSession,
@@ -115,3 +465,87 @@ class TestUserProfileRepository:
         await repo.delete(new_user)
         await async_test_session.flush()
         assert inspect(new_user).deleted is True
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.usefixtures("clear_db")
+class TestMappingsReadMode:
+    @pytest.fixture
+    async def mappings_repo(
+        self, async_test_session: AsyncSession, repo: UserProfileRepository
+    ) -> UserProfileRepository:
+        for telegram_id in (3, 1, 2):
+            await repo.add_one(
+                {
+                    "telegram_id": telegram_id,
+                    "name": "Юзер",
+                    "age": 20 + telegram_id,
+                    "city": "Москва",
+                    "sex": "Женский",
+                }
+            )
+        await async_test_session.flush()
+        # The ORM objects stay in the identity map, reads must not return them
+        return UserProfileRepository(async_test_session, mappings=True)
+
+    async def test_find(self, mappings_repo: UserProfileRepository) -> None:
+        user = await mappings_repo.find(2)
+        assert user == {
+            "telegram_id": 2,
+            "name": "Юзер",
+            "about_me": None,
+            "age": 22,
+            "city": "Москва",
+            "sex": SexEnumDB.female,
+        }
+        assert type(user) is dict
+        assert await mappings_repo.find(100) is None
+
+    async def test_find_page(self, mappings_repo: UserProfileRepository) -> None:
+        page = await mappings_repo.find_page(after=1, limit=10)
+        assert [user["telegram_id"] for user in page] == [2, 3]
+
+    async def test_find_all(self, mappings_repo: UserProfileRepository) -> None:
+        users = await mappings_repo.find_all()
+        assert sorted(user["telegram_id"] for user in users) == [1, 2, 3]
+
+    async def test_find_many(self, mappings_repo: UserProfileRepository) -> None:
+        users = await mappings_repo.find_many([3, 1, 100])
+        assert [user["telegram_id"] for user in users] == [1, 3]
+
+    async def test_stream_all(self, mappings_repo: UserProfileRepository) -> None:
+        batches = [
+            [user["telegram_id"] for user in batch]
+            async for batch in mappings_repo.stream_all(batch_size=2)
+        ]
+        assert batches == [[1, 2], [3]]
+
+    async def test_find_candidates(self, mappings_repo: UserProfileRepository) -> None:
+        candidates = await mappings_repo.find_candidates(
+            id=1,
+            city="Москва",
+            sexes=[SexEnumDB.female],
+            accepted_by=[SexEnumDB.unspecified, SexEnumDB.male],
+            age_min=20,
+            age_max=30,
+            after=None,
+            limit=10,
+        )
+        assert [c["telegram_id"] for c in candidates] == [2, 3]
+        assert set(candidates[0]) == set(UserProfileRepository.read_columns)
+
+    @pytest.mark.usefixtures("text_search")
+    async def test_search(self, mappings_repo: UserProfileRepository) -> None:
+        found = await mappings_repo.search("юзер", after=(1.0, 0), limit=10)
+        assert [(user["telegram_id"], type(rank)) for user, rank in found] == [
+            (1, float),
+            (2, float),
+            (3, float),
+        ]
+        assert set(found[0][0]) == set(UserProfileRepository.read_columns)
+
+    async def test_validates_into_schema(
+        self, mappings_repo: UserProfileRepository
+    ) -> None:
+        users = await mappings_repo.find_many([1])
+        assert UserProfileRead.model_validate(users[0]).telegram_id == 1
@@ -0,0 +1,96 @@
+import pytest
+
+from app.core.cache import InMemoryCache, QueueCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(clock: FakeClock) -> InMemoryCache:
+    return InMemoryCache(max_size=2, ttl=10, clock=clock)
+
+
+class TestInMemoryCache:
+    async def test_hit_and_miss(self, cache: InMemoryCache):
+        assert await cache.get("a") is None
+        await cache.set("a", b"1")
+        assert await cache.get("a") == b"1"
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    async def test_expiration(self, cache: InMemoryCache, clock: FakeClock):
+        await cache.set("a", b"1")
+        await cache.set("b", b"2", ttl=20)
+        clock.now = 10
+
+        assert await cache.get("a") is None
+        assert await cache.get("b") == b"2"
+        assert cache.stats()["expirations"] == 1
+
+    async def test_lru_eviction(self, cache: InMemoryCache):
+        await cache.set("a", b"1")
+        await cache.set("b", b"2")
+        await cache.get("a")  # "b" becomes the least recently used entry
+        await cache.set("c", b"3")
+
+        assert await cache.get("b") is None
+        assert await cache.get("a") == b"1"
+        assert await cache.get("c") == b"3"
+        assert cache.stats()["evictions"] == 1
+        assert cache.stats()["size"] == 2
+
+    async def test_delete(self, cache: InMemoryCache):
+        await cache.set("a", b"1")
+        await cache.delete("a")
+        await cache.delete("missing")
+
+        assert await cache.get("a") is None
+
+    async def test_non_positive_ttl_is_not_stored(self, cache: InMemoryCache):
+        await cache.set("a", b"1", ttl=0)
+        assert await cache.get("a") is None
+
+
+class TestQueueCache:
+    def test_pops_in_order(self):
+        cache = QueueCache(max_size=2)
+        assert cache.pop(1) is None
+
+        cache.extend(1, [10, 20])
+        assert cache.pop(1) == 10
+        assert cache.pop(1) == 20
+        assert cache.pop(1) is None
+        assert cache.stats()["size"] == 0
+        assert cache.stats()["misses"] == 2
+
+    def test_evicts_least_recently_used_queue(self):
+        cache = QueueCache(max_size=2)
+        cache.extend(1, [10, 11])
+        cache.extend(2, [20])
+        cache.pop(1)
+        cache.extend(3, [30])
+
+        assert cache.pop(2) is None
+        assert cache.pop(1) == 11
+        assert cache.stats()["evictions"] == 1
+
+    def test_delete_and_empty_extend(self):
+        cache = QueueCache(max_size=2)
+        cache.extend(1, [10])
+        cache.extend(2, [])
+        cache.delete(1)
+
+        assert cache.stats()["size"] == 0
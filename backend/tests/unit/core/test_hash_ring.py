@@ -0,0 +1,49 @@
+from collections import Counter
+
+import pytest
+
+from app.core.sharding import HashRing
+
+IDS = range(1, 20_001)
+
+
+class TestHashRing:
+    def test_is_deterministic(self):
+        ring = HashRing(["s0", "s1", "s2"])
+        other = HashRing(["s2", "s0", "s1"])
+
+        assert [ring.shard_for(i) for i in IDS] == [other.shard_for(i) for i in IDS]
+
+    def test_spreads_keys_over_all_shards(self):
+        ring = HashRing(["s0", "s1", "s2", "s3"])
+
+        counts = Counter(ring.shard_for(i) for i in IDS)
+
+        assert set(counts) == {"s0", "s1", "s2", "s3"}
+        for count in counts.values():
+            assert abs(count - len(IDS) / 4) < len(IDS) / 4 * 0.25
+
+    def test_adding_shard_moves_keys_only_to_it(self):
+        before = HashRing(["s0", "s1", "s2"])
+        after = HashRing(["s0", "s1", "s2", "s3"])
+
+        moved = [i for i in IDS if before.shard_for(i) != after.shard_for(i)]
+
+        assert {after.shard_for(i) for i in moved} == {"s3"}
+        assert abs(len(moved) / len(IDS) - 1 / 4) < 0.05
+
+    def test_group_keeps_order(self):
+        ring = HashRing(["s0", "s1"])
+        rows = [{"telegram_id": i} for i in range(1, 101)]
+
+        groups = ring.group(rows, key=lambda row: row["telegram_id"])
+
+        assert sum(len(group) for group in groups.values()) == len(rows)
+        for shard, group in groups.items():
+            ids = [row["telegram_id"] for row in group]
+            assert ids == sorted(ids)
+            assert {ring.shard_for(i) for i in ids} == {shard}
+
+    def test_needs_a_shard(self):
+        with pytest.raises(ValueError):
+            HashRing([])
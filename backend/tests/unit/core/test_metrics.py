@@ -0,0 +1,115 @@
+import pytest
+
+from app.core.metrics import (
+    SERVICE_LATENCY,
+    Histogram,
+    MetricsRegistry,
+    statement_label,
+    timed_methods,
+)
+
+
+class TestHistogram:
+    def test_observe_and_render(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram(
+            "op_seconds", "Op latency.", ("op",), buckets=(0.1, 1.0)
+        )
+
+        histogram.observe(0.05, "read")
+        histogram.observe(0.5, "read")
+        histogram.observe(5.0, "read")
+
+        assert histogram.count("read") == 3
+        assert histogram.count("write") == 0
+        lines = registry.render().splitlines()
+        assert lines[:2] == [
+            "# HELP op_seconds Op latency.",
+            "# TYPE op_seconds histogram",
+        ]
+        assert 'op_seconds_bucket{op="read",le="0.1"} 1' in lines
+        assert 'op_seconds_bucket{op="read",le="1.0"} 2' in lines
+        assert 'op_seconds_bucket{op="read",le="+Inf"} 3' in lines
+        assert 'op_seconds_sum{op="read"} 5.55' in lines
+        assert 'op_seconds_count{op="read"} 3' in lines
+
+    def test_escapes_labels(self):
+        histogram = Histogram("op_seconds", "Op latency.", ("op",), buckets=(1.0,))
+
+        histogram.observe(0.5, 'a"b')
+
+        assert 'op_seconds_count{op="a\\"b"} 1' in histogram.render()
+
+    def test_rejects_wrong_labels(self):
+        histogram = Histogram("op_seconds", "Op latency.", ("op",))
+
+        with pytest.raises(ValueError):
+            histogram.observe(0.5)
+
+    def test_rejects_duplicate_name(self):
+        registry = MetricsRegistry()
+        registry.histogram("op_seconds", "Op latency.")
+
+        with pytest.raises(ValueError):
+            registry.histogram("op_seconds", "Op latency.")
+
+
+class TestStatementLabel:
+    @pytest.mark.parametrize(
+        ("statement", "label"),
+        [
+            (
+                "SELECT user_profiles.name FROM user_profiles WHERE x = $1",
+                "SELECT user_profiles",
+            ),
+            (
+                "INSERT INTO user_preferences (sex) VALUES ($1)",
+                "INSERT user_preferences",
+            ),
+            (
+                "UPDATE user_profiles SET age=$1 RETURNING telegram_id",
+                "UPDATE user_profiles",
+            ),
+            (
+                "DELETE FROM user_profiles WHERE telegram_id = $1",
+                "DELETE user_profiles",
+            ),
+            ("select pg_catalog.version()", "SELECT"),
+        ],
+    )
+    def test_label(self, statement: str, label: str):
+        assert statement_label(statement) == label
+
+
+@timed_methods("fake")
+class FakeService:
+    async def find(self, value: int) -> int:
+        return value
+
+    async def stream(self):
+        for value in range(3):
+            yield value
+
+    async def _private(self) -> None:
+        pass
+
+
+class TestTimedMethods:
+    async def test_coroutine(self):
+        before = SERVICE_LATENCY.count("fake", "find")
+
+        assert await FakeService().find(1) == 1
+
+        assert SERVICE_LATENCY.count("fake", "find") == before + 1
+
+    async def test_async_generator(self):
+        before = SERVICE_LATENCY.count("fake", "stream")
+
+        assert [value async for value in FakeService().stream()] == [0, 1, 2]
+
+        assert SERVICE_LATENCY.count("fake", "stream") == before + 1
+
+    async def test_skips_private_methods(self):
+        await FakeService()._private()
+
+        assert SERVICE_LATENCY.count("fake", "_private") == 0
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+
+class Counter:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self) -> int:
+        self.calls += 1
+        await self.release.wait()
+        return self.calls
+
+
+async def _started(single_flight: SingleFlight) -> None:
+    # Let every task reach the shared call
+    await asyncio.sleep(0)
+    assert len(single_flight) == 1
+
+
+class TestSingleFlight:
+    async def test_concurrent_calls_share_one_call(self):
+        single_flight = SingleFlight()
+        counter = Counter()
+
+        tasks = [
+            asyncio.create_task(single_flight.do("key", counter)) for _ in range(10)
+        ]
+        await _started(single_flight)
+        counter.release.set()
+
+        assert await asyncio.gather(*tasks) == [1] * 10
+        assert counter.calls == 1
+        assert len(single_flight) == 0
+
+    async def test_sequential_calls_are_not_shared(self):
+        single_flight = SingleFlight()
+        counter = Counter()
+        counter.release.set()
+
+        assert await single_flight.do("key", counter) == 1
+        assert await single_flight.do("key", counter) == 2
+
+    async def test_different_keys_are_not_shared(self):
+        single_flight = SingleFlight()
+        counter = Counter()
+        counter.release.set()
+
+        results = await asyncio.gather(
+            single_flight.do("a", counter), single_flight.do("b", counter)
+        )
+        assert sorted(results) == [1, 2]
+
+    async def test_error_is_propagated_to_every_caller(self):
+        single_flight = SingleFlight()
+        calls = 0
+
+        async def failing() -> None:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            *(single_flight.do("key", failing) for _ in range(5)),
+            return_exceptions=True,
+        )
+        assert calls == 1
+        assert all(isinstance(result, ValueError) for result in results)
+        assert len(single_flight) == 0
+
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        single_flight = SingleFlight()
+        counter = Counter()
+
+        first = asyncio.create_task(single_flight.do("key", counter))
+        second = asyncio.create_task(single_flight.do("key", counter))
+        await _started(single_flight)
+
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+        counter.release.set()
+        assert await second == 1
+        assert counter.calls == 1
+
+    async def test_call_is_cancelled_without_callers(self):
+        single_flight = SingleFlight()
+        cancelled = asyncio.Event()
+
+        async def slow() -> None:
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        task = asyncio.create_task(single_flight.do("key", slow))
+        await _started(single_flight)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        await asyncio.sleep(0)
+        assert len(single_flight) == 0
+
+    async def test_forget_starts_a_new_call(self):
+        single_flight = SingleFlight()
+        counter = Counter()
+
+        first = asyncio.create_task(single_flight.do("key", counter))
+        await _started(single_flight)
+        single_flight.forget("key")
+        second = asyncio.create_task(single_flight.do("key", counter))
+        await asyncio.sleep(0)
+
+        counter.release.set()
+        await asyncio.gather(first, second)
+        assert counter.calls == 2
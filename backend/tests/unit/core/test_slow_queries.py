@@ -0,0 +1,56 @@
+from app.core.metrics import current_service_method
+from app.core.slow_queries import SlowQueryLog, normalize_statement, redact_parameters
+
+
+class TestNormalizeStatement:
+    def test_placeholders_and_whitespace(self):
+        statement = "SELECT *\n  FROM user_profiles\n WHERE telegram_id = $1::BIGINT"
+
+        assert normalize_statement(statement) == (
+            "SELECT * FROM user_profiles WHERE telegram_id = ?::BIGINT"
+        )
+
+    def test_folds_repeated_rows(self):
+        statement = (
+            "INSERT INTO t (a, b) VALUES ($1::INTEGER, $2), ($3::INTEGER, $4), "
+            "($5::INTEGER, $6)"
+        )
+
+        assert normalize_statement(statement) == (
+            "INSERT INTO t (a, b) VALUES (?::INTEGER, ?), ..."
+        )
+
+
+class TestRedactParameters:
+    def test_positional(self):
+        assert redact_parameters((1, "Юзер", None)) == ["int", "str", "NoneType"]
+
+    def test_named(self):
+        assert redact_parameters({"name": "Юзер"}) == {"name": "str"}
+
+    def test_executemany(self):
+        assert redact_parameters([(1, "a"), (2, "b")], executemany=True) == {
+            "rows": 2,
+            "first": ["int", "str"],
+        }
+
+
+class TestSlowQueryLog:
+    def test_record(self):
+        log = SlowQueryLog(threshold=0.1, size=2)
+        token = current_service_method.set("profiles.find_user")
+        try:
+            for telegram_id in (1, 2, 3):
+                log.record(None, "primary", "SELECT $1", (telegram_id,), False, 0.25)
+        finally:
+            current_service_method.reset(token)
+
+        stats = log.stats()
+        assert stats["total"] == 3
+        assert len(stats["entries"]) == 2
+        entry = stats["entries"][0]
+        assert entry["service_method"] == "profiles.find_user"
+        assert entry["statement"] == "SELECT ?"
+        assert entry["parameters"] == ["int"]
+        assert entry["duration_ms"] == 250.0
+        assert entry["plan"] is None
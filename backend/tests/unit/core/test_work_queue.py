@@ -0,0 +1,98 @@
+import asyncio
+
+from app.core.work_queue import KeyedWorkQueue
+
+
+class Handler:
+    def __init__(self, failures: int = 0) -> None:
+        self.keys: list[int] = []
+        self.failures = failures
+        self.gate: asyncio.Event | None = None  # Holds the work open while set
+
+    async def __call__(self, key: int) -> None:
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("database is down")
+        self.keys.append(key)
+
+
+class TestKeyedWorkQueue:
+    async def test_handles_keys_in_order(self):
+        handler = Handler()
+        queue = KeyedWorkQueue(handler)
+        queue.start()
+
+        for key in (1, 2, 3):
+            assert queue.submit(key)
+        await asyncio.sleep(0.01)
+
+        assert handler.keys == [1, 2, 3]
+        assert queue.stats()["done"] == 3
+        await queue.close()
+
+    async def test_waiting_key_is_queued_once(self):
+        handler = Handler()
+        queue = KeyedWorkQueue(handler)
+
+        assert queue.submit(1)
+        assert not queue.submit(1)
+        queue.start()
+        await asyncio.sleep(0.01)
+
+        assert handler.keys == [1]
+        await queue.close()
+
+    async def test_key_submitted_while_running_runs_again(self):
+        handler = Handler()
+        handler.gate = asyncio.Event()
+        queue = KeyedWorkQueue(handler, workers=2)
+        queue.start()
+
+        queue.submit(1)
+        await asyncio.sleep(0)
+        assert queue.submit(1)
+        await asyncio.sleep(0.01)
+        # The second worker does not run the key next to the first one
+        assert queue.stats()["running"] == 1
+
+        handler.gate.set()
+        await asyncio.sleep(0.01)
+        assert handler.keys == [1, 1]
+        await queue.close()
+
+    async def test_failure_is_counted_and_work_goes_on(self):
+        handler = Handler(failures=1)
+        queue = KeyedWorkQueue(handler)
+        queue.start()
+
+        queue.submit(1)
+        queue.submit(2)
+        await asyncio.sleep(0.01)
+
+        assert handler.keys == [2]
+        assert queue.stats()["failures"] == 1
+        await queue.close()
+
+    async def test_full_queue_drops_keys(self):
+        queue = KeyedWorkQueue(Handler(), max_pending=1)
+
+        assert queue.submit(1)
+        assert not queue.submit(2)
+        assert queue.stats()["dropped"] == 1
+
+    async def test_close_cancels_stuck_work(self):
+        handler = Handler()
+        handler.gate = asyncio.Event()
+        queue = KeyedWorkQueue(handler)
+        queue.start()
+        queue.submit(1)
+        queue.submit(2)
+        await asyncio.sleep(0)
+
+        await queue.close(timeout=0.01)
+
+        assert handler.keys == []
+        assert len(queue) == 0
+        assert not queue.submit(3)
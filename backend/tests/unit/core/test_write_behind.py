@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+
+from app.core.write_behind import WriteBehindBuffer
+
+
+class Sink:
+    def __init__(self, failures: int = 0) -> None:
+        self.batches: list[list[int]] = []
+        self.failures = failures
+        self.gate: asyncio.Event | None = None  # Holds flushes open while set
+
+    async def __call__(self, batch: list[int]) -> None:
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("database is down")
+        self.batches.append(batch)
+
+
+def make_buffer(sink: Sink, **kwargs) -> WriteBehindBuffer[int]:
+    options = {"max_size": 100, "batch_size": 3, "interval": 0.01} | kwargs
+    return WriteBehindBuffer(sink, key=lambda item: item, **options)
+
+
+class TestWriteBehindBuffer:
+    async def test_flushes_full_batches(self):
+        sink = Sink()
+        buffer = make_buffer(sink, interval=10)
+        buffer.start()
+
+        for item in range(7):
+            assert await buffer.put(item)
+        await asyncio.sleep(0.01)
+
+        assert sink.batches == [[0, 1, 2], [3, 4, 5]]
+        assert len(buffer) == 1
+        await buffer.close()
+        assert sink.batches[-1] == [6]
+
+    async def test_flushes_partial_batch_after_interval(self):
+        sink = Sink()
+        buffer = make_buffer(sink)
+        buffer.start()
+
+        await buffer.put(1)
+        await asyncio.sleep(0.05)
+
+        assert sink.batches == [[1]]
+        assert buffer.stats()["flushed"] == 1
+        await buffer.close()
+
+    async def test_item_is_visible_until_written(self):
+        sink = Sink()
+        sink.gate = asyncio.Event()
+        buffer = make_buffer(sink)
+        buffer.start()
+
+        await buffer.put(1)
+        await asyncio.sleep(0.05)
+        # The flush has started but not finished
+        assert buffer.get(1) == 1
+
+        sink.gate.set()
+        await asyncio.sleep(0.01)
+        assert buffer.get(1) is None
+        await buffer.close()
+
+    async def test_drops_buffered_duplicates(self):
+        buffer = make_buffer(Sink())
+
+        assert await buffer.put(1)
+        assert not await buffer.put(1)
+        assert len(buffer) == 1
+
+    async def test_duplicate_does_not_wait_for_room(self):
+        buffer = make_buffer(Sink(), max_size=1)
+        await buffer.put(1)
+
+        assert not await buffer.put(1, timeout=0.01)
+
+    async def test_put_waits_for_room(self):
+        sink = Sink()
+        sink.gate = asyncio.Event()
+        buffer = make_buffer(sink, max_size=2, batch_size=2)
+        buffer.start()
+        await buffer.put(1)
+        await buffer.put(2)
+
+        put = asyncio.create_task(buffer.put(3))
+        await asyncio.sleep(0.01)
+        assert not put.done()
+
+        sink.gate.set()
+        assert await put
+        assert buffer.stats()["waits"] == 1
+        await buffer.close()
+
+    async def test_put_times_out_when_full(self):
+        buffer = make_buffer(Sink(), max_size=1)
+        await buffer.put(1)
+
+        with pytest.raises(TimeoutError):
+            await buffer.put(2, timeout=0.01)
+
+    async def test_retries_failed_flush(self):
+        sink = Sink(failures=2)
+        buffer = make_buffer(sink)
+        buffer.start()
+
+        await buffer.put(1)
+        await asyncio.sleep(0.2)
+
+        assert sink.batches == [[1]]
+        assert buffer.stats()["failures"] == 2
+        await buffer.close()
+
+    async def test_close_flushes_and_rejects_puts(self):
+        sink = Sink()
+        buffer = make_buffer(sink, interval=10)
+        buffer.start()
+        await buffer.put(1)
+
+        await buffer.close()
+
+        assert sink.batches == [[1]]
+        with pytest.raises(RuntimeError):
+            await buffer.put(2)
+
+    async def test_close_gives_up_after_timeout(self):
+        sink = Sink(failures=1000)
+        buffer = make_buffer(sink)
+        buffer.start()
+        await buffer.put(1)
+
+        await buffer.close(timeout=0.05)
+
+        assert sink.batches == []
+        assert len(buffer) == 1
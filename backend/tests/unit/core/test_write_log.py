@@ -0,0 +1,71 @@
+import pytest
+
+from app.core.write_log import WriteLog
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def write_log(clock: FakeClock) -> WriteLog:
+    return WriteLog(max_age=10, clock=clock)
+
+
+class TestWriteLog:
+    def test_written_since(self, write_log: WriteLog):
+        write_log.record("a")
+        mark = write_log.mark()
+        assert not write_log.written_since("a", mark)
+
+        write_log.record("b")
+        assert write_log.written_since("b", mark)
+        assert not write_log.written_since("a", mark)
+
+    def test_old_writes_are_forgotten(self, write_log: WriteLog, clock: FakeClock):
+        mark = write_log.mark()
+        write_log.record("a")
+        clock.now = 5
+        write_log.record("b")
+        clock.now = 10
+
+        # The read may have missed the forgotten write, whatever its key
+        assert write_log.written_since("c", mark)
+        assert len(write_log) == 1
+
+        mark = write_log.mark()
+        assert not write_log.written_since("a", mark)
+        clock.now = 15
+        assert not write_log.written_since("b", mark)
+        assert len(write_log) == 0
+
+    def test_rewrite_moves_the_key_to_the_end(
+        self, write_log: WriteLog, clock: FakeClock
+    ):
+        write_log.record("a")
+        clock.now = 5
+        write_log.record("b")
+        clock.now = 8
+        write_log.record("a")
+        clock.now = 16
+
+        # "b" is the oldest write now, "a" was written again since
+        assert write_log.written_since("a", 2)
+        assert len(write_log) == 1
+
+    def test_written_within(self, write_log: WriteLog, clock: FakeClock):
+        write_log.record("a")
+        clock.now = 1
+
+        assert write_log.written_within("a", 2)
+        assert not write_log.written_within("a", 1)
+        assert not write_log.written_within("b", 2)
@@ -0,0 +1,71 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from app.repositories.snapshot import ProfileSnapshot  # noqa: E402
+from app.utils.bloom import ScalableBloomFilter  # noqa: E402
+
+
+@pytest.fixture
+def snapshot() -> ProfileSnapshot:
+    snapshot = ProfileSnapshot(capacity=2)
+    profiles = [
+        # telegram_id, age, sex, city, preference
+        (1, 25, "Мужской", "Москва", "Женский"),
+        (2, 24, "Женский", "Москва", "Мужской"),
+        (3, 24, "Женский", "Москва", "Женский"),
+        (4, 24, "Женский", "Москва", None),
+        (5, 24, "Женский", "Казань", "Мужской"),
+        (6, 24, "Мужской", "Москва", "Мужской"),
+        (7, 40, "Женский", "Москва", "Мужской"),
+        (8, 26, "Женский", "Москва", "Не указан"),
+    ]
+    for profile in profiles:
+        snapshot.add_profile(*profile)
+    return snapshot
+
+
+class TestProfileSnapshot:
+    def test_add_grows_capacity(self, snapshot: ProfileSnapshot):
+        assert len(snapshot) == 8
+        assert 8 in snapshot
+        assert snapshot.get_age(7) == 40
+
+    def test_find_candidates(self, snapshot: ProfileSnapshot):
+        ids = snapshot.find_candidates(1, 20, 30, after=None, limit=10)
+        assert ids == [2, 4, 8]
+
+    def test_find_candidates_page(self, snapshot: ProfileSnapshot):
+        assert snapshot.find_candidates(1, 20, 30, after=None, limit=2) == [2, 4]
+        assert snapshot.find_candidates(1, 20, 30, after=4, limit=2) == [8]
+
+    def test_find_candidates_unknown_user(self, snapshot: ProfileSnapshot):
+        assert snapshot.find_candidates(100, 20, 30, after=None, limit=10) is None
+
+    def test_patch_profile(self, snapshot: ProfileSnapshot):
+        snapshot.patch_profile(5, city="Москва")
+        snapshot.patch_profile(7, age=30)
+        ids = snapshot.find_candidates(1, 20, 30, after=None, limit=10)
+        assert ids == [2, 4, 5, 7, 8]
+
+    def test_set_preference(self, snapshot: ProfileSnapshot):
+        snapshot.set_preference(3, "Мужской")
+        snapshot.set_preference(1, "Не указан")
+        ids = snapshot.find_candidates(1, 20, 30, after=None, limit=10)
+        assert ids == [2, 3, 4, 6, 8]
+
+    def test_remove(self, snapshot: ProfileSnapshot):
+        snapshot.remove(2)
+        snapshot.remove(100)
+
+        assert len(snapshot) == 7
+        assert 2 not in snapshot
+        assert snapshot.get_age(8) == 26
+        assert snapshot.find_candidates(1, 20, 30, after=None, limit=10) == [4, 8]
+
+    def test_find_candidates_not_seen(self, snapshot: ProfileSnapshot):
+        seen = ScalableBloomFilter(100, 0.001)
+        seen.update([4, 6])
+
+        ids = snapshot.find_candidates(1, 20, 30, after=None, limit=10, seen=seen)
+        assert ids == [2, 8]
@@ -1,7 +1,9 @@
 import pytest
 from pydantic import ConfigDict, ValidationError
 
+from app.core.config import settings
 from app.schemas.user_schema import (
+    ProfilesBatchGetRequest,
     UserPreferencesCreate,
     UserPreferencesRead,
     UserProfileCreate,
@@ -75,6 +77,18 @@ class TestProfile:
         with pytest.raises(ValidationError):
             UserProfileCreate(**profile_data)
 
+    def test_create_with_location(self, profile_data):
+        user = UserProfileCreate(**profile_data, latitude=55.75, longitude=37.61)
+        assert (user.latitude, user.longitude) == (55.75, 37.61)
+
+    def test_create_invalid_half_location(self, profile_data):
+        with pytest.raises(ValidationError):
+            UserProfileCreate(**profile_data, latitude=55.75)
+
+    def test_create_invalid_latitude(self, profile_data):
+        with pytest.raises(ValidationError):
+            UserProfileCreate(**profile_data, latitude=91, longitude=0)
+
     # UserProfileRead
     def test_read_valid(self, profile_data):
         profile_data["telegram_id"] = 100
@@ -88,6 +102,12 @@ class TestProfile:
         with pytest.raises(ValidationError):
             UserProfileRead(**profile_data)
 
+    def test_read_leaves_out_location(self, profile_data):
+        profile_data["telegram_id"] = 100
+
+        user = UserProfileRead(**profile_data, latitude=55.75, longitude=37.61)
+        assert "latitude" not in user.model_dump()
+
     # UserProfilePatch
     def test_patch_valid(self, profile_data):
         user = UserProfilePatch(**profile_data)
@@ -112,6 +132,17 @@ class TestProfile:
         with pytest.raises(ValidationError):
             UserProfilePatch(**profile_data)
 
+    def test_patch_invalid_half_location(self):
+        with pytest.raises(ValidationError):
+            UserProfilePatch(longitude=37.61)
+
+        with pytest.raises(ValidationError):
+            UserProfilePatch(latitude=None)
+
+    def test_patch_clear_location(self):
+        user = UserProfilePatch(latitude=None, longitude=None)
+        assert user.model_fields_set == {"latitude", "longitude"}
+
 
 class TestPreferences:
     # UserPreferecesCreate
@@ -146,3 +177,24 @@ class TestPreferences:
 
         with pytest.raises(ValidationError):
             UserPreferencesRead(**preference_data)
+
+
+class TestProfilesBatchGet:
+    def test_request_valid(self):
+        request = ProfilesBatchGetRequest(telegram_ids=[3, 1, 2])
+
+        assert request.telegram_ids == [3, 1, 2]
+
+    def test_request_empty(self):
+        with pytest.raises(ValidationError):
+            ProfilesBatchGetRequest(telegram_ids=[])
+
+    def test_request_too_many_ids(self):
+        telegram_ids = list(range(1, settings.MAX_BATCH_GET_IDS + 2))
+
+        with pytest.raises(ValidationError):
+            ProfilesBatchGetRequest(telegram_ids=telegram_ids)
+
+    def test_request_invalid_telegram_id(self):
+        with pytest.raises(ValidationError):
+            ProfilesBatchGetRequest(telegram_ids=[1, -1])
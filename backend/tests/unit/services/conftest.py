@@ -0,0 +1,196 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+
+class FakeProfileRepository:
+    """In-memory stand-in of `UserProfileRepository` that counts its calls."""
+
+    def __init__(self) -> None:
+        self.rows: dict[int, SimpleNamespace] = {}
+        self.calls: dict[str, int] = {}
+        self.gate: asyncio.Event | None = None  # Holds `find` open while set
+
+    def _count(self, name: str) -> None:
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    async def find(self, id: int):
+        self._count("find")
+        if self.gate is not None:
+            await self.gate.wait()
+        return self.rows.get(id)
+
+    async def find_many(self, ids: list[int]) -> list[SimpleNamespace]:
+        self._count("find_many")
+        return [self.rows[id] for id in sorted(ids) if id in self.rows]
+
+    def _matches(self, text: str) -> list[tuple[SimpleNamespace, float]]:
+        # Substring matches, name matches ranked first
+        found = []
+        for user in self.rows.values():
+            if text in user.name.lower():
+                found.append((user, 1.0))
+            elif text in (user.about_me or "").lower():
+                found.append((user, 0.5))
+        found.sort(key=lambda item: (-item[1], item[0].telegram_id))
+        return found
+
+    async def count_matches(self, text: str, limit: int, fuzzy: bool) -> int:
+        self._count("count_matches")
+        return min(len(self._matches(text)), limit)
+
+    async def search(
+        self,
+        text: str,
+        after: tuple[float, int] | None,
+        limit: int,
+        fuzzy: bool,
+    ) -> list[tuple[SimpleNamespace, float]]:
+        self._count("search_fuzzy" if fuzzy else "search")
+        found = self._matches(text)
+        if after is not None:
+            found = [
+                (user, rank)
+                for user, rank in found
+                if (-rank, user.telegram_id) > (-after[0], after[1])
+            ]
+        return found[:limit]
+
+    async def add_one_returning(self, data: dict) -> int | None:
+        self._count("add_one_returning")
+        if data["telegram_id"] in self.rows:
+            return None
+        self.rows[data["telegram_id"]] = SimpleNamespace(**data)
+        return data["telegram_id"]
+
+    async def add_many(self, data: list[dict]) -> list[int]:
+        self._count("add_many")
+        created = []
+        for row in data:
+            if row["telegram_id"] not in self.rows:
+                self.rows[row["telegram_id"]] = SimpleNamespace(**row)
+                created.append(row["telegram_id"])
+        return created
+
+    async def patch_returning(self, id: int, user_update: dict) -> int | None:
+        self._count("patch_returning")
+        user = self.rows.get(id)
+        if user is None:
+            return None
+        for field, value in user_update.items():
+            setattr(user, field, value)
+        return id
+
+    async def delete_returning(self, id: int) -> int | None:
+        self._count("delete_returning")
+        return None if self.rows.pop(id, None) is None else id
+
+
+class FakeSwipeRepository:
+    """In-memory stand-in of `SwipeRepository`."""
+
+    def __init__(self) -> None:
+        self.rows: dict[tuple[int, int], bool] = {}
+
+    async def add_many(self, data: list[dict]) -> None:
+        for row in data:
+            self.rows.setdefault((row["swiper_id"], row["swipee_id"]), row["liked"])
+
+    async def find_decisions(
+        self, swiper_id: int, swipee_id: int
+    ) -> tuple[bool | None, bool | None]:
+        return self.rows.get((swiper_id, swipee_id)), self.rows.get(
+            (swipee_id, swiper_id)
+        )
+
+
+class FakeFeedRepository:
+    """In-memory stand-in of `FeedRepository`."""
+
+    def __init__(self) -> None:
+        self.queues: dict[int, list[int]] = {}
+        self.cursors: dict[int, int | None] = {}
+        self.versions: dict[int, int] = {}
+        self.pushes = 0
+        self.pops = 0
+
+    async def pop(self, user_id: int, limit: int) -> list[int]:
+        self.pops += 1
+        queue = self.queues.get(user_id, [])
+        claimed, self.queues[user_id] = queue[:limit], queue[limit:]
+        return claimed
+
+    async def count(self, user_id: int, limit: int) -> int:
+        return min(len(self.queues.get(user_id, [])), limit)
+
+    async def lock(self, user_id: int) -> tuple[int | None, int]:
+        if user_id not in self.cursors:
+            self.pushes += 1
+            self.cursors[user_id], self.versions[user_id] = None, self.pushes
+        return self.cursors[user_id], self.versions[user_id]
+
+    async def push(
+        self, user_id: int, candidate_ids: list[int], cursor: int | None
+    ) -> None:
+        queue = self.queues.setdefault(user_id, [])
+        queue += [id for id in candidate_ids if id not in queue]
+        queue.sort()
+        self.pushes += 1
+        self.cursors[user_id], self.versions[user_id] = cursor, self.pushes
+
+    async def reset(self, user_id: int) -> None:
+        self.queues.pop(user_id, None)
+        self.cursors.pop(user_id, None)
+        self.versions.pop(user_id, None)
+        for queue in self.queues.values():
+            if user_id in queue:
+                queue.remove(user_id)
+
+
+class FakeSeenFilterRepository:
+    """In-memory stand-in of `SeenFilterRepository`, with exact sets."""
+
+    def __init__(self) -> None:
+        self.rows: dict[int, set[int]] = {}
+
+    async def get(self, user_id: int, capacity: int, fp_rate: float) -> set[int] | None:
+        return self.rows.get(user_id)
+
+    async def add_many(self, seen: dict, capacity: int, fp_rate: float) -> None:
+        for user_id, ids in seen.items():
+            self.rows.setdefault(user_id, set()).update(ids)
+
+    async def delete(self, user_id: int) -> None:
+        self.rows.pop(user_id, None)
+
+
+class FakeUnitOfWork:
+    def __init__(self) -> None:
+        self.profiles = FakeProfileRepository()
+        self.swipes = FakeSwipeRepository()
+        self.feeds = FakeFeedRepository()
+        self.seen = FakeSeenFilterRepository()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+@pytest.fixture
+def uow() -> FakeUnitOfWork:
+    return FakeUnitOfWork()
+
+
+@pytest.fixture
+def profile_data() -> dict:
+    return {
+        "telegram_id": 1,
+        "name": "Юзер",
+        "about_me": "Какие-нибудь данные",
+        "age": 18,
+        "city": "Москва",
+        "sex": "Мужской",
+    }
@@ -0,0 +1,207 @@
+import pytest
+
+from app.core.cache import QueueCache
+from app.core.work_queue import KeyedWorkQueue
+from app.core.write_behind import WriteBehindBuffer
+from app.schemas.user_schema import (
+    SwipeCreate,
+    UserPreferencesRead,
+    UserProfilePatch,
+    UserProfileRecord,
+)
+from app.services.exceptions import EntityNotFoundException
+from app.services.feed_service import FeedService
+from app.services.preferences_service import UserPreferencesService
+from app.services.profile_service import UserProfilesService
+from app.services.swipe_service import SwipeService, swipe_key
+
+
+class FakeMatching:
+    """Stand-in of `MatchingService` where everyone matches everyone."""
+
+    def __init__(self, uow) -> None:
+        self.uow = uow
+        self.calls = 0
+
+    async def find_candidate_ids(
+        self, telegram_id: int, after_id: int | None, limit: int, seen=None
+    ) -> list[int]:
+        self.calls += 1
+        if telegram_id not in self.uow.profiles.rows:
+            raise EntityNotFoundException("User not found.")
+        ids = sorted(
+            id
+            for id in self.uow.profiles.rows
+            if id != telegram_id
+            and (after_id is None or id > after_id)
+            and (seen is None or id not in seen)
+        )
+        return ids[:limit]
+
+
+@pytest.fixture
+def users(uow, profile_data) -> list[int]:
+    for telegram_id in range(1, 8):
+        uow.profiles.rows[telegram_id] = type(
+            "Row", (), profile_data | {"telegram_id": telegram_id}
+        )()
+    return list(range(1, 8))
+
+
+class FakePreferenceRepository:
+    async def add_one_for_profile(self, data: dict) -> tuple[bool, int | None]:
+        return True, data["telegram_id"]
+
+
+def make_service(uow, **kwargs) -> FeedService:
+    options = {"queue_size": 3, "low_water_mark": 2, "fetch_size": 2} | kwargs
+    return FeedService(uow, FakeMatching(uow), UserProfilesService(uow), **options)
+
+
+@pytest.mark.usefixtures("users")
+class TestFeedService:
+    async def test_empty_queue_is_refilled_inline(self, uow):
+        service = make_service(uow)
+
+        assert await service.next_candidate_id(1) == 2
+        assert uow.feeds.queues[1] == [3, 4]
+        assert uow.feeds.cursors[1] == 4
+
+    async def test_never_serves_a_candidate_twice(self, uow):
+        service = make_service(uow)
+
+        served = [await service.next_candidate_id(1) for _ in range(7)]
+        assert served == [2, 3, 4, 5, 6, 7, None]
+        assert uow.seen.rows[1] == {2, 3, 4, 5, 6, 7}
+
+    async def test_new_profile_is_served_once_all_were_seen(self, uow, profile_data):
+        service = make_service(uow)
+        for _ in range(6):
+            await service.next_candidate_id(1)
+
+        await UserProfilesService(uow).add_user(
+            UserProfileRecord(**profile_data | {"telegram_id": 8})
+        )
+        assert await service.next_candidate_id(1) == 8
+        assert await service.next_candidate_id(1) is None
+
+    async def test_swiped_candidates_are_left_out(self, uow):
+        await SwipeService(uow).swipe(1, SwipeCreate(swipee_id=2, liked=True))
+        buffer = WriteBehindBuffer(uow.swipes.add_many, key=swipe_key)
+        await buffer.put({"swiper_id": 1, "swipee_id": 3, "liked": False})
+        service = make_service(uow, swipe_buffer=buffer)
+
+        assert await service.refill(1) == 3
+        assert uow.feeds.queues[1] == [4, 5, 6]
+
+    async def test_candidates_claimed_during_search_are_dropped(self, uow):
+        service = make_service(uow)
+        await uow.feeds.lock(1)
+        await uow.feeds.push(1, [2], cursor=None)
+        search = service.matching.find_candidate_ids
+
+        async def claim_then_search(*args, **kwargs):
+            assert await service.next_candidate_id(1) == 2
+            return await search(*args, **kwargs)
+
+        service.matching.find_candidate_ids = claim_then_search
+
+        assert await service.refill(1) == 1
+        assert uow.feeds.queues[1] == [3]
+
+    async def test_refill_gives_up_after_concurrent_push(self, uow):
+        service = make_service(uow)
+        search = service.matching.find_candidate_ids
+
+        async def push_then_search(*args, **kwargs):
+            await uow.feeds.push(1, [7], cursor=7)
+            return await search(*args, **kwargs)
+
+        service.matching.find_candidate_ids = push_then_search
+
+        assert await service.refill(1) == 0
+        assert uow.feeds.queues[1] == [7]
+        assert uow.feeds.cursors[1] == 7
+
+    async def test_no_candidate_left(self, uow):
+        uow.profiles.rows = {1: uow.profiles.rows[1]}
+        service = make_service(uow)
+
+        assert await service.next_candidate_id(1) is None
+        assert await service.next_candidate_json(1) is None
+
+    async def test_unknown_user(self, uow):
+        with pytest.raises(EntityNotFoundException):
+            await make_service(uow).next_candidate_id(99)
+
+    async def test_front_cache_saves_round_trips(self, uow):
+        service = make_service(uow, queue_size=10, cache=QueueCache(max_size=10))
+
+        assert [await service.next_candidate_id(1) for _ in range(4)] == [2, 3, 4, 5]
+        # The pops of 2 and 4 claimed two candidates each, after the empty pop
+        assert uow.feeds.pops == 3
+
+    async def test_low_queue_requests_background_refill(self, uow):
+        refiller = KeyedWorkQueue(lambda key: None)
+        service = make_service(uow, queue_size=4, refiller=refiller)
+        await service.refill(1)
+
+        await service.next_candidate_id(1)
+        assert len(refiller) == 0
+        await service.next_candidate_id(1)
+        await service.next_candidate_id(1)
+        assert len(refiller) == 1
+
+    async def test_deleted_candidate_is_skipped(self, uow):
+        service = make_service(uow)
+        await service.refill(1)
+        del uow.profiles.rows[2]
+
+        candidate = await service.next_candidate_json(1)
+        assert b'"telegram_id":3' in candidate
+
+
+@pytest.mark.usefixtures("users")
+class TestFeedInvalidation:
+    async def test_matching_patch_resets_feeds(self, uow):
+        feeds = make_service(uow, cache=QueueCache(max_size=10))
+        await feeds.next_candidate_id(1)
+        await feeds.refill(2)
+        profiles = UserProfilesService(uow, feeds=feeds)
+
+        await profiles.patch_user(1, UserProfilePatch(city="Казань"))
+
+        assert 1 not in uow.feeds.queues
+        assert 1 not in uow.feeds.queues[2]
+        assert feeds.cache.pop(1) is None
+
+    async def test_delete_forgets_seen_profiles(self, uow):
+        feeds = make_service(uow)
+        await feeds.next_candidate_id(1)
+        profiles = UserProfilesService(uow, feeds=feeds)
+
+        await profiles.delete_user(1)
+
+        assert 1 not in uow.seen.rows
+        assert 1 not in uow.feeds.queues
+
+    async def test_other_patch_keeps_feeds(self, uow):
+        feeds = make_service(uow)
+        await feeds.refill(1)
+        profiles = UserProfilesService(uow, feeds=feeds)
+
+        await profiles.patch_user(1, UserProfilePatch(name="Другой"))
+
+        assert uow.feeds.queues[1] == [2, 3, 4]
+
+    async def test_preference_resets_feed(self, uow):
+        feeds = make_service(uow)
+        await feeds.refill(1)
+        uow.preferences = FakePreferenceRepository()
+        preferences = UserPreferencesService(uow, feeds=feeds)
+
+        await preferences.add_preference(
+            1, UserPreferencesRead(telegram_id=1, sex="Женский")
+        )
+
+        assert 1 not in uow.feeds.queues
@@ -0,0 +1,13 @@
+from app.models.user_model import SexEnumDB
+from app.services.matching_service import matching_sexes
+
+
+class TestMatchingSexes:
+    def test_specific_preference(self):
+        assert matching_sexes(SexEnumDB.female) == [SexEnumDB.female]
+
+    def test_unspecified_preference_accepts_anyone(self):
+        assert matching_sexes(SexEnumDB.unspecified) == list(SexEnumDB)
+
+    def test_missing_preference_accepts_anyone(self):
+        assert matching_sexes(None) == list(SexEnumDB)
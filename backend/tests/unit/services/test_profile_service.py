@@ -0,0 +1,438 @@
+import asyncio
+import contextlib
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.cache import InMemoryCache
+from app.core.singleflight import SingleFlight
+from app.core.write_log import WriteLog
+from app.schemas.user_schema import (
+    UserProfilePatch,
+    UserProfileRead,
+    UserProfileRecord,
+)
+from app.services.exceptions import (
+    EntityAlreadyExistsException,
+    EntityNotFoundException,
+    QueryTooBroadException,
+)
+from app.services.profile_service import UserProfilesService
+from app.utils.geo import geohash
+
+
+@pytest.fixture
+def cache() -> InMemoryCache:
+    return InMemoryCache(max_size=10, ttl=60)
+
+
+@pytest.fixture
+async def service(uow, cache: InMemoryCache, profile_data: dict) -> UserProfilesService:
+    service = UserProfilesService(uow=uow, cache=cache)
+    await service.add_user(UserProfileRecord(**profile_data))
+    return service
+
+
+class TestProfileWrites:
+    async def test_add_existing_user(self, service: UserProfilesService, profile_data):
+        with pytest.raises(EntityAlreadyExistsException):
+            await service.add_user(UserProfileRecord(**profile_data))
+
+    async def test_patch_missing_user(self, service: UserProfilesService):
+        with pytest.raises(EntityNotFoundException):
+            await service.patch_user(2, UserProfilePatch(name="Новое имя"))
+
+    async def test_delete_missing_user(self, service: UserProfilesService):
+        with pytest.raises(EntityNotFoundException):
+            await service.delete_user(2)
+
+    async def test_location_sets_geohash(self, service: UserProfilesService, uow):
+        assert uow.profiles.rows[1].geohash is None
+
+        await service.patch_user(1, UserProfilePatch(latitude=55.75, longitude=37.61))
+        assert uow.profiles.rows[1].geohash == geohash(55.75, 37.61)
+
+        await service.patch_user(1, UserProfilePatch(name="Новое имя"))
+        assert uow.profiles.rows[1].geohash == geohash(55.75, 37.61)
+
+        await service.patch_user(1, UserProfilePatch(latitude=None, longitude=None))
+        assert uow.profiles.rows[1].latitude is None
+        assert uow.profiles.rows[1].geohash is None
+
+    async def test_location_is_not_read_back(
+        self, service: UserProfilesService, uow, profile_data: dict
+    ):
+        location = {"latitude": 55.75, "longitude": 37.61}
+        await service.import_users(
+            _rows({**profile_data, "telegram_id": 2, **location})
+        )
+        assert uow.profiles.rows[2].geohash == geohash(55.75, 37.61)
+
+        user = await service.find_user_json(2)
+        assert b"latitude" not in user
+        assert b"longitude" not in user
+
+    async def test_writes_are_single_statements(
+        self, service: UserProfilesService, uow
+    ):
+        await service.patch_user(1, UserProfilePatch(name="Новое имя"))
+        await service.delete_user(1)
+
+        assert "find" not in uow.profiles.calls
+        assert uow.profiles.calls == {
+            "add_one_returning": 1,
+            "patch_returning": 1,
+            "delete_returning": 1,
+        }
+
+
+async def _rows(*rows):
+    for row in rows:
+        yield row
+
+
+class TestProfileImport:
+    async def test_reports_conflicts_and_errors(
+        self, service: UserProfilesService, uow, profile_data: dict
+    ):
+        rows = [
+            {**profile_data, "telegram_id": 2},
+            profile_data,  # Already exists
+            {**profile_data, "telegram_id": 3, "age": 200},
+            {**profile_data, "telegram_id": 2},  # Repeated in the import
+            {**profile_data, "telegram_id": 4},
+        ]
+
+        result = await service.import_users(_rows(*rows), batch_size=2)
+
+        assert result.received == 5
+        assert result.created == 2
+        assert [(c.index, c.telegram_id) for c in result.conflicts] == [(1, 1), (3, 2)]
+        assert [e.index for e in result.errors] == [2]
+        assert "age" in result.errors[0].detail
+        assert set(uow.profiles.rows) == {1, 2, 4}
+        assert uow.profiles.calls["add_many"] == 3
+
+    async def test_validates_raw_json_lines(
+        self, service: UserProfilesService, profile_data: dict
+    ):
+        line = UserProfileRecord(**{**profile_data, "telegram_id": 2}).model_dump_json()
+
+        result = await service.import_users(_rows(line.encode(), b"{not json"))
+
+        assert result.created == 1
+        assert [e.index for e in result.errors] == [1]
+
+    async def test_line_with_two_documents_is_invalid(
+        self, service: UserProfilesService, uow, profile_data: dict
+    ):
+        first, second = (
+            UserProfileRecord(**{**profile_data, "telegram_id": i}).model_dump_json()
+            for i in (2, 3)
+        )
+
+        result = await service.import_users(_rows(f"{first},{second}".encode()))
+
+        assert result.created == 0
+        assert [e.index for e in result.errors] == [0]
+        assert set(uow.profiles.rows) == {1}
+
+    async def test_lines_are_not_joined(
+        self, service: UserProfilesService, uow, profile_data: dict
+    ):
+        first, second, third = (
+            UserProfileRecord(**{**profile_data, "telegram_id": i}).model_dump_json()
+            for i in (2, 3, 4)
+        )
+        # Two halves of one document, joined by a comma they would be whole again
+        cut = first.index(',"age"')
+        lines = [first[:cut], first[cut + 1 :], f"{second},{third}"]
+
+        result = await service.import_users(_rows(*(line.encode() for line in lines)))
+
+        assert result.created == 0
+        assert [e.index for e in result.errors] == [0, 1, 2]
+        assert set(uow.profiles.rows) == {1}
+
+    async def test_invalidates_cached_profiles(
+        self, service: UserProfilesService, cache: InMemoryCache, profile_data: dict
+    ):
+        await cache.set("profile:2", b"stale")
+
+        await service.import_users(_rows({**profile_data, "telegram_id": 2}))
+
+        assert await cache.get("profile:2") is None
+
+
+class TestProfileBatchGet:
+    async def test_keeps_request_order(
+        self, service: UserProfilesService, profile_data: dict
+    ):
+        for telegram_id in (2, 3):
+            await service.add_user(
+                UserProfileRecord(**{**profile_data, "telegram_id": telegram_id})
+            )
+
+        result = await service.find_users_batch([3, 100, 1, 3, 2])
+
+        assert [user.telegram_id for user in result.items] == [3, 1, 2]
+        assert result.missing == [100]
+
+    async def test_reads_only_cache_misses(
+        self, service: UserProfilesService, uow, profile_data: dict
+    ):
+        await service.add_user(UserProfileRecord(**{**profile_data, "telegram_id": 2}))
+        await service.find_user(1)
+
+        result = await service.find_users_batch([1, 2])
+        assert [user.telegram_id for user in result.items] == [1, 2]
+
+        # Both profiles are cached now, so the second call does not query
+        await service.find_users_batch([1, 2])
+        assert uow.profiles.calls["find_many"] == 1
+
+
+class TestProfileSearch:
+    async def test_pages_through_ranked_matches(
+        self, service: UserProfilesService, profile_data: dict
+    ):
+        for telegram_id, name, about_me in (
+            (2, "Анна", "Люблю горы"),
+            (3, "Горыныч", None),
+            (4, "Олег", "Горы"),
+        ):
+            await service.add_user(
+                UserProfileRecord(
+                    **{
+                        **profile_data,
+                        "telegram_id": telegram_id,
+                        "name": name,
+                        "about_me": about_me,
+                    }
+                )
+            )
+
+        pages = []
+        after = None
+        while True:
+            page = await service.search_users("горы", after=after, limit=2)
+            pages.append([user.telegram_id for user in page.items])
+            after = page.next_cursor
+            if after is None:
+                break
+
+        assert pages == [[3, 2], [4]]
+
+    async def test_fuzzy_matching_is_configurable(self, uow):
+        await UserProfilesService(uow=uow, fuzzy_search=False).search_users("a")
+        await UserProfilesService(uow=uow, fuzzy_search=True).search_users("a")
+
+        assert uow.profiles.calls == {
+            "count_matches": 2,
+            "search": 1,
+            "search_fuzzy": 1,
+        }
+
+    async def test_too_broad_query_is_rejected(self, uow, profile_data: dict):
+        service = UserProfilesService(uow=uow, max_search_matches=2)
+        for telegram_id in (1, 2, 3):
+            await service.add_user(
+                UserProfileRecord(**{**profile_data, "telegram_id": telegram_id})
+            )
+
+        with pytest.raises(QueryTooBroadException):
+            await service.search_users("юзер")
+        assert "search" not in uow.profiles.calls
+
+        await service.patch_user(3, UserProfilePatch(name="Другое имя"))
+        page = await service.search_users("юзер")
+        assert [user.telegram_id for user in page.items] == [1, 2]
+
+
+class TestProfileCache:
+    async def test_find_user_is_cached(self, service: UserProfilesService, uow):
+        first = await service.find_user(1)
+        second = await service.find_user(1)
+
+        assert first == second
+        assert uow.profiles.calls["find"] == 1
+
+    async def test_patch_invalidates(self, service: UserProfilesService):
+        await service.find_user(1)
+        await service.patch_user(1, UserProfilePatch(name="Новое имя"))
+
+        user = await service.find_user(1)
+        assert user.name == "Новое имя"
+
+    async def test_delete_invalidates(self, service: UserProfilesService):
+        await service.find_user(1)
+        await service.delete_user(1)
+
+        with pytest.raises(EntityNotFoundException):
+            await service.find_user(1)
+
+    async def test_reads_after_a_write_are_not_cached(self, uow, profile_data: dict):
+        now = [0.0]
+        service = UserProfilesService(
+            uow=uow,
+            cache=InMemoryCache(max_size=10, ttl=60, clock=lambda: now[0]),
+            replica_lag=1.0,
+            write_log=WriteLog(max_age=60, clock=lambda: now[0]),
+        )
+        await service.add_user(UserProfileRecord(**profile_data))
+
+        # The read may come from a replica that has not applied the write yet
+        await service.find_user(1)
+        await service.find_user(1)
+        assert uow.profiles.calls["find"] == 2
+
+        now[0] = 1.5
+        await service.find_users_batch([1])
+        await service.find_user(1)
+        assert uow.profiles.calls["find"] == 2
+
+    async def test_recent_writes_outlive_cache_evictions(self, uow, profile_data: dict):
+        cache = InMemoryCache(max_size=1, ttl=60)
+        service = UserProfilesService(uow=uow, cache=cache, replica_lag=1.0)
+        for telegram_id in (1, 2):
+            await service.add_user(
+                UserProfileRecord(**{**profile_data, "telegram_id": telegram_id})
+            )
+
+        # The second write fills the one-entry cache, the first one still counts
+        await service.find_user(1)
+        assert await cache.get("profile:1") is None
+
+    @pytest.mark.parametrize("write", ["patch", "delete"])
+    async def test_read_racing_a_write_is_not_cached(
+        self, uow, cache: InMemoryCache, profile_data: dict, write: str
+    ):
+        write_log = WriteLog(max_age=60)
+        await UserProfilesService(uow=uow).add_user(UserProfileRecord(**profile_data))
+
+        # The read gets the profile, then the write commits before it fills the cache
+        find = uow.profiles.find
+        read, written = asyncio.Event(), asyncio.Event()
+
+        async def find_then_wait(id: int):
+            user = SimpleNamespace(**vars(await find(id)))
+            read.set()
+            await written.wait()
+            return user
+
+        uow.profiles.find = find_then_wait
+        # Every request has its own service, sharing the cache and the write log
+        reader = UserProfilesService(uow=uow, cache=cache, write_log=write_log)
+        task = asyncio.create_task(reader.find_user(1))
+        await read.wait()
+        uow.profiles.find = find
+
+        writer = UserProfilesService(uow=uow, cache=cache, write_log=write_log)
+        if write == "patch":
+            await writer.patch_user(1, UserProfilePatch(name="Новое имя"))
+        else:
+            await writer.delete_user(1)
+        written.set()
+
+        # The read started before the write, so it may return the old profile
+        assert (await task).name == profile_data["name"]
+        assert await cache.get("profile:1") is None
+        if write == "patch":
+            assert (await reader.find_user(1)).name == "Новое имя"
+        else:
+            with pytest.raises(EntityNotFoundException):
+                await reader.find_user(1)
+
+    async def test_not_found_is_not_cached(
+        self, service: UserProfilesService, cache: InMemoryCache
+    ):
+        with pytest.raises(EntityNotFoundException):
+            await service.find_user(2)
+        assert cache.stats()["size"] == 0
+
+    async def test_find_user_json(self, service: UserProfilesService, uow):
+        loaded = await service.find_user_json(1)
+        cached = await service.find_user_json(1)
+
+        assert loaded == cached
+        assert UserProfileRead.model_validate_json(cached).telegram_id == 1
+        assert uow.profiles.calls["find"] == 1
+
+    async def test_find_user_json_without_cache(self, uow, profile_data: dict):
+        service = UserProfilesService(uow=uow)
+        await service.add_user(UserProfileRecord(**profile_data))
+
+        user = await service.find_user_json(1)
+        assert UserProfileRead.model_validate_json(user) == UserProfileRead(
+            **profile_data
+        )
+
+
+class TestProfileSingleFlight:
+    async def test_concurrent_reads_run_one_query(self, uow, profile_data: dict):
+        single_flight = SingleFlight()
+        await UserProfilesService(uow=uow).add_user(UserProfileRecord(**profile_data))
+        uow.profiles.calls.clear()
+        uow.profiles.gate = asyncio.Event()
+
+        # Every request has its own service, as with one ServiceFactory per request
+        tasks = [
+            asyncio.create_task(
+                UserProfilesService(uow=uow, single_flight=single_flight).find_user(1)
+            )
+            for _ in range(20)
+        ]
+        await asyncio.sleep(0)
+        uow.profiles.gate.set()
+        users = await asyncio.gather(*tasks)
+
+        assert uow.profiles.calls["find"] == 1
+        assert all(user.telegram_id == 1 for user in users)
+
+    async def test_not_found_is_propagated(self, uow):
+        single_flight = SingleFlight()
+        uow.profiles.gate = asyncio.Event()
+
+        tasks = [
+            asyncio.create_task(
+                UserProfilesService(uow=uow, single_flight=single_flight).find_user(1)
+            )
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        uow.profiles.gate.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        assert uow.profiles.calls["find"] == 1
+        assert all(isinstance(r, EntityNotFoundException) for r in results)
+
+    async def test_shared_read_outlives_the_first_request(
+        self, uow, profile_data: dict
+    ):
+        single_flight = SingleFlight()
+        await UserProfilesService(uow=uow).add_user(UserProfileRecord(**profile_data))
+        uow.profiles.gate = asyncio.Event()
+        opened = []
+
+        @contextlib.asynccontextmanager
+        async def shared_read_uow():
+            opened.append(uow)
+            yield uow
+
+        def request_service() -> UserProfilesService:
+            # The session of a request holds nothing the shared read needs
+            return UserProfilesService(
+                uow=type(uow)(),
+                single_flight=single_flight,
+                shared_read_uow=shared_read_uow,
+            )
+
+        first = asyncio.create_task(request_service().find_user(1))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(request_service().find_user(1))
+        await asyncio.sleep(0)
+        first.cancel()  # The first client disconnects
+        uow.profiles.gate.set()
+
+        assert (await second).telegram_id == 1
+        assert len(opened) == 1
@@ -0,0 +1,106 @@
+import pytest
+
+from app.core.write_behind import WriteBehindBuffer
+from app.schemas.user_schema import SwipeCreate
+from app.services.exceptions import (
+    InvalidPayloadException,
+    ServiceOverloadedException,
+)
+from app.services.swipe_service import SwipeService, swipe_key
+
+
+@pytest.fixture
+def buffer(uow) -> WriteBehindBuffer[dict]:
+    # Not started: swipes stay buffered until the test flushes them
+    return WriteBehindBuffer(uow.swipes.add_many, key=swipe_key, max_size=2)
+
+
+def like(swipee_id: int) -> SwipeCreate:
+    return SwipeCreate(swipee_id=swipee_id, liked=True)
+
+
+class TestSwipeInline:
+    async def test_mutual_like_is_a_match(self, uow):
+        service = SwipeService(uow)
+
+        first = await service.swipe(1, like(2))
+        second = await service.swipe(2, like(1))
+
+        assert not first.match
+        assert second.match
+        assert uow.swipes.rows == {(1, 2): True, (2, 1): True}
+
+    async def test_pass_is_never_a_match(self, uow):
+        service = SwipeService(uow)
+        await service.swipe(1, like(2))
+
+        result = await service.swipe(2, SwipeCreate(swipee_id=1, liked=False))
+        assert not result.match
+
+    async def test_like_of_a_pass_is_not_a_match(self, uow):
+        service = SwipeService(uow)
+        await service.swipe(1, SwipeCreate(swipee_id=2, liked=False))
+
+        assert not (await service.swipe(2, like(1))).match
+
+    async def test_repeated_swipe_reports_the_first_decision(self, uow):
+        service = SwipeService(uow)
+        await service.swipe(1, SwipeCreate(swipee_id=2, liked=False))
+        await service.swipe(2, like(1))
+
+        result = await service.swipe(1, like(2))
+        assert not result.liked
+        assert not result.match
+
+    async def test_cannot_swipe_oneself(self, uow):
+        with pytest.raises(InvalidPayloadException):
+            await SwipeService(uow).swipe(1, like(1))
+
+
+class TestSwipeBuffered:
+    async def test_match_with_buffered_like(self, uow, buffer):
+        service = SwipeService(uow, buffer=buffer)
+
+        await service.swipe(1, like(2))
+        result = await service.swipe(2, like(1))
+
+        assert result.match
+        assert uow.swipes.rows == {}
+
+    async def test_match_with_written_like(self, uow, buffer):
+        await uow.swipes.add_many([{"swiper_id": 1, "swipee_id": 2, "liked": True}])
+
+        result = await SwipeService(uow, buffer=buffer).swipe(2, like(1))
+        assert result.match
+        assert buffer.get((2, 1)) is not None
+
+    async def test_repeated_buffered_swipe_reports_the_first_decision(
+        self, uow, buffer
+    ):
+        service = SwipeService(uow, buffer=buffer)
+        await service.swipe(1, SwipeCreate(swipee_id=2, liked=False))
+        await service.swipe(2, like(1))
+
+        result = await service.swipe(1, like(2))
+        assert not result.liked
+        assert not result.match
+
+    async def test_repeated_swipe_of_a_written_one(self, uow, buffer):
+        await uow.swipes.add_many(
+            [
+                {"swiper_id": 1, "swipee_id": 2, "liked": False},
+                {"swiper_id": 2, "swipee_id": 1, "liked": True},
+            ]
+        )
+
+        result = await SwipeService(uow, buffer=buffer).swipe(1, like(2))
+        assert not result.liked
+        assert not result.match
+
+    async def test_full_buffer_is_overloaded(self, uow, buffer):
+        service = SwipeService(uow, buffer=buffer, buffer_timeout=0.01)
+        await service.swipe(1, like(2))
+        await service.swipe(1, like(3))
+
+        with pytest.raises(ServiceOverloadedException):
+            await service.swipe(1, like(4))
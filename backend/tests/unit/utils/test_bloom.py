@@ -0,0 +1,100 @@
+import random
+
+import pytest
+
+from app.utils.bloom import BloomFilter, ScalableBloomFilter, optimal_size
+
+
+class TestOptimalSize:
+    def test_textbook_sizes(self):
+        # 1% needs about 9.6 bits and 7 hashes per item
+        assert optimal_size(1000, 0.01) == (9592, 7)
+        assert optimal_size(1000, 0.001) == (14384, 10)
+
+    def test_whole_bytes(self):
+        bits, hashes = optimal_size(1, 0.5)
+        assert bits % 8 == 0
+        assert hashes >= 1
+
+
+class TestBloomFilter:
+    def test_no_false_negatives(self):
+        bloom = BloomFilter.for_capacity(1000, 0.01)
+        items = random.Random(0).sample(range(1, 10**12), 1000)
+        bloom.update(items)
+
+        assert all(item in bloom for item in items)
+        assert bloom.count == 1000
+
+    def test_false_positive_rate_near_target(self):
+        rng = random.Random(1)
+        bloom = BloomFilter.for_capacity(2000, 0.01)
+        bloom.update(rng.randrange(1, 10**10) for _ in range(2000))
+
+        others = [rng.randrange(10**10, 2 * 10**10) for _ in range(20_000)]
+        rate = sum(item in bloom for item in others) / len(others)
+        assert rate < 0.02
+        assert bloom.false_positive_rate() == pytest.approx(0.01, rel=0.1)
+
+    def test_consecutive_ids_spread(self):
+        bloom = BloomFilter.for_capacity(500, 0.01)
+        bloom.update(range(1, 501))
+
+        rate = sum(item in bloom for item in range(501, 10_501)) / 10_000
+        assert rate < 0.02
+
+    def test_roundtrip_through_bytes(self):
+        bloom = BloomFilter.for_capacity(10, 0.01)
+        bloom.add(42)
+
+        copy = BloomFilter(bytes(bloom.bits), bloom.hashes, bloom.count)
+        assert 42 in copy
+        assert 43 not in copy
+
+    def test_contains_many_matches_contains(self):
+        np = pytest.importorskip("numpy")
+        bloom = BloomFilter.for_capacity(100, 0.05)
+        bloom.update(range(0, 300, 3))
+
+        items = np.arange(0, 2**40, 2**40 // 1000, dtype=np.int64)
+        items = np.concatenate([items, np.arange(300, dtype=np.int64)])
+        expected = [int(item) in bloom for item in items]
+        assert bloom.contains_many(items).tolist() == expected
+
+
+class TestScalableBloomFilter:
+    def test_adds_slices_as_it_fills_up(self):
+        bloom = ScalableBloomFilter(100, 0.01)
+        items = random.Random(0).sample(range(1, 10**12), 1000)
+        bloom.update(items)
+
+        # 100 + 200 + 400 + 800 items
+        assert len(bloom.slices) == 4
+        assert [s.count for s in bloom.slices[:3]] == [100, 200, 400]
+        assert all(item in bloom for item in items)
+
+    def test_false_positive_rate_stays_bounded(self):
+        rng = random.Random(1)
+        bloom = ScalableBloomFilter(200, 0.01)
+        bloom.update(rng.randrange(1, 10**10) for _ in range(10_000))
+
+        others = [rng.randrange(10**10, 2 * 10**10) for _ in range(20_000)]
+        rate = sum(item in bloom for item in others) / len(others)
+        assert rate < 0.015
+        assert bloom.false_positive_rate() < 0.012
+
+    def test_items_already_in_are_not_counted(self):
+        bloom = ScalableBloomFilter(10, 0.01)
+        bloom.update([1, 2, 1, 2, 3])
+
+        assert bloom.count == 3
+
+    def test_contains_many_matches_contains(self):
+        np = pytest.importorskip("numpy")
+        bloom = ScalableBloomFilter(20, 0.05)
+        bloom.update(range(0, 300, 3))
+
+        items = np.arange(0, 2**40, 2**40 // 1000, dtype=np.int64)
+        items = np.concatenate([items, np.arange(300, dtype=np.int64)])
+        expected = [int(item) in bloom for item in items]
+        assert bloom.contains_many(items).tolist() == expected
@@ -0,0 +1,40 @@
+import pytest
+
+from app.services.exceptions import InvalidPayloadException
+from app.utils.bulk_import import iter_json_array, iter_ndjson
+
+
+async def _collect(rows) -> list:
+    return [row async for row in rows]
+
+
+async def _chunks(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+class TestJsonArray:
+    async def test_items(self):
+        assert await _collect(iter_json_array(b'[{"a": 1}, 2]')) == [{"a": 1}, 2]
+
+    async def test_invalid_json(self):
+        with pytest.raises(InvalidPayloadException):
+            await _collect(iter_json_array(b"[{"))
+
+    async def test_not_an_array(self):
+        with pytest.raises(InvalidPayloadException):
+            await _collect(iter_json_array(b'{"a": 1}'))
+
+
+class TestNdjson:
+    async def test_lines_split_across_chunks(self):
+        chunks = _chunks(b'{"a": 1}\n{"a"', b": 2}\n", b'{"a": 3}')
+        assert await _collect(iter_ndjson(chunks)) == [
+            b'{"a": 1}',
+            b'{"a": 2}',
+            b'{"a": 3}',
+        ]
+
+    async def test_skips_blank_lines(self):
+        chunks = _chunks(b'\n{"a": 1}\r\n\n  \n')
+        assert await _collect(iter_ndjson(chunks)) == [b'{"a": 1}']
@@ -0,0 +1,103 @@
+import math
+import random
+
+import pytest
+
+from app.utils.geo import (
+    EARTH_RADIUS_KM,
+    Circle,
+    covering_ranges,
+    geohash,
+    haversine_km,
+)
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def to_base32(key: int, length: int) -> str:
+    bits = 52
+    return "".join(BASE32[(key >> (bits - 5 * (i + 1))) & 31] for i in range(length))
+
+
+def destination(circle: Circle, distance_km: float, bearing: float) -> tuple:
+    lat, lon = math.radians(circle.latitude), math.radians(circle.longitude)
+    angle = distance_km / EARTH_RADIUS_KM
+    lat2 = math.asin(
+        math.sin(lat) * math.cos(angle)
+        + math.cos(lat) * math.sin(angle) * math.cos(bearing)
+    )
+    lon2 = lon + math.atan2(
+        math.sin(bearing) * math.sin(angle) * math.cos(lat),
+        math.cos(angle) - math.sin(lat) * math.sin(lat2),
+    )
+    return math.degrees(lat2), (math.degrees(lon2) + 180) % 360 - 180
+
+
+class TestGeohash:
+    def test_matches_base32_geohash(self):
+        assert to_base32(geohash(48.8566, 2.3522), 8) == "u09tvw0f"
+        assert to_base32(geohash(42.605, -5.603), 5) == "ezs42"
+
+    def test_vectorized_matches_scalar(self):
+        np = pytest.importorskip("numpy")
+        rng = np.random.default_rng(0)
+        lats = rng.uniform(-90, 90, 100)
+        lons = rng.uniform(-180, 180, 100)
+        keys = geohash(lats, lons)
+        assert keys.tolist() == [
+            geohash(lat, lon) for lat, lon in zip(lats, lons, strict=True)
+        ]
+
+    def test_bounds(self):
+        assert geohash(-90.0, -180.0) == 0
+        assert geohash(90.0, 180.0) == (1 << 52) - 1
+
+
+class TestHaversine:
+    def test_quarter_great_circle(self):
+        assert haversine_km(0.0, 0.0, 0.0, 90.0) == pytest.approx(
+            math.pi / 2 * EARTH_RADIUS_KM
+        )
+        assert haversine_km(0.0, 0.0, 90.0, 0.0) == pytest.approx(
+            math.pi / 2 * EARTH_RADIUS_KM
+        )
+
+    def test_numpy(self):
+        np = pytest.importorskip("numpy")
+        distances = haversine_km(
+            np.array([0.0, 0.0]), np.array([0.0, 0.0]), 0.0, np.array([0.0, 1.0]), np
+        )
+        assert distances[0] == 0
+        assert distances[1] == pytest.approx(111.2, abs=0.1)
+
+
+class TestCoveringRanges:
+    @pytest.mark.parametrize("radius_km", [0.5, 5, 50, 500, 5000])
+    def test_cover_every_point_in_circle(self, radius_km):
+        rng = random.Random(radius_km)
+        for _ in range(500):
+            circle = Circle(rng.uniform(-90, 90), rng.uniform(-180, 180), radius_km)
+            ranges = covering_ranges(circle)
+            assert len(ranges) <= 25
+            for _ in range(10):
+                point = destination(
+                    circle, rng.uniform(0, radius_km), rng.uniform(0, 2 * math.pi)
+                )
+                key = geohash(*point)
+                assert any(low <= key < high for low, high in ranges)
+
+    def test_across_antimeridian(self):
+        ranges = covering_ranges(Circle(0.0, 179.99, 10))
+        for lon in (179.95, -179.95):
+            key = geohash(0.0, lon)
+            assert any(low <= key < high for low, high in ranges)
+
+    def test_small_circle_scans_a_small_share(self):
+        ranges = covering_ranges(Circle(55.7558, 37.6173, 10))
+        assert sum(high - low for low, high in ranges) / (1 << 52) < 1e-5
+
+    def test_pole_covers_every_longitude(self):
+        ranges = covering_ranges(Circle(89.99, 0.0, 50))
+        for lon in (-179.0, 0.0, 90.0):
+            key = geohash(89.995, lon)
+            assert any(low <= key < high for low, high in ranges)
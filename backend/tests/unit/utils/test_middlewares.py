@@ -0,0 +1,159 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from httpx import ASGITransport, AsyncClient
+from pydantic import BaseModel
+
+from app.core.metrics import REQUEST_LATENCY
+from app.utils.middlewares import (
+    BodySizeLimitMiddleware,
+    ErrorHandlingMiddleware,
+    MetricsMiddleware,
+    RequestIdMiddleware,
+    TimingMiddleware,
+)
+
+
+class Item(BaseModel):
+    name: str
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for chunk in (b"a", b"b", b"c"):
+                yield chunk
+
+        return StreamingResponse(chunks())
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int) -> dict:
+        return {"id": item_id}
+
+    @app.get("/request-id")
+    async def request_id(request: Request) -> dict:
+        return {"request_id": request.state.request_id}
+
+    @app.post("/items")
+    async def create_item(item: Item) -> dict:
+        return {"name": item.name}
+
+    @app.post("/raw")
+    async def raw(request: Request) -> dict:
+        return {"size": len(await request.body())}
+
+    app.add_middleware(
+        BodySizeLimitMiddleware, max_body_size=32, path_limits={"/raw": 64}
+    )
+    app.add_middleware(ErrorHandlingMiddleware)
+    app.add_middleware(TimingMiddleware)
+    app.add_middleware(RequestIdMiddleware)
+    app.add_middleware(MetricsMiddleware)
+    return app
+
+
+@pytest.fixture
+async def client():
+    async with AsyncClient(
+        transport=ASGITransport(app=make_app()), base_url="http://test"
+    ) as client:
+        yield client
+
+
+async def _chunks(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+class TestErrorHandling:
+    async def test_unhandled_exception(self, client: AsyncClient):
+        response = await client.get("/boom")
+
+        assert response.status_code == 500
+        assert response.json() == {"error": "Internal Server Error"}
+        assert "x-request-id" in response.headers
+
+    async def test_streaming_response(self, client: AsyncClient):
+        response = await client.get("/stream")
+
+        assert response.status_code == 200
+        assert response.content == b"abc"
+
+
+class TestRequestId:
+    async def test_generated(self, client: AsyncClient):
+        response = await client.get("/request-id")
+
+        request_id = response.headers["x-request-id"]
+        assert len(request_id) == 32
+        assert response.json() == {"request_id": request_id}
+
+    async def test_reused_from_client(self, client: AsyncClient):
+        response = await client.get("/request-id", headers={"X-Request-ID": "abc-1"})
+
+        assert response.headers["x-request-id"] == "abc-1"
+        assert response.json() == {"request_id": "abc-1"}
+
+    async def test_replaced_when_too_long(self, client: AsyncClient):
+        response = await client.get("/request-id", headers={"X-Request-ID": "a" * 129})
+
+        assert len(response.headers["x-request-id"]) == 32
+
+
+class TestTiming:
+    async def test_server_timing_header(self, client: AsyncClient):
+        response = await client.get("/request-id")
+
+        assert response.headers["server-timing"].startswith("app;dur=")
+
+
+class TestBodySizeLimit:
+    async def test_within_limit(self, client: AsyncClient):
+        response = await client.post("/items", json={"name": "a"})
+
+        assert response.status_code == 200
+
+    async def test_declared_length_over_limit(self, client: AsyncClient):
+        response = await client.post("/items", json={"name": "a" * 40})
+
+        assert response.status_code == 413
+
+    async def test_chunked_body_over_limit(self, client: AsyncClient):
+        body = _chunks(b'{"name": "', b"a" * 40, b'"}')
+        response = await client.post("/items", content=body)
+
+        assert response.status_code == 413
+
+    async def test_path_limit(self, client: AsyncClient):
+        response = await client.post("/raw", content=b"a" * 48)
+        assert response.json() == {"size": 48}
+
+        response = await client.post("/raw", content=_chunks(b"a" * 48, b"a" * 48))
+        assert response.status_code == 413
+
+
+class TestMetrics:
+    async def test_route_template_label(self, client: AsyncClient):
+        before = REQUEST_LATENCY.count("GET", "/items/{item_id}", "200")
+
+        await client.get("/items/1")
+        await client.get("/items/2")
+
+        assert REQUEST_LATENCY.count("GET", "/items/{item_id}", "200") == before + 2
+
+    async def test_error_and_unmatched(self, client: AsyncClient):
+        before_error = REQUEST_LATENCY.count("GET", "/boom", "500")
+        before_unmatched = REQUEST_LATENCY.count("GET", "unmatched", "404")
+
+        await client.get("/boom")
+        await client.get("/missing")
+
+        assert REQUEST_LATENCY.count("GET", "/boom", "500") == before_error + 1
+        assert REQUEST_LATENCY.count("GET", "unmatched", "404") == before_unmatched + 1
@@ -0,0 +1,51 @@
+import pytest
+
+from app.services.exceptions import InvalidCursorException
+from app.utils.pagination import decode_cursor, decode_rank_cursor, encode_cursor
+
+
+class TestCursor:
+    def test_round_trip(self):
+        cursor = encode_cursor(123456789)
+        assert decode_cursor(cursor) == [123456789]
+
+    def test_round_trip_many_values(self):
+        cursor = encode_cursor(0.5, 42)
+        assert decode_cursor(cursor, size=2) == [0.5, 42]
+
+    def test_is_url_safe(self):
+        cursor = encode_cursor(2**62)
+        assert "=" not in cursor
+        assert "+" not in cursor
+        assert "/" not in cursor
+
+    def test_invalid_base64(self):
+        with pytest.raises(InvalidCursorException):
+            decode_cursor("!!!")
+
+    def test_invalid_json(self):
+        with pytest.raises(InvalidCursorException):
+            decode_cursor("bm90IGpzb24")
+
+    def test_wrong_size(self):
+        with pytest.raises(InvalidCursorException):
+            decode_cursor(encode_cursor(1, 2))
+
+
+class TestRankCursor:
+    def test_round_trip(self):
+        rank = 0.1 + 0.2  # Not exact in binary, must come back unchanged
+        assert decode_rank_cursor(encode_cursor(rank, 42)) == (rank, 42)
+
+    def test_integral_rank(self):
+        assert decode_rank_cursor(encode_cursor(1, 42)) == (1.0, 42)
+
+    def test_none(self):
+        assert decode_rank_cursor(None) is None
+
+    @pytest.mark.parametrize(
+        "values", [("0.5", 42), (0.5, 42.0), (0.5, "42"), (True, 42), (0.5,)]
+    )
+    def test_invalid_values(self, values):
+        with pytest.raises(InvalidCursorException):
+            decode_rank_cursor(encode_cursor(*values))
@@ -0,0 +1,15 @@
+from app.utils.search import plain_terms
+
+
+class TestPlainTerms:
+    def test_words(self):
+        assert plain_terms("Алексндр  Пушкин") == "Алексндр Пушкин"
+
+    def test_drops_quotes_and_or(self):
+        assert plain_terms('"горы и море" or Лыжи') == "горы и море Лыжи"
+
+    def test_drops_excluded_words(self):
+        assert plain_terms('рисую -олег -"скучные дела"') == "рисую"
+
+    def test_nothing_left(self):
+        assert plain_terms("-олег OR") == ""
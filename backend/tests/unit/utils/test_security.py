@@ -0,0 +1,114 @@
+import time
+from types import SimpleNamespace
+
+import jwt
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.core.cache import InMemoryCache
+from app.core.config import settings
+from app.utils import security
+from app.utils.security import verify_jwt_token
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_token(**payload) -> HTTPAuthorizationCredentials:
+    payload = {"bot_id": "telegram-bot", "exp": time.time() + 3600, **payload}
+    token = jwt.encode(payload, settings.SECRET_API_KEY, algorithm="HS256")
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def request_(clock: FakeClock) -> SimpleNamespace:
+    token_cache = InMemoryCache(
+        max_size=10, ttl=settings.JWT_CACHE_MAX_TTL, clock=clock
+    )
+    return SimpleNamespace(
+        app=SimpleNamespace(state=SimpleNamespace(token_cache=token_cache))
+    )
+
+
+@pytest.fixture
+def decodes(monkeypatch) -> list[str]:
+    calls = []
+    decode = jwt.decode
+
+    def counting_decode(token, *args, **kwargs):
+        calls.append(token)
+        return decode(token, *args, **kwargs)
+
+    monkeypatch.setattr(security.jwt, "decode", counting_decode)
+    return calls
+
+
+class TestVerifyJwtToken:
+    async def test_accepted_token_is_cached(self, request_, decodes):
+        credentials = make_token()
+
+        await verify_jwt_token(request_, credentials)
+        await verify_jwt_token(request_, credentials)
+
+        assert len(decodes) == 1
+
+    async def test_cache_keeps_only_digest(self, request_):
+        credentials = make_token()
+
+        await verify_jwt_token(request_, credentials)
+
+        keys = list(request_.app.state.token_cache._entries)
+        assert keys == [security.token_cache_key(credentials.credentials)]
+        assert credentials.credentials not in keys[0]
+
+    async def test_entry_expires_with_token(self, request_, clock, decodes):
+        credentials = make_token(exp=time.time() + 10)
+
+        await verify_jwt_token(request_, credentials)
+        clock.now += 11
+        # The token itself is still valid for PyJWT here, so it is decoded again
+        await verify_jwt_token(request_, credentials)
+
+        assert len(decodes) == 2
+
+    async def test_rejection_is_cached_briefly(self, request_, clock, decodes):
+        credentials = make_token(bot_id="other-bot")
+
+        for _ in range(2):
+            with pytest.raises(HTTPException) as exc:
+                await verify_jwt_token(request_, credentials)
+            assert exc.value.status_code == 403
+            assert exc.value.detail == "Invalid bot"
+        assert len(decodes) == 1
+
+        clock.now += settings.JWT_REJECTION_CACHE_TTL
+        with pytest.raises(HTTPException):
+            await verify_jwt_token(request_, credentials)
+        assert len(decodes) == 2
+
+    async def test_expired_token(self, request_):
+        credentials = make_token(exp=time.time() - 1)
+
+        with pytest.raises(HTTPException) as exc:
+            await verify_jwt_token(request_, credentials)
+        assert exc.value.status_code == 401
+
+    async def test_without_cache(self, decodes):
+        request_ = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace()))
+        credentials = make_token()
+
+        await verify_jwt_token(request_, credentials)
+        await verify_jwt_token(request_, credentials)
+
+        assert len(decodes) == 2
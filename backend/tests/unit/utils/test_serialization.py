@@ -0,0 +1,73 @@
+import json
+
+from fastapi import status
+
+from app.main import app
+from app.schemas.user_schema import Page, UserProfileRead
+from app.utils.serialization import json_response, type_adapter
+
+
+def make_profile(telegram_id: int) -> UserProfileRead:
+    return UserProfileRead(
+        telegram_id=telegram_id,
+        name="Юзер",
+        about_me="Какие-нибудь данные",
+        age=25,
+        city="Москва",
+        sex="Мужской",
+    )
+
+
+class TestTypeAdapter:
+    def test_is_built_once(self):
+        assert type_adapter(list[UserProfileRead]) is type_adapter(
+            list[UserProfileRead]
+        )
+
+    def test_validates_from_attributes(self):
+        profile = make_profile(1)
+        [read] = type_adapter(list[UserProfileRead]).validate_python(
+            [profile], from_attributes=True
+        )
+        assert read == profile
+
+
+class TestJsonResponse:
+    def test_encodes_content(self):
+        page = Page[UserProfileRead](items=[make_profile(1)], next_cursor=None)
+        response = json_response(page)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.media_type == "application/json"
+        assert json.loads(response.body) == page.model_dump(mode="json")
+
+    def test_keeps_non_ascii(self):
+        response = json_response(make_profile(1))
+        assert "Юзер".encode() in response.body
+
+    def test_explicit_type(self):
+        response = json_response(
+            [make_profile(1)], list[UserProfileRead], status.HTTP_201_CREATED
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        assert json.loads(response.body)[0]["telegram_id"] == 1
+
+
+class TestRouteSchemas:
+    def test_response_models_are_documented(self):
+        paths = app.openapi()["paths"]
+        schemas = {
+            ("/users/profiles", "get"): "#/components/schemas/Page_UserProfileRead_",
+            ("/users/{telegram_id}/profiles", "get"): (
+                "#/components/schemas/UserProfileRead"
+            ),
+            ("/users/profiles:batchGet", "post"): (
+                "#/components/schemas/ProfilesBatchGetResult"
+            ),
+            ("/users/{telegram_id}/candidates", "get"): (
+                "#/components/schemas/Page_UserProfileRead_"
+            ),
+        }
+        for (path, method), ref in schemas.items():
+            response = paths[path][method]["responses"]["200"]
+            assert response["content"]["application/json"]["schema"] == {"$ref": ref}